@@ -96,6 +96,9 @@ class robotIKS(OpenMaya.MPxNode):
     
     def __init__(self):
         OpenMaya.MPxNode.__init__(self)
+
+        # IK solver context; rebuilt only when the robot's attributes change
+        self.solver_context = None
     
     
     ##################################################
@@ -237,21 +240,21 @@ class robotIKS(OpenMaya.MPxNode):
 
 
         if ik:
-            thetas = inverse_kinematics.solve(
-                            tcp,
-                            tcp_mat,
-                            lcs,
-                            lcs_mat,
-                            target,
-                            target_mat,
-                            robot_definition,
-                            solver_type,
-                            sol)
-           
-            # Apply axis offsets
-            thetas = inverse_kinematics.apply_offsets(thetas,
+            if self.solver_context is None or \
+                    not self.solver_context.matches(robot_definition,
+                                                    solver_type,
+                                                    angle_offsets,
+                                                    flip_rot_directions):
+                self.solver_context = inverse_kinematics.SolverContext(
+                                            robot_definition,
+                                            solver_type,
                                             angle_offsets,
                                             flip_rot_directions)
+
+            # Solve and apply axis offsets
+            thetas = self.solver_context.solve(
+                            (tcp, tcp_mat, lcs, lcs_mat, target, target_mat),
+                            sol)
             
             # Convert to MAngle data type for output
             # (the "2" is for data type degrees. 1 = radians)
@@ -9,11 +9,15 @@ except ImportError:  # Maya is not running
 
 from analysis import analysis_ui
 from analysis import analysis_utils
+from analysis import analysis_ui_config
+import mimic_utils
 import ui_utils
+from postproc import postproc
 import importlib
 
 importlib.reload(analysis_ui)
 importlib.reload(analysis_utils)
+importlib.reload(analysis_ui_config)
 importlib.reload(ui_utils)
 
 
@@ -36,21 +40,65 @@ def run(robot_name, command_dicts, limit_data):
     
     # Get list of axis numbers from the program data
     axis_numbers = analysis_utils.get_axis_numbers(command_dicts)    
-    
+
+    # Get the program data from Maya's animation, and the Cartesian TCP
+    # channels from its poses or, if they weren't sampled, the robot's FK
+    program_data, frames = analysis_utils.get_program_data(command_dicts)
+    tcp_data = _get_tcp_program_data(robot_name, command_dicts)
+    program_data.update(tcp_data)
+    channel_names = [channel for channel in analysis_utils.TCP_CHANNEL_NAMES
+                     if channel in tcp_data]
+
     # Create the Mimic Analysis UI and parent it to Maya's main UI window
     parent_window = ui_utils.getMayaWindow()
     mimic_analysis_window = analysis_ui.MimicAnalysisWindow(
                             window_name=window_name,
                             axis_numbers=axis_numbers,
+                            channel_names=channel_names,
                             parent=parent_window)
 
-    # Get the program data from Maya's animation, and assign it to the plot
-    program_data, frames = analysis_utils.get_program_data(command_dicts)
+    # Assign the program data to the plot
     mimic_analysis_window.analysis_plot.add_plot_data(program_data, frames)
 
-    # Add axis limit data to the plot
-    # TO-DO: add external axis limit data
+    # Add axis limit data to the plot, for the axes in the program
+    limit_data = {limit_type: {axis_name: axis_limits
+                               for axis_name, axis_limits in type_limits.items()
+                               if axis_name in program_data}
+                  for limit_type, type_limits in limit_data.items()}
+    _add_tcp_limit_data(limit_data, channel_names)
     mimic_analysis_window.analysis_plot.add_limit_data(limit_data)
 
-    mimic_analysis_window.initialize_toggle_states() 
+    mimic_analysis_window.initialize_toggle_states()
+
+
+def _get_tcp_program_data(robot_name, command_dicts):
+    """
+    Generates the Cartesian TCP channels of the program
+    :param robot_name: str, name of robot whose program is to be analyzed
+    :param command_dicts: list formatted by mimic_program containing dicts of
+        program info at each program timestep
+    :return tcp_data: dict, as analysis_utils.get_tcp_program_data
+    """
+    solver_params = None
+    if postproc.POSE not in command_dicts[0]:
+        solver_params = mimic_utils.get_solver_params(robot_name)
+
+    try:
+        return analysis_utils.get_tcp_program_data(command_dicts, solver_params)
+    except ValueError:  # The robot's solver type has no forward kinematics
+        return {}
+
 
+def _add_tcp_limit_data(limit_data, channel_names):
+    """
+    Adds the configured limits of the Cartesian TCP channels to limit_data
+    :param limit_data: dict containing the position/velocity/accel/jerk
+        limits for given robot; updated in place
+    :param channel_names: list of TCP channels in the program
+    """
+    for channel in channel_names:
+        # TCP channels are magnitudes, so only have max limits
+        channel_limits = analysis_ui_config.TCP_LIMITS.get(channel, {})
+        for limit_type in limit_data:
+            limit_data[limit_type][channel] = {'Min Limit': None,
+                                               'Max Limit': channel_limits.get(limit_type)}
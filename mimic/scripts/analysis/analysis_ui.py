@@ -38,7 +38,7 @@ class MimicAnalysisWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
     Inherits from MayaQWidgetDockableMixin to enable docking
     Inherits from QtWidgets.QMainWindow
     """
-    def __init__(self, window_name, axis_numbers, parent=None):
+    def __init__(self, window_name, axis_numbers, channel_names=None, parent=None):
         # If a Mimic Analysis window already exists, delete it before
         # instantiating a new one
         self._delete_instance(window_name)
@@ -47,6 +47,8 @@ class MimicAnalysisWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
 
         self.window_name = window_name
         self.axis_numbers = axis_numbers
+        # Cartesian channels toggled with the axes, e.g. 'TCP Linear'
+        self.channel_names = list(channel_names or [])
 
         # Create and assign the central widget
         central_widget = QtWidgets.QWidget()
@@ -152,7 +154,7 @@ class MimicAnalysisWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
         
         # Create the main plot window
         self.analysis_plot = analysis_ui_utils.AnalysisPlotWidget()
-        self.analysis_plot.set_axis_numbers(self.axis_numbers)
+        self.analysis_plot.set_axis_numbers(self.axis_numbers, self.channel_names)
 
         # Add a Legend to the plot
         legend = pg.LegendItem(offset=(60, 5))
@@ -258,7 +260,9 @@ class MimicAnalysisWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
 
         for axis_number in self.axis_numbers:
             axis_toggle_names.append('Axis {}'.format(axis_number))
-        
+
+        # Cartesian channels are toggled like axes
+        axis_toggle_names.extend(self.channel_names)
         
         axis_toggle_widget = analysis_ui_utils.DataControlWidget(
                                                toggle_names=axis_toggle_names,
@@ -344,6 +348,7 @@ class MimicAnalysisWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
         # Get default toggle states from analysis_ui_config
         axis_states = analysis_ui_config.AXIS_STATES
         external_axis_state = analysis_ui_config.EXTERNAL_AXIS_STATE
+        tcp_channel_state = analysis_ui_config.TCP_CHANNEL_STATE
         isolate_axis = analysis_ui_config.ISOLATE_AXIS
         derivative_states = analysis_ui_config.DERIVATIVE_STATES
         isolate_derivative = analysis_ui_config.ISOLATE_DERIVATIVE
@@ -359,6 +364,9 @@ class MimicAnalysisWindow(MayaQWidgetDockableMixin, QtWidgets.QMainWindow):
 
         # Set axis toggle states
         for toggle in axis_toggles:
+            if toggle in self.channel_names:
+                axis_toggles[toggle].setChecked(tcp_channel_state)
+                continue
             try:
                 axis_toggles[toggle].setChecked(axis_states[toggle])
             except KeyError:  # There's no default for the given axis
@@ -21,6 +21,10 @@ AXIS_STATES = {'Axis 1': True,
 # If 'False', all axes not included above will be unchecked
 EXTERNAL_AXIS_STATE = True
 
+# Default checked state for the Cartesian TCP channel toggles, 'TCP Linear'
+# and 'TCP Angular'
+TCP_CHANNEL_STATE = False
+
 # Default checked state for isolate axis toggle
 # If 'True', this toggle overrides multiple checked axes above and only the
 # first axis set to 'True' above will be checked
@@ -44,4 +48,17 @@ ISOLATE_DERIVATIVE = True
 SHOW_LEGEND = True
 
 # Default checked state for limit display toggle
-SHOW_LIMITS = False
\ No newline at end of file
+SHOW_LIMITS = False
+
+
+# TCP LIMITS
+# Limits of the Cartesian TCP channels, e.g. for safety zones or camera shake,
+# shown with the axis limits. TCP Linear limits are in mm/s, mm/s^2 and
+# mm/s^3; TCP Angular limits are in deg/s, deg/s^2 and deg/s^3.
+# Set a limit to None to leave it out
+TCP_LIMITS = {'TCP Linear': {'Velocity': None,
+                             'Accel': None,
+                             'Jerk': None},
+              'TCP Angular': {'Velocity': None,
+                              'Accel': None,
+                              'Jerk': None}}
\ No newline at end of file
@@ -512,7 +512,9 @@ class AnalysisPlotWidget(QtWidgets.QWidget):
         self.program_info = None  # Not implemented yet
 
         self.axis_numbers = None  # List of axis numbers for current program
-        self.axis_names = None  # list of axis names ['Axis 1', 'Axis 2'...]
+        self.channel_names = []  # list of Cartesian channels ['TCP Linear'...]
+        self.axis_names = None  # list of axis names ['Axis 1', 'Axis 2'...],
+                                # followed by channel names
         self.derivative_names = ['Position', 'Velocity', 'Accel', 'Jerk']
         
         self.plot_window.setBackground((78, 78, 78))
@@ -523,14 +525,18 @@ class AnalysisPlotWidget(QtWidgets.QWidget):
         self.plot.showGrid(x=True, y=True)
 
 
-    def set_axis_numbers(self, axis_numbers):
+    def set_axis_numbers(self, axis_numbers, channel_names=None):
         """
         Assigns input axis_numbers to the instance attribute axis_numbers.
         Generates and assigns axis names to instance attribute axis_names
         :param axis numbers: List of axis numbers for current program
+        :param channel_names: Optional list of Cartesian channels that are
+            plotted and toggled like axes, e.g. ['TCP Linear']
         """
         self.axis_numbers = axis_numbers
+        self.channel_names = list(channel_names or [])
         self.axis_names = ['Axis {}'.format(axis_num) for axis_num in self.axis_numbers]
+        self.axis_names += self.channel_names
 
 
     def get_axis_numbers(self):
@@ -635,7 +641,7 @@ class AnalysisPlotWidget(QtWidgets.QWidget):
         """
         frames = self.frames
         num_axes = max(self.axis_numbers)
-        pens = Palette(num_axes).pens
+        pens = Palette(num_axes, self.channel_names).pens
 
         plot_data = {}
 
@@ -660,8 +666,8 @@ class AnalysisPlotWidget(QtWidgets.QWidget):
             limits as pg.LinearRegionItems
         """
         num_axes = max(self.axis_numbers)
-        pens = Palette(num_axes).pens
-        brushes = Palette(num_axes).brushes
+        pens = Palette(num_axes, self.channel_names).pens
+        brushes = Palette(num_axes, self.channel_names).brushes
 
         region_buffer = 100
 
@@ -951,10 +957,13 @@ class Palette(object):
 
     _BRUSH_OPACITY = 25
 
-    def __init__(self, number_of_axes):
+    def __init__(self, number_of_axes, channel_names=None):
         super(Palette, self).__init__()
 
         self.number_of_axes = number_of_axes
+        # Pens and brushes are keyed by axis name, then channel name
+        self.names = ['Axis {}'.format(i + 1) for i in range(number_of_axes)]
+        self.names += list(channel_names or [])
 
         self.pens = self._create_pens()
         self.brushes = self._create_brushes()
@@ -964,12 +973,10 @@ class Palette(object):
         """
         pens = {}
 
-        for i in range(self.number_of_axes):
+        for i, pen_key in enumerate(self.names):
             number_of_colors = len(Palette._COLORS)
             color_index = i % number_of_colors
             pen_color = Palette._COLORS[color_index]
-            axis_number = i + 1  # Axis numbers are 1-indexed
-            pen_key = 'Axis {}'.format(axis_number)
 
             pens[pen_key] = {}
             for deriv in Palette._DERIVATIVES:
@@ -985,12 +992,10 @@ class Palette(object):
         """
         brushes = {}
 
-        for i in range(self.number_of_axes):
+        for i, brush_key in enumerate(self.names):
             number_of_colors = len(Palette._COLORS)
             color_index = i % number_of_colors
             brush_color = Palette._COLORS[color_index]
-            axis_number = i + 1  # Axis numbers are 1-indexed
-            brush_key = 'Axis {}'.format(axis_number)
 
             brushes[brush_key] = {}
             
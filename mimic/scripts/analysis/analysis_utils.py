@@ -10,9 +10,49 @@ except ImportError:  # Maya is not running
     cmds = None
     mel = None
     MAYA_IS_RUNNING = False
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; array derivatives are unavailable
+    np = None
+import hashlib
 import math
+from collections import namedtuple
+from collections import OrderedDict
 
 from postproc import postproc
+from postproc import trajectory
+from robotmath import forward_kinematics
+from robotmath import splines
+
+
+# Names of the program values and their derivatives, by order
+DERIVATIVE_NAMES = ['Position', 'Velocity', 'Accel', 'Jerk']
+
+# Axis values of a program and their derivatives, as arrays with one row
+# per command and one column per axis
+ProgramDerivatives = namedtuple('ProgramDerivatives', [
+                                'axis_numbers',  # as get_axis_numbers
+                                'frames',  # (N,)
+                                'time_index',  # (N,)
+                                'derivatives'  # OrderedDict of {derivative
+                                               # name: array of shape (N, A)}
+                                ])
+
+# Cartesian channels of the TCP, analyzed alongside the axes. Their
+# 'Position' is the distance the TCP travelled, in mm, or the angle it turned
+# through, in degrees; their derivatives are the magnitudes of its linear
+# (mm/s...) and angular (deg/s...) velocity, accel and jerk
+TCP_LINEAR = 'TCP Linear'
+TCP_ANGULAR = 'TCP Angular'
+TCP_CHANNEL_NAMES = [TCP_LINEAR, TCP_ANGULAR]
+
+# Columns of a trajectory that derivatives are computed from
+_DERIVATIVE_COLUMNS = ['frames', 'axes', 'external_axes']
+
+# Derivatives of the last program they were generated for, by a hash of its
+# axis values and time index. Limit checks and the analysis plot of the same
+# program share them
+_derivative_cache = {}
 
 
 def get_program_data(command_dicts):
@@ -30,29 +70,190 @@ def get_program_data(command_dicts):
         }
     :return frames: list of frame numbers representing the given program
     """
+    program_derivatives = get_program_derivatives(command_dicts)
 
-    # Get structure definitions from postproc module
-    axes = postproc.Axes
-    external_axes = postproc.ExternalAxes
+    # Format the program data for graphing
+    program_data = {}
+    for derivative, values in program_derivatives.derivatives.items():
+        for axis_number, axis_values in zip(program_derivatives.axis_numbers, values.T.tolist()):
+            program_data.setdefault('Axis {}'.format(axis_number), {})[derivative] = axis_values
 
-    # Generate analysis data (Velocity, Accel, Jerk) and store corresponding
-    # command_dicts in a list
-    combined_command_dicts = generate_data_for_analysis(command_dicts)
+    return program_data, program_derivatives.frames.tolist()
 
-    # Get a list of frame numbers representing the program
-    frames = get_program_frames(command_dicts)
 
-    # Format the program data for graphing
-    program_data = _format_program_data(combined_command_dicts)
+def get_program_derivatives(program):
+    """
+    Get the axis and external axis values of a program and all of their
+    derivatives, computed together over the time index. Values are read from
+    the columns of a trajectory; command dicts are converted to one first,
+    reading only the columns needed. The result of the last program is
+    cached, so checking and analyzing the same program computes its
+    derivatives once.
+    :param program: list formatted by mimic_program containing dicts of
+        program info at each program timestep, or a
+        trajectory.ProgramTrajectory with axes
+    :return: ProgramDerivatives tuple
+    """
+    _check_numpy()
+    if not isinstance(program, trajectory.ProgramTrajectory):
+        program = trajectory.ProgramTrajectory.from_command_dicts(
+            program, columns=_DERIVATIVE_COLUMNS)
+
+    frames = program.frames
+    time_index = program.time
+    values = program.axes
+    num_primary_axes = values.shape[1]
+    axis_numbers = list(range(1, num_primary_axes + 1))  # Axis numbers are 1-indexed
+    if program.external_axes is not None and len(program):
+        # External axes used by the program are those set in its first command
+        external_axes_indeces = np.flatnonzero(
+            ~np.ma.getmaskarray(program.external_axes)[0]).tolist()
+        if external_axes_indeces:
+            axis_numbers += [num_primary_axes + i + 1 for i in external_axes_indeces]
+            values = np.hstack([values, program.external_axes.data[:, external_axes_indeces]])
+
+    key = hashlib.sha1()
+    for array in (np.array(axis_numbers), frames, time_index, values):
+        key.update(array.tobytes())
+    key = key.hexdigest()
+
+    if key not in _derivative_cache:
+        derivatives = get_derivatives(time_index, values, len(DERIVATIVE_NAMES) - 1)
+        _derivative_cache.clear()
+        _derivative_cache[key] = ProgramDerivatives(
+            axis_numbers, frames, time_index,
+            OrderedDict(zip(DERIVATIVE_NAMES, derivatives)))
+    return _derivative_cache[key]
+
+
+def get_tcp_program_data(command_dicts, solver_params=None):
+    """
+    Generate the Cartesian TCP channels of a program for graphing, from its
+    sampled poses or, if poses weren't sampled, from forward kinematics of
+    its axes.
+    :param command_dicts: list formatted by mimic_program containing dicts of
+        program info at each program timestep
+    :param solver_params: optional mimic_utils.get_solver_params() of the
+        robot, to solve TCP poses from axes
+    :return tcp_data: dict {
+        'TCP Linear': {'Position':[], 'Velocity':[], 'Accel':[], 'Jerk':[]},
+        'TCP Angular': {'Position':[], 'Velocity':[], 'Accel':[], 'Jerk':[]}
+        }, or an empty dict if TCP poses are unavailable
+    """
+    tcp_poses = get_tcp_poses(command_dicts, solver_params)
+    if tcp_poses is None:
+        return {}
+
+    time_index = [command[postproc.TIME_INDEX] for command in command_dicts]
+    tcp_derivatives = get_tcp_derivatives(time_index, *tcp_poses)
+
+    return {channel: {derivative: values.tolist() for derivative, values in derivatives.items()}
+            for channel, derivatives in tcp_derivatives.items()}
+
+
+def get_tcp_poses(command_dicts, solver_params=None):
+    """
+    Get the TCP positions and orientations of a program, from its sampled
+    poses or from batched forward kinematics of its axes.
+    :param command_dicts: list formatted by mimic_program containing dicts of
+        program info at each program timestep
+    :param solver_params: optional mimic_utils.get_solver_params() of the
+        robot; required if poses weren't sampled
+    :return: Tuple of (TCP positions of shape (N, 3), in mm, TCP rotations of
+        shape (N, 3, 3), whose columns are the TCP's axes), or None
+    """
+    _check_numpy()
+    if postproc.POSE in command_dicts[0]:
+        poses = np.array([command[postproc.POSE] for command in command_dicts], dtype=float)
+        # Poses store each axis of the TCP as a row
+        return poses[:, :3], np.swapaxes(poses[:, 3:].reshape(-1, 3, 3), -1, -2)
+
+    if solver_params is None or postproc.AXES not in command_dicts[0]:
+        return None
+
+    axes = np.array([command[postproc.AXES] for command in command_dicts], dtype=float)
+    tcp_rotations, tcp_points = forward_kinematics.solve(axes,
+                                                         solver_params.robot_definition,
+                                                         solver_params.solver_type,
+                                                         solver_params.tcp,
+                                                         solver_params.tcp_mat,
+                                                         solver_params.axis_offsets,
+                                                         solver_params.rot_directions)
+    return tcp_points * 10, tcp_rotations  # cm to mm
+
+
+def get_tcp_derivatives(time_index, tcp_points, tcp_rotations):
+    """
+    Get the distance and angle the TCP travels along a program, and the
+    magnitudes of its linear and angular velocity, accel and jerk, with the
+    same finite differences as the axis derivatives.
+    :param time_index: Array of shape (N,) of sample times, in seconds
+    :param tcp_points: Array of shape (N, 3) of TCP positions, in mm
+    :param tcp_rotations: Array of shape (N, 3, 3) of TCP rotations
+    :return: OrderedDict of {channel name: OrderedDict of {derivative name:
+        array of shape (N,)}}
+    """
+    _check_numpy()
+    tcp_points = np.asarray(tcp_points, dtype=float)
+    tcp_rotations = np.asarray(tcp_rotations, dtype=float)
+
+    # Accumulate the rotations between consecutive samples, in the world
+    # frame, into a path whose derivatives are the angular velocity, accel
+    # and jerk vectors
+    rotation_steps = np.matmul(tcp_rotations[1:], np.swapaxes(tcp_rotations[:-1], -1, -2))
+    rotation_path = np.cumsum(np.vstack([np.zeros((1, 3)), get_rotation_vectors(rotation_steps)]),
+                              axis=0)
+
+    tcp_derivatives = OrderedDict()
+    for channel, path in [(TCP_LINEAR, tcp_points), (TCP_ANGULAR, rotation_path)]:
+        derivatives = get_derivatives(time_index, path, len(DERIVATIVE_NAMES) - 1)
+        magnitudes = [np.linalg.norm(derivative, axis=1) for derivative in derivatives]
+        # Distance along the path, rather than from the origin
+        magnitudes[0] = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(path, axis=0), axis=1))])
+        tcp_derivatives[channel] = OrderedDict(zip(DERIVATIVE_NAMES, magnitudes))
+
+    return tcp_derivatives
+
+
+def get_rotation_vectors(rotations):
+    """
+    Get the axis-angle rotation vectors of rotation matrices. Rotations of
+    close to 180 degrees, which consecutive samples shouldn't be apart by,
+    are not resolved accurately.
+    :param rotations: Array of shape (N, 3, 3) of rotation matrices
+    :return: Array of shape (N, 3); axes scaled by angles, in degrees
+    """
+    _check_numpy()
+    rotations = np.asarray(rotations, dtype=float)
+    half_skews = 0.5 * np.stack([rotations[:, 2, 1] - rotations[:, 1, 2],
+                                 rotations[:, 0, 2] - rotations[:, 2, 0],
+                                 rotations[:, 1, 0] - rotations[:, 0, 1]], axis=-1)
+    sines = np.linalg.norm(half_skews, axis=-1)
+    cosines = 0.5 * (np.trace(rotations, axis1=1, axis2=2) - 1)
+    angles = np.arctan2(sines, cosines)
+
+    # angle / sin(angle) tends to 1 for small rotations
+    scales = np.ones_like(angles)
+    nonzero = sines > 1e-12
+    scales[nonzero] = angles[nonzero] / sines[nonzero]
+
+    return np.degrees(half_skews * scales[:, np.newaxis])
+
+
+def clear_derivative_cache():
+    """
+    Drop the cached derivatives.
+    :return:
+    """
+    _derivative_cache.clear()
 
-    return program_data, frames 
-        
 
 def generate_data_for_analysis(command_dicts):
     """
     Takes program data from command_dicts and generates the derivative values
     Velocity, Accel, and Jerk and writes their corresponding command_dicts to
-    a combined dictionary
+    a combined dictionary. Derivative command dicts are shallow copies of
+    command_dicts with their axes and external axes replaced.
     :param command_dicts: list formatted by mimic_program containing dicts of
         program info at each program timestep
     :return combined_command_dicts: dict {
@@ -62,15 +263,12 @@ def generate_data_for_analysis(command_dicts):
         'Jerk': jerk_dicts}
         }
     """
-    position_dicts = command_dicts  # command_dicts is the position data
-    velocity_dicts = _generate_derivative_dicts(command_dicts, 1)  # 1st order
-    accel_dicts = _generate_derivative_dicts(velocity_dicts, 2)  # 2nd order
-    jerk_dicts = _generate_derivative_dicts(accel_dicts, 3)  # 3rd order
+    program_derivatives = get_program_derivatives(command_dicts)
 
-    combined_command_dicts = {'Position': position_dicts,
-                              'Velocity': velocity_dicts,
-                              'Accel': accel_dicts,
-                              'Jerk': jerk_dicts}
+    combined_command_dicts = {'Position': command_dicts}  # command_dicts is the position data
+    for derivative in DERIVATIVE_NAMES[1:]:
+        combined_command_dicts[derivative] = _get_derivative_dicts(
+            command_dicts, program_derivatives.derivatives[derivative])
 
     return combined_command_dicts
 
@@ -91,66 +289,6 @@ def get_program_frames(command_dicts):
     return frames
 
 
-def _format_program_data(combined_command_dicts):
-    """
-    Takes input data and formats it in a way that's condusive to graphing
-    :param combined_command_dicts: dict containing commmand_dicts for
-        Position, Velocity, Acceleration, and Jerk values for the given program
-    :return program_data: {
-    'Axis 1': {'Position':[], 'Velocity':[], 'Accel':[], 'Jerk':[]},
-    'Axis 2': {'Position':[], 'Velocity':[], 'Accel':[], 'Jerk':[]},
-                                   ...
-    'Axis n': {'Position':[], 'Velocity':[], 'Accel':[], 'Jerk':[]},
-    }
-    """
-
-    # All command_dicts in combined_coomand_dicts share some program data
-    # parameters, so we can get those parameters by sampling a
-    # single command_dict
-    sample_command_dict = combined_command_dicts['Position']
-    # Get the total number of axes
-    num_primary_axes = _get_num_primary_axes(sample_command_dict)
-    num_external_axes = _get_num_external_axes(sample_command_dict)
-    total_num_axes = _get_total_num_axes(sample_command_dict)
-
-    # Initialize program_data dict
-    program_data = {}
-
-    # Format axis data for each primary axis and derivative
-    for axis_index in range(num_primary_axes):
-        axis_number = axis_index + 1  # Axis numbers are 1-indexed
-        # Initializes program_data 'Axis n' key with an empty dict
-        program_data['Axis {}'.format(axis_number)] = {}
-            
-        for derivative in combined_command_dicts:
-            program_data['Axis {}'.format(axis_number)][derivative] = []
-            
-            for command in combined_command_dicts[derivative]:
-                # Get the axis value for the current command line, axis, and derivative
-                axis_val = command[postproc.AXES][axis_index]
-
-                # Place the value in the program_data dict
-                program_data['Axis {}'.format(axis_number)][derivative].append(axis_val)
-
-    # If external axes exist, format axis data for each external axis
-    # and derivative
-    if num_external_axes > 0:
-        external_axes_ideces = _get_external_axes_indeces(sample_command_dict)
-
-        for axis_index in external_axes_ideces:
-            axis_number = num_primary_axes + axis_index + 1  # Axis numbers are 1-indexed
-            program_data['Axis {}'.format(axis_number)] = {}
-                
-            for derivative in combined_command_dicts:
-                program_data['Axis {}'.format(axis_number)][derivative] = []
-                
-                for command in combined_command_dicts[derivative]:
-                    axis_val = command[postproc.EXTERNAL_AXES][axis_index]                          
-                    program_data['Axis {}'.format(axis_number)][derivative].append(axis_val)
-
-    return program_data
-
-
 def _get_num_primary_axes(command_dicts):
     """
     Returns the number of primary axis the robot has
@@ -233,6 +371,33 @@ def get_axis_numbers(command_dicts):
     return axis_numbers
 
 
+def get_axis_splines(command_dicts, degree=splines.CUBIC):
+    """
+    Fits a spline to every axis in the program over its time index, giving
+    analytic Velocity, Accel, and Jerk at any time rather than finite
+    differences at the sampled frames.
+    :param command_dicts: list formatted by mimic_program containing dicts of
+        program info at each program timestep
+    :param degree: spline degree, splines.CUBIC or splines.QUINTIC
+    :return axis_numbers: list of ints representing axis numbers for given
+        program, as returned by get_axis_numbers
+    :return spline: robotmath.splines.JointSpline with one column per axis
+        in axis_numbers
+    """
+    times = [command[postproc.TIME_INDEX] for command in command_dicts]
+
+    external_axes_indeces = _get_external_axes_indeces(command_dicts) or []
+    values = []
+    for command in command_dicts:
+        axis_vals = list(command[postproc.AXES])
+        axis_vals.extend([command[postproc.EXTERNAL_AXES][i] for i in external_axes_indeces])
+        values.append(axis_vals)
+
+    spline = splines.JointSpline(times, values, degree)
+
+    return get_axis_numbers(command_dicts), spline
+
+
 def _generate_derivative_dicts(command_dicts, order):
     """
     Generate a command dicts list that is the derivitive of the input 
@@ -243,86 +408,77 @@ def _generate_derivative_dicts(command_dicts, order):
     :return derivative_dicts: list containing command dicts for the current
         derivative. Follows the same structure as command_dicts
     """
-    import copy
-    derivative_dicts = copy.deepcopy(command_dicts)
+    program_derivatives = get_program_derivatives(command_dicts)
+    derivative = get_derivatives(program_derivatives.time_index,
+                                 program_derivatives.derivatives['Position'], 1)[1]
 
-    num_axes = _get_num_primary_axes(derivative_dicts)
-    previous_axes = []
+    # Replace order-th value with with zeros; this is not a derivitive
+    # We do this to ensure the lengths of our command remain constant
+    if len(derivative) < order:
+        cmds.warning('Insufficient number of sample points to generate derivatives. ' \
+                   'Increase sample rate or add additional IK/FK keys for proper ' \
+                   'analysis if using time-based post-processor')
+    derivative[:order] = 0
+
+    return _get_derivative_dicts(command_dicts, derivative)
 
-    for command_index, current_command in enumerate(command_dicts):
-        current_axes = current_command[postproc.AXES]
-        current_axes_derivative = [0] * num_axes
-        if command_index > 0:  # skip zeroth
-            for axis_index, current_axis in enumerate(current_axes):
-                previous_axis = previous_axes[axis_index]
 
-                displacement = current_axis - previous_axis
-                # Do we need to compute displacement_time between every frame? Does this change?
-                displacement_time = current_command[postproc.TIME_INDEX] - previous_command[postproc.TIME_INDEX]
-                derivative = displacement / displacement_time
-                current_axes_derivative[axis_index] = derivative
+def _get_derivative_dicts(command_dicts, derivative):
+    """
+    Get shallow copies of command dicts whose axes and external axes are
+    replaced by a derivative; other entries are shared with command_dicts.
+    :param command_dicts: list formatted by mimic_program containing dicts of
+        program info at each program timestep
+    :param derivative: Array of shape (N, A) of axis and external axis
+        derivatives, as ProgramDerivatives.derivatives
+    :return derivative_dicts: list of command dicts
+    """
+    num_axes = _get_num_primary_axes(command_dicts)
+    external_axes_indeces = _get_external_axes_indeces(command_dicts) or []
+
+    derivative_dicts = []
+    for command, command_derivative in zip(command_dicts, derivative.tolist()):
+        derivative_dict = dict(command)
+        derivative_dict[postproc.AXES] = postproc.Axes(*command_derivative[:num_axes])
+        if external_axes_indeces:
+            external_axis_derivatives = [None] * len(command[postproc.EXTERNAL_AXES])
+            for derivative_index, axis_index in enumerate(external_axes_indeces):
+                external_axis_derivatives[axis_index] = command_derivative[num_axes + derivative_index]
+            derivative_dict[postproc.EXTERNAL_AXES] = postproc.ExternalAxes(*external_axis_derivatives)
+        derivative_dicts.append(derivative_dict)
 
-        derivative_dicts[command_index][postproc.AXES] =  postproc.Axes(*current_axes_derivative)
-        
-        previous_axes = current_axes
-        previous_command = current_command
+    return derivative_dicts
 
-    # Replace order-th value with with zeros; this is not a derivitive
-    # We do this to ensure the lengths of our command remain constant
-    for i in range(order):
-        try:
-            derivative_dicts[i][postproc.AXES] = postproc.Axes(*[0] * num_axes)
-        except IndexError:
-            cmds.warning('Insufficient number of sample points to generate derivatives. ' \
-                       'Increase sample rate or add additional IK/FK keys for proper ' \
-                       'analysis if using time-based post-processor')
-
-    # If external axes exist, repeat derivative process on them
-    if 'external_axes' in derivative_dicts[0]:
-        num_external_axes = len(command_dicts[0][postproc.EXTERNAL_AXES])
-        
-        # Get the indeces of external axes that are being used
-        active_axes = [i for i, x in enumerate(derivative_dicts[0][postproc.EXTERNAL_AXES]) if not x is None]
-
-        num_active_external_axes = len(active_axes)
-        previous_axes = []
-
-        for command_index, current_command in enumerate(command_dicts):
-            current_axes = [current_command[postproc.EXTERNAL_AXES][x] for x in active_axes]
-            current_axes_derivative = [0] * num_active_external_axes
-            
-            if command_index > 0:  # skip zeroth
-                for derivative_index, current_axis in enumerate(current_axes):
-                    previous_axis = previous_axes[derivative_index]
-                    displacement = current_axis - previous_axis
-                    displacement_time = current_command[postproc.TIME_INDEX] - previous_command[postproc.TIME_INDEX]
-                    derivative = displacement / displacement_time
-                    current_axes_derivative[derivative_index] = derivative
-
-
-            # We have to pass the same amount of axes that are in the
-            # Postprocess EXTERNAL_AXIS structure, so we have to build an array
-            # That matches the number of axis, with 'None' values for
-            # inactive axes.
-            external_axis_derivatives = [None] * num_external_axes
-
-            for derivative_index, axis_index in enumerate(active_axes):
-                external_axis_derivatives[axis_index] = current_axes_derivative[derivative_index]
-
-            # Replace the current command entry with the command's derivatives
-            derivative_dicts[command_index][postproc.EXTERNAL_AXES] =  postproc.ExternalAxes(*external_axis_derivatives)
-
-            previous_axes = current_axes
-            previous_command = current_command      
-
-        # Replace order-th value with with zeros; this is not a derivitive
-        # We do this to ensure the lengths of our command remain constant
-        axis_pop =  [None] * num_external_axes
-        for a, _ in enumerate(axis_pop):
-            if not derivative_dicts[i][postproc.EXTERNAL_AXES][a] is None:
-                axis_pop[a] = 0
-
-        for i in range(order):
-            derivative_dicts[i][postproc.EXTERNAL_AXES] = postproc.ExternalAxes(*axis_pop)
-        
-    return derivative_dicts
\ No newline at end of file
+
+def get_derivatives(time_index, values, max_order=3):
+    """
+    Compute derivatives of sampled values up to an order, in one pass. Gives
+    the same values as _generate_derivative_dicts, which differentiates each
+    order from the previous one and zeroes its first order-th samples.
+    :param time_index: Array of shape (N,) of sample times, in seconds
+    :param values: Array of shape (N, A) of sampled values
+    :param max_order: Highest order to compute
+    :return: List of arrays of shape (N, A), from order 0 (values) to
+        max_order
+    """
+    _check_numpy()
+    values = np.asarray(values, dtype=float)
+    time_steps = np.diff(np.asarray(time_index, dtype=float))[:, np.newaxis]
+
+    derivatives = [values]
+    for order in range(1, max_order + 1):
+        derivative = np.zeros_like(values)
+        derivative[1:] = np.diff(derivatives[-1], axis=0) / time_steps
+        derivative[:order] = 0
+        derivatives.append(derivative)
+    return derivatives
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required for array derivatives,
+    is not available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for array derivatives')
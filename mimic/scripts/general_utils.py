@@ -22,9 +22,11 @@ import itertools
 import math
 
 import mimic_config
+from robotmath import small_matrix
 import importlib
 
 importlib.reload(mimic_config)
+importlib.reload(small_matrix)
 
 
 def get_mimic_version():
@@ -59,6 +61,10 @@ def get_mimic_dir():
         else:  # Unsupported operating system
             raise Exception('Unsupported OS')
             # Assume version check passed
+        # Fall back to the copy of Mimic this module belongs to, e.g. when
+        # exporting programs offline
+        if not os.path.isdir(dir_mimic):
+            dir_mimic = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     if os.path.isdir(dir_mimic):  # make sure it exists
         return dir_mimic
     else:
@@ -248,9 +254,26 @@ def matrix_multiply(a, b):
     :param b: Matrix as list of list
     :return:
     """
+    # Use the fixed-size kernels for the common 3x3 and 4x4 cases
+    if _matrix_is_square(a, 3) and _matrix_is_square(b, 3):
+        return small_matrix.mat3_to_rows(small_matrix.mat3_mul(
+            small_matrix.mat3_from_rows(a), small_matrix.mat3_from_rows(b)))
+    if _matrix_is_square(a, 4) and _matrix_is_square(b, 4):
+        return small_matrix.mat4_to_rows(small_matrix.mat4_mul(
+            small_matrix.mat4_from_rows(a), small_matrix.mat4_from_rows(b)))
     return [[sum(_a * _b for _a, _b in zip(a_row, b_col)) for b_col in zip(*b)] for a_row in a]
 
 
+def _matrix_is_square(m, size):
+    """
+    Check whether a matrix (list of list) is size x size.
+    :param m: Matrix as list of list
+    :param size: Number of rows and columns
+    :return:
+    """
+    return len(m) == size and all(len(row) == size for row in m)
+
+
 def matrix_compose_4x4(rotation, translation):
     """
     Compose a 4x4 matrix using rotations and translation.
@@ -258,15 +281,8 @@ def matrix_compose_4x4(rotation, translation):
     :param translation: list
     :return:
     """
-    r = list(range(4))
-    m = [[0 for _ in r] for _ in r]
-    three = list(range(3))
-    for i in three:
-        for j in three:
-            m[i][j] = rotation[i][j]
-        m[i][3] = translation[i]
-    m[3][3] = 1
-    return m
+    m = small_matrix.mat4_compose(small_matrix.mat3_from_rows(rotation), translation)
+    return small_matrix.mat4_to_rows(m)
 
 
 def matrix_get_translation(m):
@@ -378,6 +394,10 @@ def matrix_get_inverse(m):
     :param m:
     :return:
     """
+    # Use the fixed-size kernel for 4x4 matrices
+    if _matrix_is_square(m, 4):
+        return small_matrix.mat4_to_rows(small_matrix.mat4_inverse(small_matrix.mat4_from_rows(m)))
+
     determinant = matrix_get_determinant(m)
     # special case for 2x2 matrix:
     if len(m) == 2:
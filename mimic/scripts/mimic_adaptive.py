@@ -0,0 +1,217 @@
+#!usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Adaptive sampling. Picks a non-uniform list of frames to sample so that
+interpolating linearly between consecutive frames stays within a tolerance
+of the animation: the animation is sampled coarsely first, then intervals
+where the joint-space interpolation error or the TCP position deviation
+exceeds the tolerance are split in half, recursively, down to a minimum
+step. Point-to-point post processors get far fewer targets than with a
+uniform sample rate for the same path accuracy.
+
+Each level of subdivision is sampled with one call to the sampling
+function, which defaults to bulk sampling with mimic_sampling.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; adaptive sampling is unavailable
+    np = None
+
+from collections import namedtuple
+
+import mimic_utils
+import mimic_sampling
+
+# Minimum interval between adaptive samples, in frames
+DEFAULT_MIN_STEP = 1.0
+
+# Fractions of an interval at which the interpolation error is probed. The
+# probes of an interval are reused as the probes and end points of its halves
+PROBE_FRACTIONS = [0.25, 0.5, 0.75]
+
+# Result of adaptive sampling. Errors are the largest interpolation errors
+# found at the probes of the final intervals
+AdaptiveSamplingReport = namedtuple('AdaptiveSamplingReport', [
+                                    'frames',  # sorted list of frames
+                                    'num_probed',  # number of frames evaluated
+                                    'max_axis_error',  # degrees
+                                    'max_position_error',  # mm, or None
+                                    'unresolved'  # intervals at the minimum
+                                                  # step still out of tolerance
+                                    ])
+
+
+def get_adaptive_frames(start_frame, end_frame, coarse_step, sample_function,
+                        axis_tolerance, position_tolerance=None,
+                        min_step=DEFAULT_MIN_STEP, wrap_axes=None):
+    """
+    Get frames to sample so that linear interpolation between them stays
+    within the tolerances.
+    :param start_frame: First frame
+    :param end_frame: Last frame
+    :param coarse_step: Step of the initial, uniform samples, in frames
+    :param sample_function: Function of a list of frames returning a tuple
+        of (axes, positions): arrays of shape (F, A) of axis values, in
+        degrees, and of shape (F, 3) of TCP positions, in mm, or None
+    :param axis_tolerance: Max joint-space interpolation error, in degrees
+    :param position_tolerance: Max TCP position deviation, in mm; ignored
+        if None
+    :param min_step: Intervals are not split below this step, in frames
+    :param wrap_axes: Optional list of bools, one per axis, for axes whose
+        samples wrap around +/- 180 degrees
+    :return: AdaptiveSamplingReport tuple
+    """
+    _check_numpy()
+    num_steps = int(np.ceil((end_frame - start_frame) / float(coarse_step)))
+    frames = [start_frame + round(i * coarse_step, 3) for i in range(num_steps)] + [end_frame]
+    frames = sorted(set(frames))
+
+    samples = {}
+    _sample(samples, frames, sample_function)
+    frames = set(frames)
+    intervals = [(start, end) for start, end in zip(sorted(frames), sorted(frames)[1:])]
+
+    max_axis_error = 0.0
+    max_position_error = None
+    unresolved = 0
+    while intervals:
+        probes = [[round(start + (end - start) * fraction, 3) for fraction in PROBE_FRACTIONS]
+                  for start, end in intervals]
+        _sample(samples, [probe for interval_probes in probes for probe in interval_probes],
+                sample_function)
+
+        axis_errors, position_errors = get_interpolation_errors(
+            samples, intervals, probes, wrap_axes)
+
+        next_intervals = []
+        for interval_index, (start, end) in enumerate(intervals):
+            axis_error = axis_errors[interval_index]
+            position_error = None if position_errors is None else position_errors[interval_index]
+            out_of_tolerance = axis_error > axis_tolerance or (
+                position_tolerance is not None and position_error is not None
+                and position_error > position_tolerance)
+
+            if out_of_tolerance and (end - start) / 2.0 >= min_step:
+                middle = probes[interval_index][1]
+                frames.add(middle)
+                next_intervals += [(start, middle), (middle, end)]
+                continue
+
+            unresolved += int(out_of_tolerance)
+            max_axis_error = max(max_axis_error, axis_error)
+            if position_error is not None:
+                max_position_error = max(max_position_error or 0.0, position_error)
+        intervals = next_intervals
+
+    return AdaptiveSamplingReport(sorted(frames), len(samples), max_axis_error,
+                                  max_position_error, unresolved)
+
+
+def get_interpolation_errors(samples, intervals, probes, wrap_axes=None):
+    """
+    Get the largest error of linear interpolation at the probes of intervals.
+    :param samples: dict of {frame: (axis values, position)}
+    :param intervals: List of (start frame, end frame) tuples
+    :param probes: List of lists of probe frames, one per interval
+    :param wrap_axes: Optional list of bools, one per axis
+    :return: Tuple of (axis errors, position errors) arrays of shape (I,);
+        position errors are None if positions weren't sampled
+    """
+    starts = np.array([start for start, _ in intervals], dtype=float)
+    ends = np.array([end for _, end in intervals], dtype=float)
+    probe_frames = np.array(probes, dtype=float)  # (I, P)
+    fractions = ((probe_frames - starts[:, np.newaxis]) /
+                 (ends - starts)[:, np.newaxis])[:, :, np.newaxis]
+
+    def _values(frames, index):
+        return np.array([samples[frame][index] for frame in frames], dtype=float)
+
+    start_axes = _values(starts.tolist(), 0)[:, np.newaxis]
+    end_axes = _values(ends.tolist(), 0)[:, np.newaxis]
+    probe_axes = _values(probe_frames.ravel().tolist(), 0).reshape(probe_frames.shape + (-1,))
+
+    # Interpolate the short way around axes that wrap, as accumulating their
+    # rotation would
+    axis_steps = end_axes - start_axes
+    if wrap_axes is not None:
+        axis_steps = np.where(wrap_axes, _wrap(axis_steps), axis_steps)
+    axis_deviations = probe_axes - (start_axes + fractions * axis_steps)
+    if wrap_axes is not None:
+        axis_deviations = np.where(wrap_axes, _wrap(axis_deviations), axis_deviations)
+    axis_errors = np.abs(axis_deviations).max(axis=(1, 2))
+
+    position_errors = None
+    if samples[intervals[0][0]][1] is not None:
+        start_positions = _values(starts.tolist(), 1)[:, np.newaxis]
+        end_positions = _values(ends.tolist(), 1)[:, np.newaxis]
+        probe_positions = _values(probe_frames.ravel().tolist(), 1).reshape(probe_frames.shape + (3,))
+        position_deviations = probe_positions - (start_positions + fractions * (end_positions - start_positions))
+        position_errors = np.linalg.norm(position_deviations, axis=-1).max(axis=1)
+
+    return axis_errors, position_errors
+
+
+def get_sample_function(robot_name, include_pose=False, backend=None):
+    """
+    Get a sample function for get_adaptive_frames that samples a robot's
+    axes and, optionally, TCP positions in bulk.
+    :param robot_name: Name of the robot
+    :param include_pose: Also sample TCP positions
+    :param backend: Sampling backend; defaults to
+        mimic_sampling.get_default_backend()
+    :return: Function of a list of frames
+    """
+    if backend is None:
+        backend = mimic_sampling.get_default_backend()
+
+    target_ctrl_path = mimic_utils.get_target_ctrl_path(robot_name)
+    axis_paths = ['{}.axis{}'.format(target_ctrl_path, i + 1)
+                  for i in range(mimic_utils.get_num_axes(robot_name))]
+    pose_channels = mimic_sampling.get_pose_channels(robot_name) if include_pose else None
+
+    def sample_function(frames):
+        axes = backend.sample(axis_paths, frames)
+        positions = None
+        if pose_channels is not None:
+            positions = mimic_sampling.sample_poses(pose_channels, frames, backend)[:, :3]
+        return axes, positions
+
+    return sample_function
+
+
+def _sample(samples, frames, sample_function):
+    """
+    Sample the frames that have not been sampled yet.
+    :param samples: dict of {frame: (axis values, position)}, updated in place
+    :param frames: List of frames
+    :param sample_function: Function of a list of frames
+    :return:
+    """
+    frames = sorted(set(frame for frame in frames if frame not in samples))
+    if not frames:
+        return
+    axes, positions = sample_function(frames)
+    for frame_index, frame in enumerate(frames):
+        samples[frame] = (axes[frame_index],
+                          positions[frame_index] if positions is not None else None)
+
+
+def _wrap(angles):
+    """
+    Wrap angles to [-180, 180) degrees.
+    :param angles: Array of angles
+    :return:
+    """
+    return (angles + 180.0) % 360.0 - 180.0
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required for adaptive sampling,
+    is not available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for adaptive sampling')
@@ -0,0 +1,564 @@
+#!usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Incremental re-export. Fingerprints the animation curves that drive a robot
+and keeps the raw samples of the previous export, so that exporting again
+only re-samples the frames whose driving curves changed.
+
+A robot is driven by the animation curves upstream of the attributes Mimic
+samples (target_CTRL, tool_CTRL, FK_CTRLs, external axes and IOs) and of the
+DAG parents of those controls. Each curve is fingerprinted by its keys,
+tangents and infinity; when a key changes, the curve can only change between
+the keys around it, so only frames in that range are re-sampled.
+
+Changes that are not keyed re-sample the whole program. They are noticed
+through the unconnected keyable, channel box and user-defined attributes of
+every node upstream of the controls or above them in the DAG (e.g. a moved
+constraint target or parent, or an edited robot definition), and through
+the evaluated world matrices of the controls at the first and last frames,
+which catch what has no such attribute (e.g. an edited expression) when it
+shows at either end of the program. A change that shows at neither, like an
+expression edited to only differ mid-program, isn't noticed: clear the
+program cache (clear_program_cache) after such edits.
+
+Listing those attributes takes a query per node and attribute, so they are
+listed once per robot and reused for as long as the nodes upstream of it are
+the same, until the cache is cleared or another scene is opened. Attributes
+added to those nodes in the meantime (e.g. with addAttr) are not noticed.
+
+Samples are cached before rotations are reconciled, so reconciliation,
+limit checks and post-processing still run over the merged program.
+
+Whole analyses are cached too: the reconciled program of the last Analyze
+or Save of a robot, with its limit check, is reused by the next one as long
+as the settings it was sampled with and the animation fingerprint are
+unchanged, so saving right after analyzing doesn't sample or check again.
+"""
+
+try:
+    import maya.cmds as cmds
+
+    MAYA_IS_RUNNING = True
+except ImportError:  # Maya is not running
+    cmds = None
+    MAYA_IS_RUNNING = False
+
+import bisect
+import hashlib
+import json
+from collections import namedtuple
+
+import mimic_utils
+import mimic_sampling
+
+# Infinity types whose values only depend on the first or last keys;
+# curves with any other infinity (cycles, oscillation) are re-sampled whole
+# when they change
+LOCAL_INFINITY_TYPES = ['constant', 'linear']
+
+# Keys, tangents and infinity of an animation curve. Keys are tuples of
+# (time, value, in tangent type, out tangent type, in angle, out angle,
+# in weight, out weight)
+CurveKeys = namedtuple('CurveKeys', [
+                       'keys',
+                       'pre_infinity',
+                       'post_infinity',
+                       'time_input'  # False for driven keys
+                       ])
+
+# Everything the samples of a robot depend on
+AnimationFingerprint = namedtuple('AnimationFingerprint', [
+                                  'curves',  # dict of {curve name: CurveKeys}
+                                  'static',  # hash of the unanimated inputs
+                                  'world_matrices'  # dict of {frame: hash}
+                                  ])
+
+# A frame range whose samples may have changed, inclusive
+FrameRange = namedtuple('FrameRange', ['start', 'end'])
+
+# Program settings that change what is sampled, or how it is reconciled
+SAMPLE_SETTINGS = ['Using Time Interval',
+                   'Using Keyframes Only',
+                   'Time Interval Value',
+                   'Time Interval Units',
+                   'Using Adaptive Sampling',
+                   'Adaptive Axis Tolerance',
+                   'Adaptive Position Tolerance',
+                   'Solution Home Weight',
+                   'Solution Previous Weight']
+
+# Samples of a previous export and what they were sampled from
+SampleCacheEntry = namedtuple('SampleCacheEntry', [
+                              'fingerprint',  # AnimationFingerprint
+                              'command_dicts'  # dict of {frame: command dict}
+                              ])
+
+# A sampled, reconciled and checked program and what it was sampled from
+ProgramAnalysis = namedtuple('ProgramAnalysis', [
+                             'fingerprint',  # AnimationFingerprint
+                             'command_dicts',  # list of command dicts
+                             'limit_check'  # mimic_export.LimitCheck
+                             ])
+
+
+class SampleCache(object):
+    """
+    Raw samples of previous exports, by robot and sample settings.
+    """
+
+    def __init__(self, fingerprint_function=None):
+        """
+        Initialize the cache.
+        :param fingerprint_function: Function of (robot_name, user_options,
+            frames) returning an AnimationFingerprint; defaults to
+            get_animation_fingerprint
+        """
+        self.fingerprint_function = fingerprint_function
+        self._entries = {}
+        self.num_sampled = 0
+        self.num_reused = 0
+
+    def sample(self, robot_name, frames, animation_settings, user_options, sample_frames):
+        """
+        Get command dicts for frames, re-sampling only frames whose driving
+        curves changed since they were cached.
+        :param robot_name: Name of the robot
+        :param frames: List of frames
+        :param animation_settings: User-defined animation settings
+        :param user_options: UserOptions tuple
+        :param sample_frames: Function of a list of frames returning their
+            raw command dicts, in order
+        :return: List of command dicts, in the order of frames
+        """
+        key = get_cache_key(robot_name, animation_settings, user_options)
+        fingerprint_function = self.fingerprint_function or get_animation_fingerprint
+        fingerprint = fingerprint_function(robot_name, user_options, frames)
+        entry = self._entries.get(key)
+
+        cached_command_dicts = {}
+        if entry is not None:
+            changed_ranges = merge_frame_ranges(
+                get_changed_frame_ranges(entry.fingerprint, fingerprint))
+            cached_command_dicts = {frame: command_dict
+                                    for frame, command_dict in entry.command_dicts.items()
+                                    if not _in_frame_ranges(frame, changed_ranges)}
+
+        frames_to_sample = [frame for frame in frames if frame not in cached_command_dicts]
+        if frames_to_sample:
+            sampled_command_dicts = sample_frames(frames_to_sample)
+            cached_command_dicts.update(zip(frames_to_sample, sampled_command_dicts))
+
+        self.num_sampled = len(frames_to_sample)
+        self.num_reused = len(frames) - len(frames_to_sample)
+        self._entries[key] = SampleCacheEntry(fingerprint, cached_command_dicts)
+
+        # Later stages replace entries of the command dicts, so hand out
+        # copies and keep the raw samples
+        return [dict(cached_command_dicts[frame]) for frame in frames]
+
+    def invalidate(self, robot_name=None):
+        """
+        Drop cached samples, so that the next export samples every frame.
+        :param robot_name: Only drop samples of this robot; defaults to all
+        :return:
+        """
+        if robot_name is None:
+            self._entries.clear()
+            return
+        for key in list(self._entries):
+            if json.loads(key)[0] == robot_name:
+                del self._entries[key]
+
+
+class AnalysisCache(object):
+    """
+    The last analysis of each robot, by the settings it was made with.
+    """
+
+    def __init__(self):
+        """
+        Initialize the cache.
+        """
+        self._entries = {}
+
+    def get(self, key, fingerprint):
+        """
+        Get the analysis made with the same settings, if the animation hasn't
+        changed since.
+        :param key: Key of the analysis, as get_analysis_key
+        :param fingerprint: Current AnimationFingerprint of the robot
+        :return: ProgramAnalysis tuple, or None
+        """
+        program_analysis = self._entries.get(key)
+        if program_analysis is None or program_analysis.fingerprint != fingerprint:
+            return None
+        # Later stages replace entries of the command dicts
+        return program_analysis._replace(
+            command_dicts=[dict(command_dict) for command_dict in program_analysis.command_dicts])
+
+    def put(self, key, fingerprint, command_dicts, limit_check):
+        """
+        Keep the analysis of a robot, replacing its previous ones.
+        :param key: Key of the analysis, as get_analysis_key
+        :param fingerprint: AnimationFingerprint the program was sampled from
+        :param command_dicts: List of command dicts
+        :param limit_check: LimitCheck tuple of command_dicts
+        :return:
+        """
+        self.invalidate(json.loads(key)[0])
+        self._entries[key] = ProgramAnalysis(
+            fingerprint, [dict(command_dict) for command_dict in command_dicts], limit_check)
+
+    def invalidate(self, robot_name=None):
+        """
+        Drop cached analyses, so that the next Analyze or Save samples and
+        checks the program again.
+        :param robot_name: Only drop analyses of this robot; defaults to all
+        :return:
+        """
+        if robot_name is None:
+            self._entries.clear()
+            return
+        for key in list(self._entries):
+            if json.loads(key)[0] == robot_name:
+                del self._entries[key]
+
+
+_sample_cache = SampleCache()
+_analysis_cache = AnalysisCache()
+
+# Static attributes of the nodes upstream of each robot, by robot name, as
+# tuples of (nodes, node types, attribute paths); see get_static_fingerprint
+_static_attributes = {}
+
+
+def get_sample_cache():
+    """
+    Get the sample cache of the current session.
+    :return: SampleCache
+    """
+    return _sample_cache
+
+
+def get_analysis_cache():
+    """
+    Get the analysis cache of the current session.
+    :return: AnalysisCache
+    """
+    return _analysis_cache
+
+
+def invalidate(robot_name=None):
+    """
+    Drop the cached samples, analyses and listed static attributes, e.g.
+    after changes to the scene that fingerprints don't capture.
+    :param robot_name: Only drop those of this robot; defaults to all
+    :return:
+    """
+    _sample_cache.invalidate(robot_name)
+    _analysis_cache.invalidate(robot_name)
+    if robot_name is None:
+        _static_attributes.clear()
+    else:
+        _static_attributes.pop(robot_name, None)
+
+
+def get_cache_key(robot_name, animation_settings, user_options):
+    """
+    Get the key of the samples of a robot. Samples can only be reused when
+    they were sampled with the same options, start frame and framerate,
+    which time indices depend on.
+    :param robot_name: Name of the robot
+    :param animation_settings: User-defined animation settings
+    :param user_options: UserOptions tuple
+    :return: str
+    """
+    return json.dumps([robot_name,
+                       animation_settings['Start Frame'],
+                       animation_settings['Framerate'],
+                       sorted(user_options._asdict().items())])
+
+
+def get_analysis_key(robot_name, animation_settings, postproc_settings, user_options,
+                     limits, previous_axes=None):
+    """
+    Get the key of the analysis of a robot. An analysis can only be reused
+    when the program would be sampled over the same frames with the same
+    settings, and checked against the same limits.
+    :param robot_name: Name of the robot
+    :param animation_settings: User-defined animation settings
+    :param postproc_settings: User-defined program settings
+    :param user_options: UserOptions tuple
+    :param limits: Dict of limits, as mimic_utils.get_all_limits
+    :param previous_axes: Axes redundant solutions are scored against, if any
+    :return: str
+    """
+    return json.dumps([robot_name,
+                       animation_settings['Start Frame'],
+                       animation_settings['End Frame'],
+                       animation_settings['Framerate'],
+                       [postproc_settings.get(setting) for setting in SAMPLE_SETTINGS],
+                       sorted(user_options._asdict().items()),
+                       limits,
+                       previous_axes], sort_keys=True)
+
+
+def get_animation_fingerprint(robot_name, user_options, frames=None):
+    """
+    Fingerprint the animation that drives a robot.
+    :param robot_name: Name of the robot
+    :param user_options: UserOptions tuple
+    :param frames: Frames of the program; the world matrices of the controls
+        are fingerprinted at the first and last of them
+    :return: AnimationFingerprint tuple
+    """
+    nodes = get_driving_nodes(robot_name)
+    attribute_paths = get_driving_attribute_paths(robot_name, user_options)
+
+    # The world transforms of the controls also depend on their DAG parents,
+    # which aren't in their history
+    ancestors = get_ancestors(nodes)
+    history = cmds.listHistory(nodes + ancestors + attribute_paths) or []
+    curves = sorted(set(cmds.ls(history, type='animCurve') or []))
+    upstream_nodes = sorted(set(cmds.ls(history + ancestors, long=True) or []) - set(curves))
+
+    end_frames = sorted(set([frames[0], frames[-1]])) if frames else []
+
+    return AnimationFingerprint({curve: get_curve_keys(curve) for curve in curves},
+                                get_static_fingerprint(upstream_nodes, robot_name),
+                                get_world_matrix_fingerprints(nodes, end_frames))
+
+
+def get_driving_nodes(robot_name):
+    """
+    Get the controls that drive a robot.
+    :param robot_name: Name of the robot
+    :return: List of node paths
+    """
+    nodes = [mimic_utils.get_target_ctrl_path(robot_name),
+             mimic_utils.get_tool_ctrl_path(robot_name),
+             mimic_utils.get_local_ctrl_path(robot_name)]
+    nodes = cmds.ls(nodes, long=True) or []
+
+    fk_ctrls_path = mimic_utils.get_fk_ctrls_path(robot_name)
+    if cmds.ls(fk_ctrls_path):
+        nodes += cmds.listRelatives(fk_ctrls_path, children=True,
+                                    type='transform', fullPath=True) or []
+    return nodes
+
+
+def get_ancestors(nodes):
+    """
+    Get the DAG parents of nodes, up to the world.
+    :param nodes: List of long node paths
+    :return: List of long node paths
+    """
+    ancestors = set()
+    for node in nodes:
+        names = node.split('|')
+        ancestors.update('|'.join(names[:i]) for i in range(2, len(names)))
+    return sorted(ancestors)
+
+
+def get_driving_attribute_paths(robot_name, user_options):
+    """
+    Get the attributes Mimic samples for a robot, whose history holds every
+    curve that drives it.
+    :param robot_name: Name of the robot
+    :param user_options: UserOptions tuple
+    :return: List of attribute paths
+    """
+    channels = mimic_sampling.get_program_channels(robot_name, user_options)
+    return (list(channels.axes) +
+            [channel.attribute_path for channel in channels.external_axes] +
+            [channel.attribute_path for channel in channels.ios] +
+            list(channels.configuration))
+
+
+def get_curve_keys(curve):
+    """
+    Get the keys, tangents and infinity of an animation curve.
+    :param curve: Name of the animation curve
+    :return: CurveKeys tuple
+    """
+    columns = [cmds.keyframe(curve, query=True, timeChange=True),
+               cmds.keyframe(curve, query=True, valueChange=True),
+               cmds.keyTangent(curve, query=True, inTangentType=True),
+               cmds.keyTangent(curve, query=True, outTangentType=True),
+               cmds.keyTangent(curve, query=True, inAngle=True),
+               cmds.keyTangent(curve, query=True, outAngle=True),
+               cmds.keyTangent(curve, query=True, inWeight=True),
+               cmds.keyTangent(curve, query=True, outWeight=True)]
+    keys = tuple(zip(*[column or [] for column in columns]))
+
+    pre_infinity = cmds.setInfinity(curve, query=True, preInfinite=True)[0]
+    post_infinity = cmds.setInfinity(curve, query=True, postInfinite=True)[0]
+    time_input = cmds.nodeType(curve).startswith('animCurveT')
+
+    return CurveKeys(keys, pre_infinity, post_infinity, time_input)
+
+
+def get_static_fingerprint(nodes, robot_name=None):
+    """
+    Hash the types of nodes and the values of their unconnected keyable,
+    channel box and user-defined attributes, so that changes to unanimated
+    controls and rig settings (e.g. the robot definition) are noticed.
+    Connected attributes are covered by the nodes and curves upstream of them.
+    :param nodes: List of node paths
+    :param robot_name: Optional name of the robot the nodes drive; if given,
+        the attributes are listed once and reused while the nodes are the same
+    :return: str
+    """
+    nodes = tuple(nodes)
+    static_attributes = _static_attributes.get(robot_name)
+    if static_attributes is None or static_attributes[0] != nodes:
+        static_attributes = (nodes,) + get_static_attributes(nodes)
+        if robot_name is not None:
+            _static_attributes[robot_name] = static_attributes
+    _, node_types, attribute_paths = static_attributes
+
+    values = [list(node_type) for node_type in node_types]
+    for attribute_path in attribute_paths:
+        try:
+            values.append([attribute_path, cmds.getAttr(attribute_path)])
+        except (RuntimeError, ValueError):  # Unreadable compound children
+            continue
+    return hashlib.sha1(json.dumps(values, default=str).encode()).hexdigest()
+
+
+def get_static_attributes(nodes):
+    """
+    List the types of nodes and their unconnected keyable, channel box and
+    user-defined attributes, whose values get_static_fingerprint hashes.
+    :param nodes: List of node paths
+    :return: Tuple of (list of (node, node type), list of attribute paths)
+    """
+    node_types = []
+    attribute_paths = []
+    for node in nodes:
+        node_types.append((node, cmds.nodeType(node)))
+        attributes = set()
+        for attribute_filter in ({'keyable': True}, {'channelBox': True}, {'userDefined': True}):
+            attributes.update(cmds.listAttr(node, scalar=True, **attribute_filter) or [])
+        for attribute in sorted(attributes):
+            attribute_path = '{}.{}'.format(node, attribute)
+            try:
+                if cmds.connectionInfo(attribute_path, isDestination=True):
+                    continue
+            except (RuntimeError, ValueError):  # Unreadable compound children
+                continue
+            attribute_paths.append(attribute_path)
+    return node_types, attribute_paths
+
+
+def get_world_matrix_fingerprints(nodes, frames):
+    """
+    Hash the evaluated world matrices of nodes at each frame, which change
+    with every input of the nodes, including those without curves or
+    attributes to fingerprint.
+    :param nodes: List of node paths
+    :param frames: List of frames
+    :return: dict of {frame: str}
+    """
+    world_matrices = {}
+    for frame in frames:
+        matrices = [cmds.getAttr('{}.worldMatrix[0]'.format(node), time=frame) for node in nodes]
+        world_matrices[frame] = hashlib.sha1(json.dumps(matrices).encode()).hexdigest()
+    return world_matrices
+
+
+def get_changed_frame_ranges(previous_fingerprint, fingerprint):
+    """
+    Get the frame ranges whose samples may differ between two fingerprints.
+    :param previous_fingerprint: AnimationFingerprint of the cached samples
+    :param fingerprint: Current AnimationFingerprint
+    :return: List of FrameRange tuples
+    """
+    everything = [FrameRange(float('-inf'), float('inf'))]
+    if previous_fingerprint.static != fingerprint.static \
+            or set(previous_fingerprint.curves) != set(fingerprint.curves):
+        return everything
+
+    changed_ranges = []
+    for curve, curve_keys in fingerprint.curves.items():
+        previous_curve_keys = previous_fingerprint.curves[curve]
+        if previous_curve_keys == curve_keys:
+            continue
+        curve_ranges = get_changed_curve_ranges(previous_curve_keys, curve_keys)
+        if everything[0] in curve_ranges:
+            return everything
+        changed_ranges.extend(curve_ranges)
+
+    # A world matrix that changed at a frame no changed curve affects was
+    # changed by an input without curves, which may affect every frame
+    if set(previous_fingerprint.world_matrices) != set(fingerprint.world_matrices):
+        return everything
+    merged_ranges = merge_frame_ranges(changed_ranges)
+    for frame, world_matrices in fingerprint.world_matrices.items():
+        if previous_fingerprint.world_matrices[frame] != world_matrices \
+                and not _in_frame_ranges(frame, merged_ranges):
+            return everything
+    return changed_ranges
+
+
+def get_changed_curve_ranges(previous_curve_keys, curve_keys):
+    """
+    Get the frame ranges in which a curve may evaluate differently. A curve
+    evaluates between two keys from those keys only, so a changed key only
+    affects the frames between the keys around it; changed first and last
+    keys also affect the frames before and after the curve.
+    :param previous_curve_keys: CurveKeys tuple
+    :param curve_keys: CurveKeys tuple
+    :return: List of FrameRange tuples
+    """
+    everything = [FrameRange(float('-inf'), float('inf'))]
+    if not curve_keys.time_input or not previous_curve_keys.time_input:
+        return everything
+    for infinity in (previous_curve_keys.pre_infinity, previous_curve_keys.post_infinity,
+                     curve_keys.pre_infinity, curve_keys.post_infinity):
+        if infinity not in LOCAL_INFINITY_TYPES:
+            return everything
+    if previous_curve_keys.pre_infinity != curve_keys.pre_infinity \
+            or previous_curve_keys.post_infinity != curve_keys.post_infinity:
+        return everything
+
+    changed_ranges = []
+    for keys, other_keys in ((previous_curve_keys.keys, curve_keys.keys),
+                             (curve_keys.keys, previous_curve_keys.keys)):
+        changed_keys = set(keys) - set(other_keys)
+        for key_index, key in enumerate(keys):
+            if key not in changed_keys:
+                continue
+            start = keys[key_index - 1][0] if key_index > 0 else float('-inf')
+            end = keys[key_index + 1][0] if key_index < len(keys) - 1 else float('inf')
+            changed_ranges.append(FrameRange(start, end))
+    return changed_ranges
+
+
+def merge_frame_ranges(frame_ranges):
+    """
+    Merge overlapping frame ranges.
+    :param frame_ranges: List of FrameRange tuples
+    :return: List of disjoint FrameRange tuples, sorted by start
+    """
+    merged_ranges = []
+    for frame_range in sorted(frame_ranges):
+        if merged_ranges and frame_range.start <= merged_ranges[-1].end:
+            end = max(merged_ranges[-1].end, frame_range.end)
+            merged_ranges[-1] = FrameRange(merged_ranges[-1].start, end)
+        else:
+            merged_ranges.append(frame_range)
+    return merged_ranges
+
+
+def _in_frame_ranges(frame, frame_ranges):
+    """
+    Check whether a frame is within any of the frame ranges.
+    :param frame: Frame
+    :param frame_ranges: List of disjoint FrameRange tuples, sorted by start,
+        as merge_frame_ranges
+    :return:
+    """
+    range_index = bisect.bisect_right(frame_ranges, (frame, float('inf'))) - 1
+    return range_index >= 0 and frame <= frame_ranges[range_index].end
@@ -94,6 +94,9 @@ class Prefs(object):
         'DEFAULT_SAMPLE_RATE_VALUE': 1,
         'DEFAULT_SAMPLE_RATE_UNITS': 'frames',  # 'seconds' or 'frames',
         'SAMPLE_KEYFRAMES_ONLY': False,
+        'SAMPLE_ADAPTIVE': False,
+        'ADAPTIVE_AXIS_TOLERANCE': 0.5,  # degrees
+        'ADAPTIVE_POSITION_TOLERANCE': 1.0,  # mm
 
         # NOTE: These values aren't settable in the Preferences window because
         # it doesn't make sense to have these as user-level preferences, BUT
@@ -107,7 +110,12 @@ class Prefs(object):
 
         # User options
         'OPTS_PREVIEW_IN_VIEWPORT': False,
+        'OPTS_FAST_EXPORT': False,
+        'OPTS_PARALLEL_WORKERS': 1,
+        'OPTS_INCREMENTAL_EXPORT': False,
         'OPTS_REDUNDANT_SOLUTIONS_USER_PROMPT': False,
+        'OPTS_SOLUTION_HOME_WEIGHT': 1.0,
+        'OPTS_SOLUTION_PREVIOUS_WEIGHT': 1.0,
 
         # UI Settings
         # NOTE Shader range is automatically set on robots as they are
@@ -158,6 +166,11 @@ class Prefs(object):
         global_key = cls._get_global(local_key)
         val_str = None
 
+        # File and user preferences are stored in Maya; use the defaults when
+        # running without it, e.g. for headless exports
+        if not MAYA_IS_RUNNING and pref_level in (FILE, USER):
+            pref_level = DEFAULT
+
         if pref_level == FILE:
             # fileInfo -q returns a list of strings, with alternating key, value
             all_file_info = cmds.fileInfo(q=True)
@@ -614,12 +627,15 @@ class Prefs(object):
 
 def reload_mimic(*_args):
     """
-    Callback function to re-launch Mimic.
+    Callback function to re-launch Mimic. Cached programs belong to the
+    previous scene, so they are dropped too.
     :param _args: required by Maya to call a function from UI button
     :return: None
     """
     command = "import sys\n" \
               "sys.dont_write_bytecode = True  # don't write PYCs\n" \
+              "import mimic_cache\n" \
+              "mimic_cache.invalidate()\n" \
               "import importlib\n" \
               "import mimic\n" \
               "importlib.reload(mimic)\n" \
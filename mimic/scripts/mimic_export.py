@@ -0,0 +1,1232 @@
+#!usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Headless program export. Runs the stages that turn sampled frames into a
+robot program (reconcile, bound, check, couple, format and write) without
+touching the Mimic UI, so that programs can be exported in batch with mayapy
+or fully offline from recorded samples.
+
+    source = mimic_export.RecordedSampleSource('take_01.npz')
+    robot_settings = mimic_export.load_robot_settings('KR60.json')
+    pipeline = mimic_export.ExportPipeline(source, robot_settings,
+                                           postproc_settings, user_options)
+    result = pipeline.run()
+
+Every stage is also available as a method of ExportPipeline and as a plain
+function, and the time spent in each stage is recorded in the result.
+"""
+
+try:
+    import maya.cmds as cmds
+
+    MAYA_IS_RUNNING = True
+except ImportError:  # Maya is not running
+    cmds = None
+    MAYA_IS_RUNNING = False
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; NPZ samples are unavailable
+    np = None
+
+import csv
+import itertools
+import json
+import math
+import numbers
+import os
+import time
+from collections import namedtuple
+from collections import OrderedDict
+
+import general_utils
+import mimic_parallel
+import mimic_utils
+
+from analysis import analysis_utils
+from postproc import postproc
+from postproc import postproc_setup
+
+NUM_EXTERNAL_AXES = 16
+
+# Jump between consecutive samples of an axis, in degrees, beyond which its
+# evaluation is assumed to have flipped; see mimic_utils.accumulate_rotation
+ROTATION_JUMP_THRESHOLD = 300
+
+# Number of samples accumulate_rotations unwraps at once
+_ACCUMULATION_BLOCK_SIZE = 4096
+
+# Limit types, as keyed in mimic_utils.get_all_limits, and their display names
+LIMIT_TYPES = ['Position', 'Velocity', 'Accel', 'Jerk']
+LIMIT_NAMES = {'Position': 'Position',
+               'Velocity': 'Velocity',
+               'Accel': 'Acceleration',
+               'Jerk': 'Jerk'}
+
+# Stages in the order ExportPipeline.run runs them. Axes are coupled after
+# limit checking so that derivatives are computed on uncoupled axes
+STAGES = ['sample', 'reconcile', 'bound', 'check', 'couple', 'format', 'write']
+
+# Static robot data the export stages need, queried once from the rig
+RobotSettings = namedtuple('RobotSettings', [
+                           'name',
+                           'robot_type',
+                           'reconcile_axes',  # list of bools, one per axis
+                           'axes_coupled',  # True if A3 is coupled to A2
+                           'limits'  # dict, as mimic_external_axes.get_all_limits
+                           ])
+
+# A run of consecutive samples of an axis that violate a limit
+ViolationRun = namedtuple('ViolationRun', [
+                          'axis_name',
+                          'start_frame',
+                          'end_frame',
+                          'start_time',
+                          'end_time',
+                          'peak_frame',  # frame furthest beyond the limit
+                          'peak_value',
+                          'limit',  # the limit exceeded at the peak
+                          'num_samples'
+                          ])
+
+# Min, max and average of each axis, with the frame and time at which the
+# min and max are first reached; lists with one value per axis
+AxisStats = namedtuple('AxisStats', [
+                       'axis_names',
+                       'min_values',
+                       'min_frames',
+                       'min_times',
+                       'max_values',
+                       'max_frames',
+                       'max_times',
+                       'averages'
+                       ])
+
+# Result of limit checking; violations and stats are keyed by limit type and
+# only contain the limit types that were checked (violations only those
+# that were violated). Violations are dicts of {axis name: list of
+# ViolationRun tuples}; stats are AxisStats tuples
+LimitCheck = namedtuple('LimitCheck', [
+                        'violations',
+                        'stats',
+                        'warnings'  # list of strings, e.g. missing limits
+                        ])
+
+ExportResult = namedtuple('ExportResult', [
+                          'command_dicts',
+                          'limit_check',
+                          'program',
+                          'output_path',
+                          'timings'  # OrderedDict of {stage: seconds}
+                          ])
+
+
+class ExportPipeline(object):
+    """
+    Exports a program from a sample source without any UI. Stages can be run
+    all at once with run(), or one at a time, e.g. to profile them.
+    """
+
+    def __init__(self, source, robot_settings, postproc_settings, user_options,
+                 choose_solution=None):
+        """
+        Initialize the pipeline.
+        :param source: Sample source; any object with a get_command_dicts()
+            method, e.g. MayaSampleSource or RecordedSampleSource
+        :param robot_settings: RobotSettings tuple
+        :param postproc_settings: Program settings dict, as built by
+            mimic_program._get_settings_for_postproc
+        :param user_options: UserOptions tuple
+        :param choose_solution: Optional function of (valid_solutions,
+            axis_number) returning the index of the solution to use when a
+            reconciled axis can be bounded in several ways, e.g. a
+            SolutionCost; defaults to the smallest offset
+        """
+        self.source = source
+        self.robot_settings = robot_settings
+        self.postproc_settings = postproc_settings
+        self.user_options = user_options
+        self.choose_solution = choose_solution
+        self.limit_check = None
+        self.timings = OrderedDict()
+
+    def run(self):
+        """
+        Run every stage and write the program.
+        :return: ExportResult tuple
+        """
+        self.timings = OrderedDict()
+        command_dicts = self._run_stage('sample', self.sample)
+        command_dicts = self._run_stage('reconcile', self.reconcile, command_dicts)
+        command_dicts = self._run_stage('bound', self.bound, command_dicts)
+        self.limit_check = self._run_stage('check', self.check, command_dicts)
+
+        # If we're sampling keyframes only, we assume it's for a
+        # post-processor that's not time-dependent, and, therefore, we
+        # shouldn't raise exceptions for limit violations
+        if self.limit_check.violations \
+                and not self.postproc_settings['Ignore Warnings'] \
+                and not self.postproc_settings['Using Keyframes Only']:
+            raise mimic_utils.MimicError('Limit violations found. '
+                                         'No Program Exported.')
+
+        command_dicts = self._run_stage('couple', self.couple, command_dicts)
+        processor, program = self._run_stage('format', self.format, command_dicts)
+        output_path = self._run_stage('write', self.write, processor, program)
+
+        return ExportResult(command_dicts, self.limit_check, program,
+                            output_path, self.timings)
+
+    def sample(self):
+        """
+        Get command dicts from the sample source.
+        :return:
+        """
+        return self.source.get_command_dicts()
+
+    def reconcile(self, command_dicts):
+        """
+        Accumulate axis rotations beyond +/- 180 degrees. Only applies to
+        axes sampled at a sample rate.
+        :param command_dicts: List of command dicts
+        :return:
+        """
+        if not self._using_sampled_axes(command_dicts):
+            return command_dicts
+        return reconcile_command_rotations(command_dicts,
+                                           self.robot_settings.reconcile_axes)
+
+    def bound(self, command_dicts):
+        """
+        Shift accumulated axis rotations by multiples of 360 degrees to fit
+        the limits. Only applies to axes sampled at a sample rate.
+        :param command_dicts: List of command dicts
+        :return:
+        """
+        if not self._using_sampled_axes(command_dicts):
+            return command_dicts
+        return bound_accumulated_rotations(command_dicts,
+                                           self.robot_settings.reconcile_axes,
+                                           self.robot_settings.limits['Position'],
+                                           self.choose_solution)
+
+    def check(self, command_dicts):
+        """
+        Check command dicts against the robot's limits.
+        :param command_dicts: List of command dicts
+        :return: LimitCheck tuple
+        """
+        return check_command_dicts(command_dicts, self.robot_settings.limits,
+                                   self.user_options)
+
+    def couple(self, command_dicts):
+        """
+        Couple axis 3 to axis 2 if the robot requires it.
+        :param command_dicts: List of command dicts
+        :return:
+        """
+        if not self.robot_settings.axes_coupled:
+            return command_dicts
+        return couple_axes(command_dicts)
+
+    def format(self, command_dicts):
+        """
+        Process command dicts into a program with the selected post processor.
+        :param command_dicts: List of command dicts
+        :return: Tuple of (processor, program)
+        """
+        processor = get_processor(self.postproc_settings)
+        warning = get_postproc_compatibility_warning(
+            self.robot_settings.robot_type, processor)
+        if warning and not self.postproc_settings['Ignore Warnings']:
+            raise mimic_utils.MimicError(warning)
+        return format_program(command_dicts, processor, self.postproc_settings,
+                              self.user_options)
+
+    def write(self, processor, program):
+        """
+        Write a program to the output directory.
+        :param processor: Post processor that formatted the program
+        :param program: Program string
+        :return: Path of the written program
+        """
+        return write_program(processor, program, self.postproc_settings)
+
+    def _run_stage(self, stage, function, *args):
+        """
+        Run a stage and record how long it took.
+        :param stage: Name of the stage
+        :param function: Function that runs the stage
+        :param args: Arguments of function
+        :return: Result of function
+        """
+        start = time.perf_counter()
+        result = function(*args)
+        self.timings[stage] = time.perf_counter() - start
+        return result
+
+    def _using_sampled_axes(self, command_dicts):
+        """
+        Check whether axes were sampled at a sample rate, which is when
+        rotations need to be reconciled. Poses are never reconciled.
+        :param command_dicts: List of command dicts
+        :return:
+        """
+        return bool(command_dicts) \
+            and self.postproc_settings['Using Time Interval'] \
+            and postproc.AXES in command_dicts[0]
+
+
+class SolutionCost(object):
+    """
+    Picks one of the redundant solutions of an accumulated axis without user
+    input, e.g. as the choose_solution of ExportPipeline. Each solution is
+    scored by the weighted distance of its mean value from the home position
+    and of its first value from the end state of the previous program; the
+    cheapest solution wins, and ties go to the smallest offset.
+    """
+
+    def __init__(self, home_axes=None, previous_axes=None, home_weight=1.0,
+                 previous_weight=1.0):
+        """
+        Initialize the cost.
+        :param home_axes: Axis values of the home position, one per axis;
+            defaults to zero for every axis
+        :param previous_axes: Axis values at the end of the previous program,
+            one per axis; ignored if None
+        :param home_weight: Weight of the distance from home
+        :param previous_weight: Weight of the distance from the previous
+            program's end state
+        """
+        self.home_axes = list(home_axes) if home_axes is not None else None
+        self.previous_axes = list(previous_axes) if previous_axes is not None else None
+        self.home_weight = home_weight
+        self.previous_weight = previous_weight
+
+    def __call__(self, valid_solutions, axis_number):
+        """
+        Pick the cheapest solution.
+        :param valid_solutions: List of solutions, each a sequence of axis
+            values, ordered by offset as get_accumulated_axis_offsets
+        :param axis_number: Number of the axis, 1-indexed
+        :return: Index of the solution to use
+        """
+        costs = [self.get_cost(solution, axis_number) for solution in valid_solutions]
+        return costs.index(min(costs))
+
+    def get_cost(self, solution, axis_number):
+        """
+        Score a solution.
+        :param solution: Sequence of axis values
+        :param axis_number: Number of the axis, 1-indexed
+        :return: float
+        """
+        axis_index = axis_number - 1
+        cost = 0.0
+        if self.home_weight:
+            if np is not None:
+                mean = np.mean(solution)
+            else:
+                mean = sum(solution) / float(len(solution))
+            home = self.home_axes[axis_index] if self.home_axes is not None else 0.0
+            cost += self.home_weight * abs(mean - home)
+        if self.previous_weight and self.previous_axes is not None:
+            cost += self.previous_weight * abs(solution[0] - self.previous_axes[axis_index])
+        return cost
+
+
+class MayaSampleSource(object):
+    """
+    Samples command dicts from a robot in the open Maya scene, without
+    updating the progress window.
+    """
+
+    def __init__(self, robot_name, animation_settings, postproc_settings,
+                 user_options, sampling_backend=None, worker_backend=None):
+        """
+        Initialize the source.
+        :param robot_name: Name of the robot
+        :param animation_settings: Animation settings dict
+        :param postproc_settings: Program settings dict
+        :param user_options: UserOptions tuple
+        :param sampling_backend: Optional mimic_sampling backend
+        :param worker_backend: Optional mimic_parallel worker backend, to
+            sample chunks of frames in parallel
+        """
+        if not MAYA_IS_RUNNING:
+            raise mimic_utils.MimicError('Maya is required for MayaSampleSource')
+        self.robot_name = robot_name
+        self.animation_settings = animation_settings
+        self.postproc_settings = postproc_settings
+        self.user_options = user_options
+        self.sampling_backend = sampling_backend
+        self.worker_backend = worker_backend
+
+    def get_command_dicts(self):
+        """
+        Sample command dicts at the frames selected by the program settings.
+        :return:
+        """
+        # mimic_program depends on the UI modules, so only import it when
+        # sampling from Maya
+        import mimic_program
+
+        frames = mimic_program._get_frames(self.robot_name,
+                                           self.animation_settings,
+                                           self.postproc_settings)
+        if self.worker_backend is not None:
+            job = mimic_parallel.SamplingJob(self.robot_name, self.animation_settings,
+                                             self.postproc_settings, self.user_options)
+            return mimic_parallel.sample_frames_in_parallel(job, frames, self.worker_backend)
+        return mimic_program._sample_frames_get_command_dicts(
+            self.robot_name, frames, self.animation_settings, self.user_options,
+            self.postproc_settings, self.sampling_backend, show_progress=False)
+
+
+class RecordedSampleSource(object):
+    """
+    Reads command dicts recorded with record_command_dicts, as CSV or NPZ.
+    Recorded samples hold the frame, framerate, time index, axes and
+    optionally external axes of each command.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the source.
+        :param path: Path to a .csv or .npz file
+        """
+        self.path = path
+
+    def get_command_dicts(self):
+        """
+        Read the recorded command dicts.
+        :return:
+        """
+        extension = os.path.splitext(self.path)[-1].lower()
+        if extension == '.csv':
+            return _read_csv(self.path)
+        elif extension == '.npz':
+            return _read_npz(self.path)
+        raise mimic_utils.MimicError('Unsupported sample file: {}'.format(self.path))
+
+
+def get_robot_settings(robot_name):
+    """
+    Get the static settings of a robot from its rig.
+    :param robot_name: Name of the robot
+    :return: RobotSettings tuple
+    """
+    # Imported here; mimic_external_axes imports mimic_program, which
+    # imports this module
+    import mimic_external_axes
+
+    robot = cmds.ls(robot_name)[0]
+    return RobotSettings(robot_name,
+                         mimic_utils.get_robot_type(robot_name),
+                         mimic_utils.get_reconcile_axes(robot_name),
+                         bool(mimic_utils.axes_coupled(robot)),
+                         mimic_external_axes.get_all_limits(robot_name))
+
+
+def save_robot_settings(path, robot_settings):
+    """
+    Save robot settings to a JSON file, for offline export.
+    :param path: Path to the JSON file
+    :param robot_settings: RobotSettings tuple
+    :return:
+    """
+    with open(path, 'w') as f:
+        json.dump(robot_settings._asdict(), f, indent=4, sort_keys=True)
+
+
+def load_robot_settings(path):
+    """
+    Load robot settings saved with save_robot_settings.
+    :param path: Path to the JSON file
+    :return: RobotSettings tuple
+    """
+    with open(path, 'r') as f:
+        settings = json.load(f)
+    return RobotSettings(**settings)
+
+
+def record_command_dicts(path, command_dicts):
+    """
+    Record the frames, time indices, axes and external axes of command dicts
+    to a CSV or NPZ file that RecordedSampleSource can read. Record samples
+    before they are reconciled so the pipeline can be rerun from them.
+    :param path: Path to a .csv or .npz file
+    :param command_dicts: List of command dicts
+    :return:
+    """
+    extension = os.path.splitext(path)[-1].lower()
+    if extension == '.csv':
+        _write_csv(path, command_dicts)
+    elif extension == '.npz':
+        _write_npz(path, command_dicts)
+    else:
+        raise mimic_utils.MimicError('Unsupported sample file: {}'.format(path))
+
+
+def reconcile_command_rotations(command_dicts, reconcile_axes):
+    """
+    Accumulate rotation when an axis rotates beyond +/- 180 degrees to avoid
+    discontinuities.
+    :param command_dicts: List of command dicts with axes
+    :param reconcile_axes: List of bools, one per axis; see
+        mimic_utils.get_reconcile_axes
+    :return:
+    """
+    if np is None:
+        return _reconcile_command_rotations_in_python(command_dicts, reconcile_axes)
+
+    original_axes = _get_axes_array(command_dicts)
+    axes = reconcile_axis_rotations(original_axes.copy(), reconcile_axes)
+    return _set_axes_array(command_dicts, axes, original_axes)
+
+
+def reconcile_axis_rotations(axes, reconcile_axes):
+    """
+    Accumulate rotation of an array of axis values, in place. Gives the same
+    values as applying mimic_utils.accumulate_rotation to each command and the
+    accumulated command before it.
+    :param axes: Array of shape (N, A), e.g. ProgramTrajectory.axes
+    :param reconcile_axes: List of bools, one per axis
+    :return: axes
+    """
+    _check_numpy()
+    for axis_index, reconcile_axis in enumerate(reconcile_axes):
+        if reconcile_axis:
+            accumulate_rotations(axes[:, axis_index])
+    return axes
+
+
+def accumulate_rotations(axis_values):
+    """
+    Accumulate rotation of the values of one axis, in place.
+
+    The values are first unwrapped from the jumps between raw values, a block
+    at a time. Since mimic_utils.accumulate_rotation compares each raw value
+    with the accumulated value before it, the unwrapped values are then
+    checked against it; the first value that differs is replaced and the
+    block is unwrapped again from there. Samples from a rig rarely differ, so
+    this runs in linear time.
+    :param axis_values: Array of shape (N,)
+    :return: axis_values
+    """
+    _check_numpy()
+    num_values = len(axis_values)
+    if num_values < 2:
+        return axis_values
+
+    raw_values = np.array(axis_values, dtype=float)
+    jumps = np.diff(raw_values)
+    turns = np.zeros(num_values)
+    turns[1:] = np.where(np.abs(jumps) > ROTATION_JUMP_THRESHOLD, -np.round(jumps / 360.0), 0.0)
+
+    start = 1
+    while start < num_values:
+        stop = min(start + _ACCUMULATION_BLOCK_SIZE, num_values)
+
+        # Unwrap the block from the last accumulated value
+        offset = np.round((axis_values[start - 1] - raw_values[start - 1]) / 360.0)
+        block_turns = offset + np.cumsum(turns[start:stop])
+        block_values = raw_values[start:stop]
+        axis_values[start:stop] = np.where(block_turns != 0,
+                                           block_values + block_turns * 360.0,
+                                           block_values)
+
+        expected = _accumulate_rotation(block_values, axis_values[start - 1:stop - 1])
+        mismatches = np.flatnonzero(expected != axis_values[start:stop])
+        if len(mismatches):
+            axis_values[start + mismatches[0]] = expected[mismatches[0]]
+            start += mismatches[0] + 1
+        else:
+            start = stop
+
+    return axis_values
+
+
+def bound_accumulated_rotations(command_dicts, reconcile_axes, rotation_limits,
+                                choose_solution=None):
+    """
+    Checks axes whose rotations have been accumulated to ensure they've not
+    exceeded the stated limits. If they have, this function slides the
+    commands by the multiple of 360 degrees that brings them within the
+    limits. If the limits can't be met, the commands are left unchanged.
+    :param command_dicts: List of command dicts with axes
+    :param reconcile_axes: List of bools, one per axis
+    :param rotation_limits: Position limits, as mimic_utils.get_axis_limits
+    :param choose_solution: Optional function of (valid_solutions,
+        axis_number) returning the index of the solution to use when several
+        offsets are valid, e.g. a SolutionCost; defaults to the smallest
+        offset, which is the initial values if they are valid
+    :return:
+    """
+    if np is None:
+        return _bound_accumulated_rotations_in_python(command_dicts, reconcile_axes,
+                                                      rotation_limits, choose_solution)
+
+    original_axes = _get_axes_array(command_dicts)
+    axes = bound_axis_rotations(original_axes.copy(), reconcile_axes, rotation_limits,
+                                choose_solution)
+    return _set_axes_array(command_dicts, axes, original_axes)
+
+
+def bound_axis_rotations(axes, reconcile_axes, rotation_limits, choose_solution=None):
+    """
+    Array equivalent of bound_accumulated_rotations; shifts accumulated axes
+    in place.
+    :param axes: Array of shape (N, A), e.g. ProgramTrajectory.axes
+    :param reconcile_axes: List of bools, one per axis
+    :param rotation_limits: Position limits, as mimic_utils.get_axis_limits
+    :param choose_solution: Optional function of (valid_solutions,
+        axis_number); valid solutions are arrays of axis values, ordered as
+        get_accumulated_axis_offsets
+    :return: axes
+    """
+    _check_numpy()
+    if not len(axes):
+        return axes
+
+    for i, reconcile_axis in enumerate(reconcile_axes):
+        if not reconcile_axis:
+            continue
+
+        axis_number = i + 1  # Axis numbers are 1-indexed
+        axis_name = 'Axis {}'.format(axis_number)
+
+        limit_min = rotation_limits[axis_name]['Min Limit']
+        limit_max = rotation_limits[axis_name]['Max Limit']
+
+        axis_vals_init = axes[:, i]
+        offsets = get_accumulated_axis_offsets(axis_vals_init.min(), axis_vals_init.max(),
+                                               limit_max, limit_min)
+
+        # If no offset fits the values within the limits, there's nothing we
+        # can do about it, so we don't modify the commands
+        if not offsets or offsets == [0]:
+            continue
+
+        valid_solutions = [axis_vals_init - offset for offset in offsets]
+        sol = valid_solutions[_choose_solution(valid_solutions, axis_number, choose_solution)]
+        axes[:, i] = sol
+
+    return axes
+
+
+def get_accumulated_axis_offsets(axis_min, axis_max, limit_max, limit_min):
+    """
+    Get every multiple of 360 degrees that, subtracted from accumulated axis
+    values, keeps them within the limits. Axes with ranges of +/- 720 degrees
+    or more can have several.
+    :param axis_min: Min of the axis values
+    :param axis_max: Max of the axis values
+    :param limit_max: Max limit of the axis
+    :param limit_min: Min limit of the axis
+    :return: List of offsets, ordered by size, unshifted (0) first
+    """
+    first_turn = int(math.ceil((axis_max - limit_max) / 360.0)) - 1
+    last_turn = int(math.floor((axis_min - limit_min) / 360.0)) + 1
+
+    offsets = [turn * 360 for turn in range(first_turn, last_turn + 1)
+               if axis_min - (turn * 360) >= limit_min
+               and axis_max - (turn * 360) <= limit_max]
+    return sorted(offsets, key=lambda offset: (abs(offset), offset))
+
+
+def couple_axes(command_dicts):
+    """
+    If axis 2 and 3 are coupled (as they are with FANUC, for example),
+    modify A3 accordingly.
+    :param command_dicts: List of command dicts
+    :return:
+    """
+    for command_dict in command_dicts:
+        if postproc.AXES not in command_dict:
+            continue
+        axes = list(command_dict[postproc.AXES])
+        axes[2] = axes[2] - axes[1]
+        command_dict[postproc.AXES] = postproc.Axes(*axes)
+    return command_dicts
+
+
+def check_command_dicts(command_dicts, limits, user_options):
+    """
+    Check the axes and external axes of command dicts and their derivatives
+    against limits. Axes without limits are not checked.
+    :param command_dicts: List of command dicts
+    :param limits: Dict of limits, as mimic_utils.get_all_limits or, to
+        check external axes, mimic_external_axes.get_all_limits
+    :param user_options: UserOptions tuple
+    :return: LimitCheck tuple
+    """
+    # TODO: Implement limit checks for poses
+    if not user_options.Include_axes or user_options.Ignore_motion or not command_dicts:
+        return LimitCheck(OrderedDict(), OrderedDict(), [])
+
+    # Derivatives are shared with the analysis of the same program
+    program_derivatives = analysis_utils.get_program_derivatives(command_dicts)
+    axis_names = ['Axis {}'.format(axis_number)
+                  for axis_number in program_derivatives.axis_numbers]
+
+    return check_axis_limits(program_derivatives.frames, program_derivatives.time_index,
+                             program_derivatives.derivatives, axis_names, limits)
+
+
+def check_axis_limits(frames, time_index, axis_values, axis_names, limits):
+    """
+    Check sampled axis values and their velocity, acceleration and jerk
+    against limits, in one pass over arrays.
+    :param frames: Array of shape (N,) of frames
+    :param time_index: Array of shape (N,) of sample times, in seconds
+    :param axis_values: Array of shape (N, A) of axis values, or a dict of
+        {limit type: array of shape (N, A)} of the values and derivatives to
+        check, as analysis_utils.get_program_derivatives
+    :param axis_names: Names of the A axes, as keyed in limits
+    :param limits: Dict of limits, as mimic_utils.get_all_limits
+    :return: LimitCheck tuple
+    """
+    _check_numpy()
+    violations = OrderedDict()
+    stats = OrderedDict()
+    warnings = []
+
+    if len(frames) <= len(LIMIT_TYPES) - 1:
+        warnings.append('Insufficient number of sample points to generate derivatives. '
+                        'Increase sample rate or add additional IK/FK keys for proper '
+                        'analysis if using time-based post-processor\n')
+
+    if not isinstance(axis_values, dict):
+        axis_values = OrderedDict(zip(LIMIT_TYPES, analysis_utils.get_derivatives(
+            time_index, axis_values, len(LIMIT_TYPES) - 1)))
+
+    for limit_type, limit_values in axis_values.items():
+        type_limits = limits[limit_type]
+        if type_limits[axis_names[0]]['Min Limit'] is None:
+            warnings.append('Unable to check {0} limits. Robot rig does not contain '
+                            '{0} data.\n'.format(LIMIT_NAMES[limit_type].lower()))
+        stats[limit_type] = get_axis_stats(frames, time_index, limit_values, axis_names)
+        type_violations = get_violation_runs(frames, time_index, limit_values,
+                                             axis_names, type_limits)
+        if type_violations:
+            violations[limit_type] = type_violations
+
+    return LimitCheck(violations, stats, warnings)
+
+
+def get_axis_stats(frames, time_index, values, axis_names):
+    """
+    Get the min, max and average of each axis.
+    :param frames: Array of shape (N,) of frames
+    :param time_index: Array of shape (N,) of sample times, in seconds
+    :param values: Array of shape (N, A) of axis values
+    :param axis_names: Names of the A axes
+    :return: AxisStats tuple
+    """
+    _check_numpy()
+    # The first sample reaching the min or max is recorded
+    min_indices = np.argmin(values, axis=0)
+    max_indices = np.argmax(values, axis=0)
+    axis_indices = np.arange(values.shape[1])
+
+    return AxisStats(list(axis_names),
+                     values[min_indices, axis_indices].tolist(),
+                     frames[min_indices].tolist(),
+                     time_index[min_indices].tolist(),
+                     values[max_indices, axis_indices].tolist(),
+                     frames[max_indices].tolist(),
+                     time_index[max_indices].tolist(),
+                     np.mean(values, axis=0).tolist())
+
+
+def get_violation_runs(frames, time_index, values, axis_names, limits):
+    """
+    Find the runs of consecutive samples that violate the limits of each
+    axis. Axes without limits, or missing from limits, are not checked; a
+    missing min or max limit leaves that side unbounded.
+    :param frames: Array of shape (N,) of frames
+    :param time_index: Array of shape (N,) of sample times, in seconds
+    :param values: Array of shape (N, A) of axis values
+    :param axis_names: Names of the A axes, as keyed in limits
+    :param limits: Limits of one limit type, as keyed in
+        mimic_utils.get_all_limits
+    :return: dict of {axis name: list of ViolationRun tuples}
+    """
+    _check_numpy()
+    violations = {}
+    for axis_index, axis_name in enumerate(axis_names):
+        if axis_name not in limits:
+            continue
+        limit_min = limits[axis_name]['Min Limit']
+        limit_max = limits[axis_name]['Max Limit']
+        if limit_min is None and limit_max is None:
+            continue
+        if limit_min is None:
+            limit_min = -np.inf
+        if limit_max is None:
+            limit_max = np.inf
+
+        axis_values = values[:, axis_index]
+        # How far each sample is beyond the limits; positive where violated
+        excess = np.maximum(axis_values - limit_max, limit_min - axis_values)
+        violated = np.concatenate([[False], excess > 0, [False]])
+        edges = np.flatnonzero(violated[1:] != violated[:-1])
+        if not len(edges):
+            continue
+
+        runs = []
+        for start, stop in zip(edges[::2].tolist(), edges[1::2].tolist()):
+            peak = start + int(np.argmax(excess[start:stop]))
+            peak_value = float(axis_values[peak])
+            runs.append(ViolationRun(
+                axis_name,
+                float(frames[start]), float(frames[stop - 1]),
+                float(time_index[start]), float(time_index[stop - 1]),
+                float(frames[peak]), peak_value,
+                limit_max if peak_value > limit_max else limit_min,
+                stop - start))
+        violations[axis_name] = runs
+    return violations
+
+
+def format_violations(violation_runs, limit_type):
+    """
+    Format limit violations as a table, one row per run of consecutive
+    violating samples.
+    :param violation_runs: A dict of {axis_name: list of ViolationRun tuples}
+    :param limit_type: Display name of the limit type
+    :return:
+    """
+    warning = ''
+    warning_template = '   {0:>{time_padding}}{1:>{frame_padding}}{2:>{frame_padding}}' \
+                       '{3:>{count_padding}}{4:>{limit_padding}}{5:>{val_padding}}\n'
+    padding = {'val_padding': 13, 'limit_padding': 10, 'time_padding': 10,
+               'frame_padding': 10, 'count_padding': 9}
+
+    for axis_name in sorted(violation_runs):
+        warning += axis_name + " {} Violations:\n".format(limit_type)
+        warning += warning_template.format('Time', 'Start', 'End', 'Samples', 'Limit', 'Peak',
+                                           **padding)
+        for run in violation_runs[axis_name]:
+            warning += warning_template.format(
+                general_utils.num_to_str(run.start_time, precision=3),
+                general_utils.num_to_str(run.start_frame, precision=3),
+                general_utils.num_to_str(run.end_frame, precision=3),
+                run.num_samples,
+                general_utils.num_to_str(run.limit, precision=3),
+                general_utils.num_to_str(run.peak_value, precision=3),
+                **padding)
+
+    return warning
+
+
+def format_axis_stats(axis_stats, limit_type):
+    """
+    Format axis statistics as a table.
+    :param axis_stats: AxisStats tuple
+    :param limit_type: Display name of the limit type
+    :return:
+    """
+    axis_template = '>>> {0:>{axis_padding}} '
+    axis_padding = {'axis_padding': 2}
+
+    # Header
+    res = [axis_template.format('A', **axis_padding)]
+    for axis_name in axis_stats.axis_names:
+        res.append(axis_template.format(axis_name.split(' ')[-1], **axis_padding))
+
+    # Min and max
+    min_max_template = '{0:>{time_padding}}{1:>{frame_padding}}{2:>{val_padding}}   |'
+    min_max_padding = {'val_padding': 13, 'time_padding': 10, 'frame_padding': 10}
+    for name, axis_values, axis_frames, axis_times in [
+            ('Min', axis_stats.min_values, axis_stats.min_frames, axis_stats.min_times),
+            ('Max', axis_stats.max_values, axis_stats.max_frames, axis_stats.max_times)]:
+        res[0] += min_max_template.format('Time', 'Frame', name, **min_max_padding)
+        for axis_index, axis_value in enumerate(axis_values):
+            res[axis_index + 1] += min_max_template.format(
+                general_utils.num_to_str(axis_times[axis_index], precision=3),
+                general_utils.num_to_str(axis_frames[axis_index], precision=3),
+                general_utils.num_to_str(axis_value, precision=3),
+                **min_max_padding)
+
+    # Avg
+    avg_template = '{0:>{avg_padding}}'
+    avg_padding = {'avg_padding': 10}
+    res[0] += avg_template.format('Avg', **avg_padding)
+    for axis_index, axis_avg in enumerate(axis_stats.averages):
+        res[axis_index + 1] += avg_template.format(
+            general_utils.num_to_str(axis_avg, precision=3), **avg_padding)
+
+    return '{} Stats:\n'.format(limit_type) + '\n'.join(res) + '\n'
+
+
+def format_limit_check(limit_check, limits):
+    """
+    Format a limit check as a report, as shown in the Mimic output window.
+    :param limit_check: LimitCheck tuple
+    :param limits: Dict of limits, as mimic_utils.get_all_limits
+    :return:
+    """
+    report = ''.join(limit_check.warnings)
+    for limit_type, axis_stats in limit_check.stats.items():
+        report += format_axis_stats(axis_stats, LIMIT_NAMES[limit_type])
+    if not limit_check.violations:
+        return report + 'All checks passed!\n'
+    for limit_type, violation_runs in limit_check.violations.items():
+        report += format_violations(violation_runs, LIMIT_NAMES[limit_type])
+    return report
+
+
+def get_processor(postproc_settings):
+    """
+    Get an instance of the selected post processor.
+    :param postproc_settings: Program settings dict
+    :return:
+    """
+    processor_type = postproc_settings['Processor Type']
+    return postproc_setup.POST_PROCESSORS[processor_type]()
+
+
+def get_postproc_compatibility_warning(robot_type, processor):
+    """
+    Verify the compatibility of a robot type and a processor.
+    :param robot_type: Type of the robot, e.g. 'ABB'
+    :param processor: Post processor
+    :return: Warning string, empty if compatible
+    """
+    warning = ''
+    processor_type = processor.type_robot
+
+    # Always return without a warning if the processor is of type "GENERAL"
+    if processor_type == 'GENERAL':
+        return warning
+
+    if robot_type != processor_type:
+        warning = 'WARNING!\n' \
+                  'The type of robot ({}) \n' \
+                  'and type of processor ({}) \n' \
+                  'selected are incompatible!\n' \
+            .format(robot_type, processor_type)
+    return warning
+
+
+def format_program(command_dicts, processor, postproc_settings, user_options):
+    """
+    Process command dicts into a program.
+    :param command_dicts: List of command dicts
+    :param processor: Post processor
+    :param postproc_settings: Program settings dict
+    :param user_options: UserOptions tuple
+    :return: Tuple of (processor, program)
+    """
+    # Apply processor-specific formatting to commands
+    commands = processor.format_commands(command_dicts)
+
+    # Make sure we're using the right directory
+    processor.set_program_directory(postproc_settings['Output Directory'])
+
+    # Process the raw_commands into relevant robot control code
+    template_filename = postproc_settings['Template Filename']
+    program = processor.process(commands, user_options, template_filename)
+    return processor, program
+
+
+def write_program(processor, program, postproc_settings):
+    """
+    Write a program as robot code to a file.
+    :param processor: Post processor that formatted the program
+    :param program: Program string
+    :param postproc_settings: Program settings dict
+    :return: Path of the written program
+    """
+    return processor.write(
+        program,
+        output_filename=postproc_settings['Output Filename'],
+        overwrite=postproc_settings['Overwrite Option'])
+
+
+def _get_sample_columns(command_dicts):
+    """
+    Get the columns to record for command dicts.
+    :param command_dicts: List of command dicts
+    :return: Tuple of (has_axes, has_external_axes)
+    """
+    if not command_dicts:
+        raise mimic_utils.MimicError('No commands to record')
+    return (postproc.AXES in command_dicts[0],
+            postproc.EXTERNAL_AXES in command_dicts[0])
+
+
+def _get_command_dict(frame, framerate, time_index, axes=None, external_axes=None):
+    """
+    Build a command dict from recorded values.
+    :param frame: Frame
+    :param framerate: Framerate
+    :param time_index: Time index, in seconds
+    :param axes: Optional list of axis values
+    :param external_axes: Optional list of external axis values, None where
+        unused
+    :return:
+    """
+    command_dict = {'Frame': frame,
+                    'Framerate': framerate,
+                    postproc.TIME_INDEX: time_index}
+    if axes is not None:
+        command_dict[postproc.AXES] = postproc.Axes(*axes)
+    if external_axes is not None:
+        command_dict[postproc.EXTERNAL_AXES] = postproc.ExternalAxes(*external_axes)
+    return command_dict
+
+
+def _write_csv(path, command_dicts):
+    """
+    Record command dicts to a CSV file.
+    :param path: Path to the CSV file
+    :param command_dicts: List of command dicts
+    :return:
+    """
+    has_axes, has_external_axes = _get_sample_columns(command_dicts)
+    header = ['frame', 'framerate', 'time_index']
+    if has_axes:
+        num_axes = len(command_dicts[0][postproc.AXES])
+        header += ['axis_{}'.format(i + 1) for i in range(num_axes)]
+    if has_external_axes:
+        header += ['external_axis_{}'.format(i + 1) for i in range(NUM_EXTERNAL_AXES)]
+
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for command_dict in command_dicts:
+            row = [command_dict['Frame'],
+                   command_dict['Framerate'],
+                   command_dict[postproc.TIME_INDEX]]
+            if has_axes:
+                row += list(command_dict[postproc.AXES])
+            if has_external_axes:
+                row += ['' if value is None else value
+                        for value in command_dict[postproc.EXTERNAL_AXES]]
+            writer.writerow([_format_csv_value(value) for value in row])
+
+
+def _format_csv_value(value):
+    """
+    Format a value of a CSV row so that floats read back exactly. NumPy
+    scalars (e.g. frames from keyframes only) are written as plain numbers,
+    since under NumPy 2 their repr is e.g. 'np.float64(12.0)'.
+    :param value: Value of a row
+    :return:
+    """
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        return repr(float(value))
+    return value
+
+
+def _read_csv(path):
+    """
+    Read command dicts from a CSV file.
+    :param path: Path to the CSV file
+    :return:
+    """
+    external_axis_columns = ['external_axis_{}'.format(i + 1) for i in range(NUM_EXTERNAL_AXES)]
+
+    command_dicts = []
+    with open(path, 'r', newline='') as f:
+        reader = csv.DictReader(f)
+        # There is a column per axis of the robot the samples were recorded from
+        axis_columns = [column for column in reader.fieldnames if column.startswith('axis_')]
+        has_axes = bool(axis_columns)
+        has_external_axes = external_axis_columns[0] in reader.fieldnames
+        for row in reader:
+            axes = None
+            external_axes = None
+            if has_axes:
+                axes = [float(row[column]) for column in axis_columns]
+            if has_external_axes:
+                external_axes = [float(row[column]) if row[column] else None
+                                 for column in external_axis_columns]
+            command_dicts.append(_get_command_dict(float(row['frame']),
+                                                   float(row['framerate']),
+                                                   float(row['time_index']),
+                                                   axes,
+                                                   external_axes))
+    return command_dicts
+
+
+def _write_npz(path, command_dicts):
+    """
+    Record command dicts to an NPZ file.
+    :param path: Path to the NPZ file
+    :param command_dicts: List of command dicts
+    :return:
+    """
+    _check_numpy()
+    has_axes, has_external_axes = _get_sample_columns(command_dicts)
+    arrays = {'frames': [command_dict['Frame'] for command_dict in command_dicts],
+              'framerate': [command_dict['Framerate'] for command_dict in command_dicts],
+              'time_index': [command_dict[postproc.TIME_INDEX] for command_dict in command_dicts]}
+    if has_axes:
+        arrays['axes'] = [list(command_dict[postproc.AXES]) for command_dict in command_dicts]
+    if has_external_axes:
+        arrays['external_axes'] = [[np.nan if value is None else value
+                                    for value in command_dict[postproc.EXTERNAL_AXES]]
+                                   for command_dict in command_dicts]
+    np.savez(path, **{name: np.asarray(values, dtype=float) for name, values in arrays.items()})
+
+
+def _read_npz(path):
+    """
+    Read command dicts from an NPZ file.
+    :param path: Path to the NPZ file
+    :return:
+    """
+    _check_numpy()
+    with np.load(path) as samples:
+        frames = samples['frames'].tolist()
+        framerates = samples['framerate'].tolist()
+        time_indices = samples['time_index'].tolist()
+        axes = samples['axes'].tolist() if 'axes' in samples else None
+        external_axes = None
+        if 'external_axes' in samples:
+            external_axes = [[None if np.isnan(value) else value for value in row]
+                             for row in samples['external_axes'].tolist()]
+
+    return [_get_command_dict(frame,
+                              framerates[i],
+                              time_indices[i],
+                              axes[i] if axes is not None else None,
+                              external_axes[i] if external_axes is not None else None)
+            for i, frame in enumerate(frames)]
+
+
+def _accumulate_rotation(a_in, a_0):
+    """
+    Array equivalent of mimic_utils.accumulate_rotation.
+    :param a_in: Array of current evaluations of axis rotation
+    :param a_0: Array of previous (accumulated) evaluations of axis rotation
+    :return:
+    """
+    sign = np.where(a_0 < 0, -1.0, 1.0)
+    difference = np.abs(a_in - a_0)
+    return np.where(difference > ROTATION_JUMP_THRESHOLD,
+                    a_in + sign * np.round(difference / 360.0) * 360.0,
+                    a_in)
+
+
+def _choose_solution(valid_solutions, axis_number, choose_solution=None):
+    """
+    Pick one of the valid solutions of an accumulated axis.
+    :param valid_solutions: List of solutions, ordered by offset
+    :param axis_number: Number of the axis, 1-indexed
+    :param choose_solution: Optional function of (valid_solutions,
+        axis_number) returning the index of the solution to use; defaults to
+        the first solution, i.e. the smallest offset
+    :return: Index of the solution
+    """
+    if len(valid_solutions) == 1 or choose_solution is None:
+        return 0
+    return choose_solution(valid_solutions, axis_number)
+
+
+def _get_axes_array(command_dicts):
+    """
+    Get the axes of command dicts as an array.
+    :param command_dicts: List of command dicts with axes
+    :return: Array of shape (N, A), one column per axis
+    """
+    num_axes = len(command_dicts[0][postproc.AXES]) if command_dicts else 0
+    axis_values = itertools.chain.from_iterable(command_dict[postproc.AXES]
+                                                for command_dict in command_dicts)
+    return np.fromiter(axis_values, dtype=float,
+                       count=len(command_dicts) * num_axes).reshape(-1, num_axes)
+
+
+def _set_axes_array(command_dicts, axes, original_axes):
+    """
+    Replace the axes of command dicts with those of an array, where they
+    changed.
+    :param command_dicts: List of command dicts with axes
+    :param axes: Array of shape (N, A)
+    :param original_axes: Array of shape (N, A) the axes were changed from
+    :return: command_dicts
+    """
+    changed = np.flatnonzero((axes != original_axes).any(axis=1))
+    for command_index, axis_values in zip(changed.tolist(), axes[changed].tolist()):
+        command_dicts[command_index][postproc.AXES] = postproc.Axes(*axis_values)
+    return command_dicts
+
+
+def _reconcile_command_rotations_in_python(command_dicts, reconcile_axes):
+    """
+    Pure Python version of reconcile_command_rotations, used when NumPy is
+    not available.
+    :param command_dicts: List of command dicts with axes
+    :param reconcile_axes: List of bools, one per axis
+    :return:
+    """
+    command_axes = [list(command_dict[postproc.AXES]) for command_dict in command_dicts]
+
+    for command_index in range(1, len(command_dicts)):
+        for axis_index, reconcile_axis in enumerate(reconcile_axes):
+            if not reconcile_axis:
+                continue
+            command_axes[command_index][axis_index] = mimic_utils.accumulate_rotation(
+                command_axes[command_index][axis_index],
+                command_axes[command_index - 1][axis_index])
+        command_dicts[command_index][postproc.AXES] = postproc.Axes(*command_axes[command_index])
+
+    return command_dicts
+
+
+def _bound_accumulated_rotations_in_python(command_dicts, reconcile_axes, rotation_limits,
+                                           choose_solution=None):
+    """
+    Pure Python version of bound_accumulated_rotations, used when NumPy is
+    not available.
+    :param command_dicts: List of command dicts with axes
+    :param reconcile_axes: List of bools, one per axis
+    :param rotation_limits: Position limits, as mimic_utils.get_axis_limits
+    :param choose_solution: Optional function of (valid_solutions, axis_number)
+    :return:
+    """
+    command_axes = [list(command_dict[postproc.AXES]) for command_dict in command_dicts]
+
+    for i, reconcile_axis in enumerate(reconcile_axes):
+        if not reconcile_axis:
+            continue
+
+        axis_number = i + 1  # Axis numbers are 1-indexed
+        axis_name = 'Axis {}'.format(axis_number)
+
+        limit_min = rotation_limits[axis_name]['Min Limit']
+        limit_max = rotation_limits[axis_name]['Max Limit']
+
+        axis_vals_init = [axis[i] for axis in command_axes]
+        offsets = get_accumulated_axis_offsets(min(axis_vals_init), max(axis_vals_init),
+                                               limit_max, limit_min)
+        if not offsets or offsets == [0]:
+            continue
+
+        valid_solutions = [[val - offset for val in axis_vals_init] for offset in offsets]
+        sol = valid_solutions[_choose_solution(valid_solutions, axis_number, choose_solution)]
+
+        for command_index in range(len(command_dicts)):
+            command_axes[command_index][i] = sol[command_index]
+
+    for command_dict, axes in zip(command_dicts, command_axes):
+        command_dict[postproc.AXES] = postproc.Axes(*axes)
+
+    return command_dicts
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required for NPZ samples and
+    array stages, is not available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for NPZ samples and array stages')
@@ -231,6 +231,48 @@ def _get_external_axis_velocity_limit(external_axis_path):
     return mimic_utils.get_attribute_value(attribute_path)
 
 
+def get_all_limits(robot_name):
+    """
+    Gets the limits of a robot's axes, as mimic_utils.get_all_limits, and of
+    its external axes that are not ignored. External axis n is keyed as
+    'Axis {num robot axes + n}', as numbered in analysis, and its limits are
+    in the units external axes are sampled in: millimeters (and mm/s) for
+    translations, degrees (and deg/s) for rotations. External axes only store position and velocity
+    limits; their accel and jerk limits are None.
+    :param robot_name: string, name of robot
+    :return limits_data: dict containing all limit data
+    """
+    limits_data = mimic_utils.get_all_limits(robot_name)
+    num_axes = mimic_utils.get_num_axes(robot_name)
+
+    for external_axis_name in get_external_axis_names(robot_name, only_active=True):
+        external_axis_path = _get_external_axis_path(robot_name, external_axis_name)
+        axis_number = num_axes + _get_external_axis_number(external_axis_path)
+        axis_name = 'Axis {}'.format(axis_number)
+
+        # If the axis' driving attribute is a translation, we need to convert
+        # its position limits from Maya's units (cm) to millimeters, and its
+        # velocity limit from the m/s it's stored in to mm/s
+        _, driving_attr_name = _get_external_axis_connections(external_axis_path)
+        scale = 10 if 'translate' in driving_attr_name else 1
+        velocity_scale = 1000 if 'translate' in driving_attr_name else 1
+
+        limits_data['Position'][axis_name] = {
+            'Min Limit': _get_external_axis_limits_min(external_axis_path) * scale,
+            'Max Limit': _get_external_axis_limits_max(external_axis_path) * scale}
+
+        velocity_limit = _get_external_axis_velocity_limit(external_axis_path) * velocity_scale
+        limits_data['Velocity'][axis_name] = {'Min Limit': None, 'Max Limit': None}
+        if velocity_limit:
+            limits_data['Velocity'][axis_name] = {'Min Limit': -velocity_limit,
+                                                  'Max Limit': velocity_limit}
+
+        for limit_type in ['Accel', 'Jerk']:
+            limits_data[limit_type][axis_name] = {'Min Limit': None, 'Max Limit': None}
+
+    return limits_data
+
+
 # ------------------
 
 
@@ -654,10 +696,12 @@ def add_external_axis(*args):
                parent=parent_attribute)
 
     # If the driving attribute is a translate attribute, we convert the user
-    # input from millimeters to Maya's default unit of centimeters
+    # input from millimeters to Maya's default unit of centimeters, and its
+    # velocity limit from mm/s to the m/s it's stored in
     if 'translate' in driving_attribute:
         position_limit_min = position_limit_min / 10
         position_limit_max = position_limit_max / 10
+        velocity_limit = velocity_limit / 1000
 
     # Set all External Axis attributes accordingly
     axis_parent_attribute = target_CTRL + '.' + axis_name
@@ -773,10 +817,12 @@ def update_external_axis(*args):
                                        external_axis_params)
 
     # If the driving attribute is a translate attribute, we convert the user
-    # input from millimeters to Maya's default unit of centimeters
+    # input from millimeters to Maya's default unit of centimeters, and its
+    # velocity limit from mm/s to the m/s it's stored in
     if 'translate' in driving_attribute:
         position_limit_min = position_limit_min / 10
         position_limit_max = position_limit_max / 10
+        velocity_limit = velocity_limit / 1000
 
     # Set all appropriate attributes on the robot
     # If the robot is referenced, Maya will throw an exceptrion when it
@@ -974,9 +1020,11 @@ def update_external_axis_UI(axis_info):
     # input from millimeters to Maya's default unit of centimeters
     position_limit_min = axis_info['Position Limit Min']
     position_limit_max = axis_info['Position Limit Max']
+    velocity_limit = axis_info['Velocity Limit']
     if 'translate' in axis_info['Driving Attribute']:
         position_limit_min = position_limit_min * 10
         position_limit_max = position_limit_max * 10
+        velocity_limit = velocity_limit * 1000
 
     cmds.textField('t_externalAxisLimitMin',
                  edit=True,
@@ -986,7 +1034,7 @@ def update_external_axis_UI(axis_info):
                  text=str(position_limit_max))
     cmds.textField('t_externalAxisVelocityLimit',
                  edit=True,
-                 text=str(axis_info['Velocity Limit']))
+                 text=str(velocity_limit))
     cmds.checkBox('cb_ignoreExternalAxis',
                 edit=True,
                 value=axis_info['Ignore'])
@@ -0,0 +1,319 @@
+#!usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Parallel sampling of long programs. Splits the frames to sample into
+contiguous chunks, samples each chunk in a separate worker and merges the
+resulting command dicts back in order.
+
+MayapyWorkerBackend samples each chunk in a mayapy process that opens the
+saved scene in standalone mode; LocalWorkerBackend samples chunks in the
+current process, so that chunking and merging can be exercised without
+Maya. Workers return raw samples: rotations are reconciled after merging,
+so that accumulation carries across chunk seams.
+
+This module is also the entry point of mayapy workers:
+
+    mayapy mimic_parallel.py <job.json> <result.json>
+"""
+
+try:
+    import maya.cmds as cmds
+
+    MAYA_IS_RUNNING = True
+except ImportError:  # Maya is not running
+    cmds = None
+    MAYA_IS_RUNNING = False
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from collections import namedtuple
+from concurrent import futures
+
+import mimic_utils
+
+# Module-level imports must not call Maya: mayapy workers import this module
+# before maya.standalone.initialize(). postproc_options imports postproc_setup,
+# which instantiates every post processor, so it is imported where used.
+from postproc import postproc
+
+# Everything a worker needs to sample a chunk of frames, apart from the frames
+SamplingJob = namedtuple('SamplingJob', [
+                         'robot_name',
+                         'animation_settings',
+                         'postproc_settings',
+                         'user_options'
+                         ])
+
+# Command dict entries that hold a structure, or a list of structures, and
+# need to be rebuilt after a round trip through JSON
+_STRUCTURES = {postproc.AXES: postproc.Axes,
+               postproc.POSE: postproc.Pose,
+               postproc.EXTERNAL_AXES: postproc.ExternalAxes,
+               postproc.CONFIGURATION: postproc.Configuration}
+_STRUCTURE_LISTS = {postproc.DIGITAL_OUTPUT: postproc.DigitalOutput,
+                    postproc.ANALOG_OUTPUT: postproc.AnalogOutput}
+
+
+class LocalWorkerBackend(object):
+    """
+    Samples chunks one after the other in the current process. Results make
+    the same JSON round trip as those of mayapy workers.
+    """
+
+    def __init__(self, sample_chunk_function=None, num_workers=2):
+        """
+        Initialize the backend.
+        :param sample_chunk_function: Function of (job, frames) returning
+            command dicts; defaults to sample_chunk
+        :param num_workers: Number of chunks to split frames into
+        """
+        self.sample_chunk_function = sample_chunk_function or sample_chunk
+        self.num_workers = num_workers
+
+    def map(self, job, chunks):
+        """
+        Sample chunks of frames.
+        :param job: SamplingJob tuple
+        :param chunks: List of lists of frames
+        :return: List of lists of command dicts, one per chunk, in order
+        """
+        results = []
+        for frames in chunks:
+            command_dicts = self.sample_chunk_function(job, frames)
+            results.append(load_command_dicts(json.loads(json.dumps(dump_command_dicts(command_dicts)))))
+        return results
+
+
+class MayapyWorkerBackend(object):
+    """
+    Samples each chunk in a mayapy process that opens a saved scene in
+    standalone mode.
+    """
+
+    def __init__(self, scene_path, num_workers=4, mayapy_path=None):
+        """
+        Initialize the backend.
+        :param scene_path: Path of the saved scene to sample
+        :param num_workers: Number of mayapy processes to run at once, and
+            of chunks to split frames into
+        :param mayapy_path: Path of the mayapy executable; defaults to the one
+            next to the running Maya executable
+        """
+        self.scene_path = scene_path
+        self.num_workers = num_workers
+        self.mayapy_path = mayapy_path or get_mayapy_path()
+
+    def map(self, job, chunks):
+        """
+        Sample chunks of frames in parallel mayapy processes.
+        :param job: SamplingJob tuple
+        :param chunks: List of lists of frames
+        :return: List of lists of command dicts, one per chunk, in order
+        """
+        # Job and result files hold the whole sampled program; remove them
+        # once the results are loaded, or a worker failed
+        job_dir = tempfile.mkdtemp(prefix='mimic_sampling_')
+        try:
+            paths = []
+            for chunk_index, frames in enumerate(chunks):
+                job_path = os.path.join(job_dir, 'job_{}.json'.format(chunk_index))
+                result_path = os.path.join(job_dir, 'result_{}.json'.format(chunk_index))
+                with open(job_path, 'w') as f:
+                    json.dump({'scene_path': self.scene_path,
+                               'job': dump_job(job),
+                               'frames': [float(frame) for frame in frames]}, f)
+                paths.append((job_path, result_path))
+
+            with futures.ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                processes = list(executor.map(lambda p: self._run_worker(*p), paths))
+
+            results = []
+            for (job_path, result_path), process in zip(paths, processes):
+                if process.returncode != 0:
+                    raise mimic_utils.MimicError('Sampling worker failed ({}):\n{}'.format(
+                        os.path.basename(job_path), process.stderr.decode(errors='replace')[-2000:]))
+                with open(result_path, 'r') as f:
+                    results.append(load_command_dicts(json.load(f)))
+            return results
+        finally:
+            shutil.rmtree(job_dir, ignore_errors=True)
+
+    def _run_worker(self, job_path, result_path):
+        """
+        Run a mayapy worker to completion.
+        :param job_path: Path of the job file
+        :param result_path: Path to write the result to
+        :return: subprocess.CompletedProcess
+        """
+        return subprocess.run([self.mayapy_path, os.path.abspath(__file__), job_path, result_path],
+                              stdout=subprocess.PIPE,
+                              stderr=subprocess.PIPE)
+
+
+def sample_frames_in_parallel(job, frames, worker_backend, num_chunks=None):
+    """
+    Sample frames in chunks and merge the results in order.
+    :param job: SamplingJob tuple
+    :param frames: List of frames
+    :param worker_backend: LocalWorkerBackend or MayapyWorkerBackend
+    :param num_chunks: Number of chunks; defaults to the number of workers
+    :return: List of command dicts, as if the frames were sampled at once
+    """
+    chunks = split_frames(frames, num_chunks or worker_backend.num_workers)
+    return merge_command_dicts(worker_backend.map(job, chunks))
+
+
+def split_frames(frames, num_chunks):
+    """
+    Split frames into contiguous chunks of near equal length.
+    :param frames: List of frames
+    :param num_chunks: Number of chunks; fewer are returned if there are
+        fewer frames
+    :return: List of lists of frames
+    """
+    frames = list(frames)
+    num_chunks = max(1, min(num_chunks, len(frames)))
+    chunk_size, remainder = divmod(len(frames), num_chunks)
+    chunks = []
+    start = 0
+    for chunk_index in range(num_chunks):
+        stop = start + chunk_size + (1 if chunk_index < remainder else 0)
+        chunks.append(frames[start:stop])
+        start = stop
+    return chunks
+
+
+def merge_command_dicts(chunks):
+    """
+    Merge chunks of command dicts in order.
+    :param chunks: List of lists of command dicts
+    :return: List of command dicts
+    """
+    command_dicts = []
+    for chunk in chunks:
+        if command_dicts and chunk and chunk[0]['Frame'] <= command_dicts[-1]['Frame']:
+            raise mimic_utils.MimicError('Sampled chunks overlap or are out of order')
+        command_dicts.extend(chunk)
+    return command_dicts
+
+
+def sample_chunk(job, frames):
+    """
+    Sample a chunk of frames from the open scene, without UI updates.
+    :param job: SamplingJob tuple
+    :param frames: List of frames
+    :return: List of command dicts
+    """
+    # mimic_program depends on the UI modules, so only import it to sample
+    import mimic_program
+
+    return mimic_program._sample_frames_get_command_dicts(
+        job.robot_name, frames, job.animation_settings, job.user_options,
+        job.postproc_settings, show_progress=False)
+
+
+def get_scene_path():
+    """
+    Get the path of the open scene, which workers open to sample it.
+    :return:
+    """
+    scene_path = cmds.file(query=True, sceneName=True)
+    if not scene_path:
+        raise mimic_utils.MimicError('Save the scene before sampling in parallel')
+    if cmds.file(query=True, modified=True):
+        raise mimic_utils.MimicError('The scene has unsaved changes; '
+                                     'save it before sampling in parallel')
+    return scene_path
+
+
+def get_mayapy_path():
+    """
+    Get the path of the mayapy executable that ships with the running Maya.
+    :return:
+    """
+    executable = 'mayapy.exe' if os.name == 'nt' else 'mayapy'
+    return os.path.join(os.path.dirname(sys.executable), executable)
+
+
+def dump_job(job):
+    """
+    Convert a SamplingJob to plain Python types.
+    :param job: SamplingJob tuple
+    :return: dict
+    """
+    job_dict = job._asdict()
+    job_dict['user_options'] = job.user_options._asdict()
+    return dict(job_dict)
+
+
+def load_job(job_dict):
+    """
+    Convert a dict from dump_job back to a SamplingJob.
+    :param job_dict: dict
+    :return: SamplingJob tuple
+    """
+    from postproc import postproc_options
+
+    job_dict = dict(job_dict)
+    job_dict['user_options'] = postproc_options.UserOptions(**job_dict['user_options'])
+    return SamplingJob(**job_dict)
+
+
+def dump_command_dicts(command_dicts):
+    """
+    Convert command dicts to JSON-compatible types. Structures become lists.
+    :param command_dicts: List of command dicts
+    :return: List of dicts
+    """
+    return [dict(command_dict) for command_dict in command_dicts]
+
+
+def load_command_dicts(command_dicts):
+    """
+    Rebuild command dicts loaded from JSON.
+    :param command_dicts: List of dicts from dump_command_dicts
+    :return: List of command dicts
+    """
+    for command_dict in command_dicts:
+        for key, structure in _STRUCTURES.items():
+            if key in command_dict:
+                command_dict[key] = structure(*command_dict[key])
+        for key, structure in _STRUCTURE_LISTS.items():
+            if key in command_dict:
+                command_dict[key] = [structure(*values) for values in command_dict[key]]
+    return command_dicts
+
+
+def _run_worker(job_path, result_path):
+    """
+    Sample a chunk of frames in mayapy and write the command dicts to a file.
+    :param job_path: Path of the job file written by MayapyWorkerBackend
+    :param result_path: Path to write the result to
+    :return:
+    """
+    import maya.standalone
+    maya.standalone.initialize(name='python')
+    try:
+        import maya.cmds as cmds
+        import mimic
+
+        with open(job_path, 'r') as f:
+            job_data = json.load(f)
+
+        mimic.load_mimic_plugins()
+        cmds.file(job_data['scene_path'], open=True, force=True)
+        command_dicts = sample_chunk(load_job(job_data['job']), job_data['frames'])
+
+        with open(result_path, 'w') as f:
+            json.dump(dump_command_dicts(command_dicts), f)
+    finally:
+        maya.standalone.uninitialize()
+
+
+if __name__ == '__main__':
+    _run_worker(sys.argv[1], sys.argv[2])
@@ -420,6 +420,13 @@ class MimicPreferencesWindow(Window):
                                  'post-process. Leave unchecked for faster results.',
                       changeCommand=partial(Prefs.set_user_pref,
                                                         'OPTS_PREVIEW_IN_VIEWPORT'))
+        cmds.checkBox(label="Fast export",
+                      value=Prefs.get_user_pref('OPTS_FAST_EXPORT'),
+                      annotation='If checked, the viewport is paused while sampling '
+                                 'and progress is updated less often. Overrides '
+                                 'preview in viewport.',
+                      changeCommand=partial(Prefs.set_user_pref,
+                                                        'OPTS_FAST_EXPORT'))
         cmds.checkBox(label="Prompt on redundant solutions",
                       value=Prefs.get_user_pref(
                           'OPTS_REDUNDANT_SOLUTIONS_USER_PROMPT'),
@@ -16,17 +16,27 @@ except ImportError:  # Maya is not running
     mel = None
     MAYA_IS_RUNNING = False
 import math
+import time
 
 import general_utils
 import mimic_utils
 import mimic_external_axes
-import mimic_io
+import mimic_sampling
+import mimic_export
+import mimic_parallel
+import mimic_adaptive
+# Not reloaded with the other modules, so that cached samples persist
+import mimic_cache
 
 from analysis import analysis
 from analysis import analysis_utils
 import importlib
 importlib.reload(analysis)
 importlib.reload(analysis_utils)
+importlib.reload(mimic_sampling)
+importlib.reload(mimic_export)
+importlib.reload(mimic_parallel)
+importlib.reload(mimic_adaptive)
 
 from postproc import postproc
 from postproc import postproc_setup
@@ -34,6 +44,17 @@ from postproc import postproc_options
 
 OUTPUT_WINDOW_NAME = 'programOutputScrollField'
 
+# Minimum time between progress window updates in fast export mode, in seconds
+PROGRESS_UPDATE_INTERVAL = 0.1
+
+# Frames sampled per backend call when showing progress; the progress window
+# is updated between chunks, while the scene is being evaluated
+SAMPLING_CHUNK_SIZE = 100
+
+# Axes at the end of the last program saved for each robot, by robot name.
+# Redundant axis solutions of the next program are scored against them
+_previous_program_end_axes = {}
+
 
 def analyze_program(*args):
     """
@@ -54,12 +75,13 @@ def analyze_program(*args):
     # Create progress window and analyze program
     _initialize_export_progress_window('Analyzing')
     try:
-        command_dicts = _get_command_dicts(*program_settings)
+        command_dicts, limit_check = _get_analyzed_command_dicts(*program_settings)
     except mimic_utils.MimicError:
         cmds.headsUpMessage('Program analysis canceled.')
         return
 
-    violation_exception, violation_warning = _check_command_dicts(command_dicts, *program_settings)
+    violation_exception, violation_warning = _check_command_dicts(command_dicts, *program_settings,
+                                                                  limit_check=limit_check)
     _destroy_progress_window()
 
     # If PyQtGraph imports correctly, we can run the analysis graphing utility
@@ -73,7 +95,7 @@ def analyze_program(*args):
                    'Check that you have numPy installed properly; ' \
                    'see Mimic installation instructions for more details')
 
-    limit_data = mimic_utils.get_all_limits(robot_name)
+    limit_data = _get_all_limits(robot_name, program_settings[3])
     analysis.run(robot_name, command_dicts, limit_data)
 
     # If we're sampling keyframes only, we assume it's for a post-processor
@@ -106,12 +128,13 @@ def save_program(*args):
     # Create progress window and save program
     _initialize_export_progress_window('Saving')
     try:
-        command_dicts = _get_command_dicts(*program_settings)
+        command_dicts, limit_check = _get_analyzed_command_dicts(*program_settings)
     except mimic_utils.MimicError:
         cmds.headsUpMessage('Program save canceled.')
         return
 
-    violation_exception, violation_warning = _check_command_dicts(command_dicts, *program_settings)
+    violation_exception, violation_warning = _check_command_dicts(command_dicts, *program_settings,
+                                                                  limit_check=limit_check)
 
     # If we're sampling keyframes only, we assume it's for a post-processor
     # that's not time-dependent, and, therefore, we shouldn't raise exceptions
@@ -140,8 +163,11 @@ def save_program(*args):
     robot_name = program_settings[0]
     robot = cmds.ls(robot_name)[0]
 
+    if command_dicts and postproc.AXES in command_dicts[-1]:
+        _previous_program_end_axes[robot_name] = list(command_dicts[-1][postproc.AXES])
+
     if mimic_utils.axes_coupled(robot):
-        command_dicts = _couple_axes(command_dicts)
+        command_dicts = mimic_export.couple_axes(command_dicts)
 
     # Continue to save program:
     _process_program(command_dicts, *program_settings)
@@ -170,27 +196,14 @@ def _process_program(command_dicts, robot, animation_settings, postproc_settings
     :return:
     """
     # Get the selected post processor
-    processor_type = postproc_settings['Processor Type']
-    processor = postproc_setup.POST_PROCESSORS[processor_type]()
+    processor = mimic_export.get_processor(postproc_settings)
 
-    # Apply processor-specific formatting to commands
-    commands = processor.format_commands(command_dicts)
-
-    # Make sure we're using the right directory
-    output_directory = postproc_settings['Output Directory']
-    processor.set_program_directory(output_directory)
-
-    # Process the raw_commands into relevant robot control code
-    template_filename = postproc_settings['Template Filename']
-    program = processor.process(commands, user_options, template_filename)
+    # Process the commands into relevant robot control code
+    processor, program = mimic_export.format_program(command_dicts, processor,
+                                                     postproc_settings, user_options)
 
     # write the processed animation as robot code to a file
-    overwrite_option = postproc_settings['Overwrite Option']
-    output_filename = postproc_settings['Output Filename']
-    output_path = processor.write(
-        program,
-        output_filename=output_filename,
-        overwrite=overwrite_option)
+    mimic_export.write_program(processor, program, postproc_settings)
 
     # Show us what we did!
     _show_program_in_output_window(robot, processor, program)
@@ -287,9 +300,14 @@ def _get_settings_for_postproc(robot):
     :return program_settings: dictionary
     """
     # Get all important settings
-    using_time_interval = cmds.radioCollection('sample_rate_radio_collection', query=True, select=True) == 'rb_timeInterval'
-    using_keyframes_only = not using_time_interval  # TODO: Clever, but not expandable
+    sample_mode = cmds.radioCollection('sample_rate_radio_collection', query=True, select=True)
+    # Adaptive sampling samples at varying time intervals
+    using_adaptive_sampling = sample_mode == 'rb_adaptive'
+    using_time_interval = sample_mode in ['rb_timeInterval', 'rb_adaptive']
+    using_keyframes_only = not using_time_interval
     time_interval_value = cmds.floatField('f_timeBetweenSamples', query=True, value=True)
+    adaptive_axis_tolerance = cmds.floatField('f_adaptiveAxisTolerance', query=True, value=True)
+    adaptive_position_tolerance = cmds.floatField('f_adaptivePositionTolerance', query=True, value=True)
     time_interval_units = 'seconds' \
         if cmds.radioButtonGrp('time_unit_radio_group', query=True, sl=True) == 1 \
         else 'frames'
@@ -300,6 +318,11 @@ def _get_settings_for_postproc(robot):
     template_filename = cmds.textField('t_templateFileName', text=True, query=True)
     overwrite_option = cmds.checkBox('cb_overwriteFile', value=True, query=True)
     preview_in_viewport_option = cmds.checkBox('cb_previewInViewport', value=True, query=True)
+    fast_export_option = cmds.checkBox('cb_fastExport', value=True, query=True)
+    parallel_workers = cmds.intField('i_parallelWorkers', query=True, value=True)
+    incremental_export_option = cmds.checkBox('cb_incrementalExport', value=True, query=True)
+    solution_home_weight = cmds.floatField('f_solutionHomeWeight', query=True, value=True)
+    solution_previous_weight = cmds.floatField('f_solutionPreviousWeight', query=True, value=True)
 
     # Check for warnings
     if using_time_interval:
@@ -337,57 +360,151 @@ def _get_settings_for_postproc(robot):
         'Using Keyframes Only': using_keyframes_only,
         'Time Interval Value': time_interval_value,
         'Time Interval Units': time_interval_units,
+        'Using Adaptive Sampling': using_adaptive_sampling,
+        'Adaptive Axis Tolerance': adaptive_axis_tolerance,
+        'Adaptive Position Tolerance': adaptive_position_tolerance,
         'Ignore Warnings': ignore_warnings,
         'Processor Type': processor_type,
         'Output Directory': output_directory,
         'Output Filename': output_filename,
         'Template Filename': template_filename,
         'Overwrite Option': overwrite_option,
-        'Preview in Viewport': preview_in_viewport_option
+        'Preview in Viewport': preview_in_viewport_option,
+        'Fast Export': fast_export_option,
+        'Parallel Workers': parallel_workers,
+        'Incremental Export': incremental_export_option,
+        'Solution Home Weight': solution_home_weight,
+        'Solution Previous Weight': solution_previous_weight
     }
     return postproc_settings
 
 
-def _get_command_dicts(robot, animation_settings, postproc_settings, user_options):
+def clear_program_cache(*args):
+    """
+    Drop cached samples and analyses, so that the next Analyze or Save
+    samples and checks the whole program again.
+    :return:
+    """
+    mimic_cache.invalidate()
+    cmds.headsUpMessage('Mimic program cache cleared')
+
+
+def _get_analyzed_command_dicts(robot, animation_settings, postproc_settings, user_options):
+    """
+    Get robot commands from animation and options, and check them against
+    the robot's limits. Reuses the last analysis of the robot if it was made
+    with the same settings and the animation hasn't changed since, so that
+    saving right after analyzing doesn't sample the program again.
+    :param robot: Name of the robot
+    :param animation_settings: User-defined animation settings.
+    :param postproc_settings: User-defined program settings.
+    :param user_options: User-defined postproc options.
+    :return: Tuple of (command dicts, mimic_export.LimitCheck)
+    """
+    limits = _get_all_limits(robot, user_options)
+    analysis_key = mimic_cache.get_analysis_key(robot, animation_settings, postproc_settings,
+                                                user_options, limits,
+                                                _previous_program_end_axes.get(robot))
+    fingerprint = mimic_cache.get_animation_fingerprint(robot, user_options,
+                                                        [animation_settings['Start Frame'],
+                                                         animation_settings['End Frame']])
+
+    analysis_cache = mimic_cache.get_analysis_cache()
+    program_analysis = analysis_cache.get(analysis_key, fingerprint)
+    if program_analysis is not None:
+        _print_reused_analysis(len(program_analysis.command_dicts))
+        return program_analysis.command_dicts, program_analysis.limit_check
+
+    command_dicts = _get_command_dicts(robot, animation_settings, postproc_settings, user_options)
+    limit_check = mimic_export.check_command_dicts(command_dicts, limits, user_options)
+    analysis_cache.put(analysis_key, fingerprint, command_dicts, limit_check)
+    return command_dicts, limit_check
+
+
+def _get_command_dicts(robot, animation_settings, postproc_settings, user_options,
+                       worker_backend=None):
     """
     Get robot commands from animation and options.
     :param robot: Name of the robot
     :param animation_settings: User-defined animation settings.
     :param animation_settings: User-defined program settings.
     :param user_options: User-defined postproc options.
+    :param worker_backend: Optional mimic_parallel worker backend used to
+        sample chunks of frames in parallel
+    :return:
+    """
+    # Get commands from sampled frames
+    frames = _get_frames(robot, animation_settings, postproc_settings)
+
+    # Long programs sampled at a sample rate can be split into chunks that
+    # are sampled in parallel mayapy processes
+    num_workers = postproc_settings.get('Parallel Workers', 1)
+    if worker_backend is None and postproc_settings['Using Time Interval'] and num_workers > 1:
+        worker_backend = mimic_parallel.MayapyWorkerBackend(mimic_parallel.get_scene_path(),
+                                                            num_workers)
+
+    def sample_frames(frames_to_sample):
+        if worker_backend is not None:
+            job = mimic_parallel.SamplingJob(robot, animation_settings, postproc_settings, user_options)
+            return mimic_parallel.sample_frames_in_parallel(job, frames_to_sample, worker_backend)
+        return _sample_frames_get_command_dicts(robot, frames_to_sample, animation_settings,
+                                                user_options, postproc_settings)
+
+    # Incremental export only re-samples frames whose driving animation
+    # curves changed since the last export
+    if postproc_settings.get('Incremental Export', False):
+        sample_cache = mimic_cache.get_sample_cache()
+        command_dicts = sample_cache.sample(robot, frames, animation_settings,
+                                            user_options, sample_frames)
+        _print_incremental_export(sample_cache.num_sampled, len(frames))
+    else:
+        command_dicts = sample_frames(frames)
+
+    # Rotations are reconciled after chunks are merged, so that accumulated
+    # rotations carry across chunk seams
+    if postproc_settings['Using Time Interval']:
+        # Check commands for axis flips and reconcile them if necessary
+        # Only reconcile if we're using axes. Exclude poses
+        if postproc.AXES in command_dicts[0]:
+
+            command_dicts = _reconcile_command_rotations(robot, command_dicts)
+            command_dicts = _bound_accumulated_rotations(robot, command_dicts, postproc_settings)
+
+
+    return command_dicts
+
+
+def _get_frames(robot, animation_settings, postproc_settings):
+    """
+    Get the frames to sample according to the sample mode.
+    :param robot: Name of the robot
+    :param animation_settings: User-defined animation settings.
+    :param postproc_settings: User-defined program settings.
     :return:
     """
-    
     # Determine sample mode
     using_sample_rate = postproc_settings['Using Time Interval']
     using_keyframes_only = postproc_settings['Using Keyframes Only']
 
     # Get frames to sample
     frames = []
-    if using_sample_rate:
+    if postproc_settings.get('Using Adaptive Sampling', False):
+        report = _get_frames_using_adaptive_sampling(robot, animation_settings, postproc_settings)
+        frames = report.frames
+        if MAYA_IS_RUNNING and cmds.scrollField(OUTPUT_WINDOW_NAME, exists=True):
+            _print_adaptive_sampling_report(report, animation_settings, postproc_settings)
+    elif using_sample_rate:
         frames = _get_frames_using_sample_rate(animation_settings, postproc_settings)
     elif using_keyframes_only:
         frames = _get_frames_using_keyframes_only(robot, animation_settings)
     else:  # add other sampling modes here
         pass
 
-    # Get commands from sampled frames
-    command_dicts = _sample_frames_get_command_dicts(robot, frames, animation_settings,
-                                                     user_options, postproc_settings)
-    
-    if using_sample_rate:
-        # Check commands for axis flips and reconcile them if necessary
-        # Only reconcile if we're using axes. Exclude poses
-        if postproc.AXES in command_dicts[0]:
-
-            command_dicts = _reconcile_command_rotations(robot, command_dicts)
-            command_dicts = _bound_accumulated_rotations(robot, command_dicts)
-
-
-    return command_dicts
+    return frames
 
 
-def _check_command_dicts(command_dicts, robot, animation_settings, postproc_settings, user_options):
+def _check_command_dicts(command_dicts, robot, animation_settings, postproc_settings, user_options,
+                         limit_check=None):
     """
     Check command dictionary for warnings.
     :param command_dicts: A list of list of robot axes
@@ -395,71 +512,24 @@ def _check_command_dicts(command_dicts, robot, animation_settings, postproc_sett
     :param animation_settings: User-defined animation settings.
     :param postproc_settings: User-defined program settings.
     :param user_options: User-defined postproc options.
+    :param limit_check: LimitCheck of command_dicts, if already checked
     :return: True if warning, False otherwise
     """
     # Check to see if the user has elected to ignore warnings
     ignore_warnings = postproc_settings['Ignore Warnings']
-    warning = ''  # Temporary holder
-
-    # declare and init to prevent reference before assignement
-    position_violations = False
-    velocity_violations = False
-    acceleration_violations = False
-    jerk_violations = False
 
     # Check if limits have been exceeded (i.e. velocity, acceleration)
-    if user_options.Include_axes and not user_options.Ignore_motion:
-        # TODO: Add UI options to select which violations, max/min/avg user wants to check
-
-        # Check position limits
-        position_limits = mimic_utils.get_axis_limits(robot)
-        if position_limits['Axis 1']['Min Limit'] is None:
-            position_warning = 'Unable to check position limits. Robot rig does not contain position data.\n'
-            cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=position_warning, edit=True)
-        position_violations, position_stats = _check_command_dicts_limits(command_dicts, limits=position_limits, get_min=True, get_max=True, get_average=True)
-
-
-        # Check velocity limits
-        velocity_limits = mimic_utils.get_velocity_limits(robot)
-        velocity_dicts = analysis_utils._generate_derivative_dicts(command_dicts, 1)
-        if velocity_limits['Axis 1']['Min Limit'] is None:
-            velocity_warning = 'Unable to check velocity limits. Robot rig does not contain velocity data.\n'
-            cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=velocity_warning, edit=True)
-        velocity_violations, velocity_stats = _check_command_dicts_limits(velocity_dicts, limits=velocity_limits, get_min=True, get_max=True, get_average=True)
-
-        # Check acceleration limits
-        acceleration_limits = mimic_utils.get_acceleration_limits(robot)
-        acceleration_dicts = analysis_utils._generate_derivative_dicts(velocity_dicts, 2)
-        if acceleration_limits['Axis 1']['Min Limit'] is None:
-            acceleration_warning = 'Unable to check acceleration limits. Robot rig does not contain acceleration data.\n'
-            cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=acceleration_warning, edit=True)
-        acceleration_violations, acceleration_stats = _check_command_dicts_limits(acceleration_dicts, limits=acceleration_limits, get_min=True, get_max=True, get_average=True)
-
-        # Check jerk limits
-        jerk_limits = mimic_utils.get_jerk_limits(robot)
-        jerk_dicts = analysis_utils._generate_derivative_dicts(acceleration_dicts, 3)
-        if jerk_limits['Axis 1']['Min Limit'] is None:
-            jerk_warning = 'Unable to check jerk limits. Robot rig does not contain jerk data.\n'
-            cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=jerk_warning, edit=True)
-        jerk_violations, jerk_stats = _check_command_dicts_limits(jerk_dicts, limits=jerk_limits, get_min=True, get_max=True, get_average=True)
-
-        # Format and print axis statistics
-        _print_axis_stats(position_stats, "Position")
-        _print_axis_stats(velocity_stats, "Velocity")
-        _print_axis_stats(acceleration_stats, "Acceleration")
-        _print_axis_stats(jerk_stats, "Jerk")
-
-
-    if user_options.Include_external_axes and not user_options.Ignore_motion:
-        # TODO: Implement velocity check for external axes
-        # warning = _check_velocity_of_external_axes(robot, command_dicts, animation_settings['Framerate'])
-        # if warning != '':
-        #     # Print this one always
-        #     warning += '\n'
-        #     cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=warning, edit=True)
-        #     if not ignore_warnings:
-        #         raise mimic_utils.MimicError(warning)
-        pass
+    # TODO: Add UI options to select which violations, max/min/avg user wants to check
+    if limit_check is None:
+        limits = _get_all_limits(robot, user_options)
+        limit_check = mimic_export.check_command_dicts(command_dicts, limits, user_options)
+
+    for warning in limit_check.warnings:
+        cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=warning, edit=True)
+
+    # Format and print axis statistics
+    for limit_type, axis_stats in limit_check.stats.items():
+        _print_axis_stats(axis_stats, mimic_export.LIMIT_NAMES[limit_type])
 
     if user_options.Include_pose and not user_options.Ignore_motion:
         # TODO: Implement velocity check for poses
@@ -476,17 +546,11 @@ def _check_command_dicts(command_dicts, robot, animation_settings, postproc_sett
     # Format and print warnings
     violation_exception = False
     violation_warning = False
-    if position_violations or velocity_violations or acceleration_violations or jerk_violations:
+    if limit_check.violations:
         # Print this one always
         cmds.headsUpMessage('WARNINGS: See Mimic output window for details')
-        if position_violations:
-            _print_violations(position_violations, position_limits, "Position")
-        if velocity_violations:
-            _print_violations(velocity_violations, velocity_limits, "Velocity")    
-        if acceleration_violations:
-            _print_violations(acceleration_violations, acceleration_limits, "Acceleration")
-        if jerk_violations:
-            _print_violations(jerk_violations, jerk_limits, "Jerk")
+        for limit_type, violation_runs in limit_check.violations.items():
+            _print_violations(violation_runs, mimic_export.LIMIT_NAMES[limit_type])
         if not ignore_warnings:
             violation_exception = True
         violation_warning = True
@@ -499,178 +563,48 @@ def _check_command_dicts(command_dicts, robot, animation_settings, postproc_sett
     return violation_exception, violation_warning 
 
 
-def _print_violations(violation_dicts, limits, limit_type):
+def _get_all_limits(robot, user_options):
+    """
+    Get the limits of a robot's axes and, if they are included in the
+    program, of its external axes.
+    :param robot: Name of the robot
+    :param user_options: User-defined postproc options.
+    :return: dict containing all limit data
+    """
+    if user_options.Include_external_axes:
+        return mimic_external_axes.get_all_limits(robot)
+    return mimic_utils.get_all_limits(robot)
+
+
+def _print_violations(violation_runs, limit_type):
     """
     Format and print limit violations.
-    :param violation_dicts: A list of dicts of axis violations
-    :param limits: A list of robot robot axes limits
+    :param violation_runs: A dict of {axis_name: list of ViolationRun tuples}
     :param limit_type: Name string of the limit type
     :return:
     """
-    warning = ''
-    warning_template = '   {0:>{time_padding}}{1:>{frame_padding}}{2:>{limit_padding}}{3:>{val_padding}}\n'
-    padding = {'val_padding' : 13, 'limit_padding' : 10, 'time_padding' : 10, 'frame_padding' : 10}
-    
-    for axis_name in sorted(violation_dicts):
-        warning += axis_name + " {} Violations:\n".format(limit_type)
-        axis_num = int(axis_name.split(' ')[-1]) - 1  # This is super hacky... should fix.
-        warning += warning_template.format('Time', 'Frame', 'Limit', 'Actual', **padding)
-        for violation in violation_dicts[axis_name]:
-            if limits[axis_name]['Max Limit']:
-                axis_limit = general_utils.num_to_str(limits[axis_name]['Max Limit'], precision=3)
-            else:
-                return 
-
-            warning += warning_template.format(
-                general_utils.num_to_str(violation[postproc.TIME_INDEX], precision=3),
-                general_utils.num_to_str(violation['Frame'], precision=3),
-                axis_limit,
-                general_utils.num_to_str(violation[postproc.AXES][axis_num], precision=3),
-                **padding)
-
+    warning = mimic_export.format_violations(violation_runs, limit_type)
     cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=warning, edit=True)
 
 
 def _print_axis_stats(axis_stats, limit_type):
     """
     Format and print axis statistics.
-    :param axis_stats: A dict of axis statistics
+    :param axis_stats: AxisStats tuple
     :param limit_type: Name string of the limit type
     :return:
     """
-    # TODO: This function is a mess. Should definitely be cleaned up,
-    # but since this is all getting graphed anyway... 
-    # TODO: stop hardcoding num_axes
-    num_axes = 6
-    axis_template = '>>> {0:>{axis_padding}} '
-    axis_padding = {'axis_padding' : 2}
-
-    res = [None] * (num_axes + 1)
-
-    # Header        
-    res[0] = axis_template.format('A', **axis_padding)
-    for axis_index in range(num_axes):
-        res[axis_index + 1] = axis_template.format(axis_index + 1, **axis_padding)
-
-    # Min
-    min_max_template = '{0:>{time_padding}}{1:>{frame_padding}}{2:>{val_padding}}   |'
-    min_max_padding = {'val_padding' : 13, 'time_padding' : 10, 'frame_padding' : 10}
-    if axis_stats['min']:
-        res[0] += min_max_template.format('Time', 'Frame', 'Min', **min_max_padding)
-        for axis_index, command in enumerate(axis_stats['min']):
-            res[axis_index+1] += min_max_template.format(
-                general_utils.num_to_str(command[postproc.TIME_INDEX], precision=3),
-                general_utils.num_to_str(command['Frame'], precision=3),
-                general_utils.num_to_str(command[postproc.AXES][axis_index], precision=3),
-                **min_max_padding)
-
-    # Max
-    if axis_stats['max']:
-        res[0] += min_max_template.format('Time', 'Frame', 'Max', **min_max_padding)
-        for axis_index, command in enumerate(axis_stats['max']):
-            res[axis_index+1] += min_max_template.format(
-                general_utils.num_to_str(command[postproc.TIME_INDEX], precision=3),
-                general_utils.num_to_str(command['Frame'], precision=3),
-                general_utils.num_to_str(command[postproc.AXES][axis_index], precision=3),
-                **min_max_padding)
-
-    # Avg
-    avg_template = '{0:>{avg_padding}}'
-    avg_padding = {'avg_padding' : 10}
-    if axis_stats['avg']:
-        res[0] += avg_template.format('Avg', **avg_padding)
-        for axis_index, axis_avg in enumerate(axis_stats['avg']):
-            res[axis_index+1] += avg_template.format(
-                general_utils.num_to_str(axis_avg, precision=3), **avg_padding)
-
-    # Formatting
-    stats_str = '{} Stats:\n'.format(limit_type) + '\n'.join(res) + '\n'
+    stats_str = mimic_export.format_axis_stats(axis_stats, limit_type)
     cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=stats_str, edit=True)
 
 
-def _check_command_dicts_limits(command_dicts, limits=None, get_min=False, get_max=False, get_average=False):
-    """
-    Check a command dicts for limit errors. Return a dict of commands for all violations.
-    :param command_dicts: A list of list of robot axes
-    :param limits: A list of robot robot axes limits
-    :param get_min: Record min axis values 
-    :param get_max: Record max axis values
-    :param get_avg: Record avg axis values
-    :return:
-    """
-    # Seed initial values
-    # TODO: Stop hardcoding num_axes
-    num_axes = 6
-    violations = {}
-    min_vals = [command_dicts[0] for _ in range(num_axes)]
-    max_vals = [command_dicts[0] for _ in range(num_axes)]
-    running_totals = [0 for _ in range(num_axes)]
-
-    for current_command in command_dicts:
-        current_axes = current_command[postproc.AXES]
-        for axis_index, current_axis in enumerate(current_axes):
-            axis_number = axis_index + 1  # Axis numbers are 1-indexed
-            axis_name = 'Axis {}'.format(axis_number)
-
-            # Check limits
-            if limits:
-                if limits[axis_name]['Max Limit']:
-                    if current_axis > limits[axis_name]['Max Limit']:
-                        violations.setdefault(axis_name,[]).append(current_command)
-                    elif current_axis < limits[axis_name]['Min Limit']:
-                        violations.setdefault(axis_name,[]).append(current_command)
-
-            # Min
-            if get_min:
-                if current_axis < min_vals[axis_index][postproc.AXES][axis_index]:
-                    # TODO: this only records the first time a min val has been reached.
-                    # It doesn't account for multiple frames with the same min val
-                    min_vals[axis_index] = current_command
-
-            # Max
-            if get_max:
-                if current_axis > max_vals[axis_index][postproc.AXES][axis_index]:
-                    # TODO: this only records the first time a max val has been reached.
-                    # It doesn't account for multiple frames with the same max val
-                    max_vals[axis_index] = current_command
-
-            # Average
-            if get_average:
-                running_totals[axis_index] += current_axis
-
-    # TODO: This data structure should probably be better defined.
-    stats = {'min': None, 'max' : None, 'avg': None}
-    if get_min:
-        stats['min'] = min_vals
-    if get_max:
-        stats['max'] = max_vals
-    if get_average:
-        stats['avg'] = [axis_total / len(command_dicts) for axis_total in running_totals]
-
-    return violations, stats
-
-
 def _check_robot_postproc_compatibility(robot, processor):
     """
     Verify the compatibility of the selected robot and the processor.
     :return:
     """
-    warning = ''
     robot_type = mimic_utils.get_robot_type(robot)
-    processor_type = processor.type_robot
-
-    
-    # Always return without a warning if the processor is of type "GENERAL"
-    if processor_type == 'GENERAL':
-        return warning
-    
-    if robot_type != processor_type:
-        warning = 'WARNING!\n' \
-                  'The type of robot ({}) \n' \
-                  'and type of processor ({}) \n' \
-                  'selected are incompatible!\n' \
-            .format(robot_type, processor_type)
-    return warning
+    return mimic_export.get_postproc_compatibility_warning(robot_type, processor)
 
 
 def _reconcile_command_rotations(robot_name, command_dicts):
@@ -681,226 +615,60 @@ def _reconcile_command_rotations(robot_name, command_dicts):
     rotates beyond +/- 180 degrees to avoid discontinuities 
 
     :param robot_name:
-    :param animation_settings:
     :param command_dicts:
     :return:
     """
-    # Get axes, if they exist
-    command_axes = []
-    for command_dict in command_dicts:
-        axes = command_dict[postproc.AXES] if postproc.AXES in command_dict else None
-        command_axes.append(list(axes))
-
     reconcile_axes = mimic_utils.get_reconcile_axes(robot_name)
-
-    # Make sure the user has selected use of axes
-    if not all(x is None for x in command_axes):
-        # Get indices for command and axis
-        for command_index in range(len(command_dicts)):
-            for axis_index in range(6):
-                # Get the initial value
-                value = command_axes[command_index][axis_index]
-                reconcile_axis = reconcile_axes[axis_index]
-                # Operate on the value depending on conditional
-                if reconcile_axis:
-                    if command_index == 0: 
-                        continue
-                    else:  # Perform the check
-                        previous_value = command_axes[command_index - 1][axis_index]
-                        value = mimic_utils.accumulate_rotation(
-                                                value,
-                                                previous_value)
-                    # Replace original value with new value
-                    command_axes[command_index][axis_index] = value
-                else:  # Not a problem axis
-                    pass
-            # Replace the original commands with the new commands
-            reconciled_axes = postproc.Axes(*command_axes[command_index])
-            command_dicts[command_index][postproc.AXES] = reconciled_axes
-
-    return command_dicts
+    return mimic_export.reconcile_command_rotations(command_dicts, reconcile_axes)
 
 
-def _bound_accumulated_rotations(robot_name, command_dicts):
+def _bound_accumulated_rotations(robot_name, command_dicts, postproc_settings=None):
     """
     Checks axes whose rotations have been accumulated to ensure they've not 
-    exceeded the stated limits. If they have, this function attempts to slide
-    the commands by +/- 360 degrees. If the limits are still exceeded, this 
-    function returns the commands that exceed the limits by the least amount
+    exceeded the stated limits. If they have, this function slides the
+    commands by the multiple of 360 degrees that brings them within the
+    limits; if several do, the cheapest solution is picked, as scored by
+    mimic_export.SolutionCost with the weights of the program settings.
     :param robot_name:
-    :param animation_settings:
     :param command_dicts:
+    :param postproc_settings: User-defined program settings.
     :return:
     """
-    # TODO: Do this check using userOptions instead...
-    # Get axes, if they exist
-    command_axes = []
-    for command_dict in command_dicts:
-        axes = command_dict[postproc.AXES] if postproc.AXES in command_dict else None
-        command_axes.append(list(axes))
-
     reconcile_axes = mimic_utils.get_reconcile_axes(robot_name)
     rotation_limits = mimic_utils.get_all_limits(robot_name)['Position']
 
-    # Make sure the user has selected use of axes
-    if not all(x is None for x in command_axes):
-        for i, reconcile_axis in enumerate(reconcile_axes):
-            if reconcile_axis:
-                valid_solutions = []
-
-                axis_number = i + 1  # Axis numbers are 1-indexed
-                axis_name = 'Axis {}'.format(axis_number)
-
-                # Get the axis limits
-                limit_min = rotation_limits[axis_name]['Min Limit']
-                limit_max = rotation_limits[axis_name]['Max Limit']
-
-                # Create a list of commands for the axis to be checked
-                axis_vals_init = [axis[i] for axis in command_axes]
-
-                axis_min = min(axis_vals_init)
-                axis_max = max(axis_vals_init)
-
-                '''
-                print "#######################################################"
-                print "Initial Axis {} vals: ".format(i+1), axis_vals_init
-                print "Axis Min Limit: ", limit_min
-                print "Axis Max Limit: ", limit_max                
-                print "Axis Min: ", axis_min
-                print "Axis Max: ", axis_max
-                '''
-
-                # If both the max and min axis values exceed their respective
-                # limits, then there's nothing we can do about it, so we don't
-                # modify the commands
-                if axis_min < limit_min and axis_max > limit_max:
-                    # print '## Both limits exceeded, but no shift'
-                    continue
-
-                # If no limits are violated, add the axes to the list of valid solutions
-                if axis_min >= limit_min and axis_max <= limit_max:
-                    valid_solutions.append(axis_vals_init)              
-
-                # Get the shifted axes and append them to the valid_solutions if they're valide (i.e. not 'None')
-                axis_vals_shift = _shift_accumulated_axes(axis_vals_init, limit_max, limit_min)
-
-                if axis_vals_shift:
-                    valid_solutions.append(axis_vals_shift)
-
-                # If we have no valid solitions, continue with the initial solition
-                if len(valid_solutions) == 0:
-                    # print 'No valid solutions, returning initial solutions'
-                    sol = axis_vals_init
-                # If we only have one valid solution, we can return that solution
-                elif len(valid_solutions) == 1:
-                    # print 'Only one valid solution'
-                    sol = valid_solutions[0]
-                # If we have two valid solutions, prompt the user to pick which one they want
-                # if they have the option checked on the program UI, otherwise, return the 
-                # first solution
-                else:
-                    # print 'Two valid solutions -> user choice'
-                    prompt_opt = cmds.checkBox('cb_promptOnRedundantSolutions', value=True, query=True)
-
-                    # If the user option for this feature is selected, prompt the user
-                    if prompt_opt:
-                        user_selection = _get_bounded_solution_user_input(valid_solutions, axis_number)
-                        sol = valid_solutions[user_selection]
-                    # Otherwise, continue with the initial solution
-                    else:
-                        sol = axis_vals_init
-                # Drop the final solution back into the command_dict
-                for command_index in range(len(command_dicts)):
-                    command_axes[command_index][i] = sol[command_index]       
-
-                    reconciled_axes = postproc.Axes(*command_axes[command_index])
-                    command_dicts[command_index][postproc.AXES] = reconciled_axes
-                
-    return command_dicts
-
-def _shift_accumulated_axes(initial_vals, limit_max, limit_min):
-    axis_min = min(initial_vals)
-    axis_max = max(initial_vals)
-
-    axis_vals_shift = []
-
-    ## Try bounding the values between the limits by shifting
-    ## the commands by +/- 360 degrees
-
-    coeff = -1 if (limit_max - axis_max) > -(limit_min - axis_min) else 1
-
-    # Check if the adjusted values would still violate the limits
-    # and if so, return an empty list
-    axis_min_shift = axis_min - (coeff * 360)
-    axis_max_shift = axis_max - (coeff * 360)
-
-    # print "Axis Min Shifted: ", axis_min_shift
-    # print "Axis Max Shifted: ", axis_max_shift
+    # Only prompt the user to pick a solution if they have the option
+    # checked on the program UI
+    if cmds.checkBox('cb_promptOnRedundantSolutions', value=True, query=True):
+        choose_solution = _get_bounded_solution_user_input
+    else:
+        postproc_settings = postproc_settings or {}
+        choose_solution = mimic_export.SolutionCost(
+            previous_axes=_previous_program_end_axes.get(robot_name),
+            home_weight=postproc_settings.get('Solution Home Weight', 1.0),
+            previous_weight=postproc_settings.get('Solution Previous Weight', 1.0))
 
-    if axis_min_shift < limit_min or axis_max_shift > limit_max:
-        return
-
-    # If we've made it this far, it means the shifted values won't violate the 
-    # limits, so get the shifted values    
-    axis_vals_shift = [val - (coeff * 360) for val in initial_vals]
-    
-    return axis_vals_shift
+    return mimic_export.bound_accumulated_rotations(command_dicts, reconcile_axes,
+                                                    rotation_limits, choose_solution)
 
 
 def _get_bounded_solution_user_input(valid_solutions, axis_number):
-    # print valid_solutions
-    sol_0_init = valid_solutions[0][0]
-    sol_1_init = valid_solutions[1][0]
-
-    sol_0_str = str(int(round(sol_0_init)))
-    sol_1_str = str(int(round(sol_1_init)))
+    solution_strs = [str(int(round(solution[0]))) for solution in valid_solutions]
 
     result = cmds.confirmDialog(
         title='Select Axis Solution',
         message='Axis {0} has multiple valid solutions.\n\nWould you like Axis {0} to start at:'.format(axis_number),
-        button=[sol_0_str, sol_1_str],
-        defaultButton=sol_0_str,
-        cancelButton=sol_0_str,
-        dismissString=sol_0_str)
+        button=solution_strs,
+        defaultButton=solution_strs[0],
+        cancelButton=solution_strs[0],
+        dismissString=solution_strs[0])
 
-    if result == sol_0_str:
-        return 0
-    elif result == sol_1_str:
-        return 1
+    if result in solution_strs:
+        return solution_strs.index(result)
     else:
         return 0
 
 
-def _couple_axes(command_dicts):
-    """
-    If axis 2 and 3 are coupled (as they are with FANUC, for example),
-    Modify A3 accordingly
-    """
-    # Get axes, if they exist
-    command_axes = []
-    for command_dict in command_dicts:
-        axes = command_dict[postproc.AXES] if postproc.AXES in command_dict else None
-        command_axes.append(list(axes))
-
-    # Make sure the user has selected use of axes
-    if not all(x is None for x in command_axes):
-        # Get indices for command and axis
-        for command_index in range(len(command_dicts)):
-            theta_2 = command_axes[command_index][1]
-            theta_3 = command_axes[command_index][2]
-
-            theta_3_coupled = theta_3 - theta_2
-
-            # Replace theta_3 in the command_axes list with the coupled value
-            command_axes[command_index][2] = theta_3_coupled
-
-            # Replace the original commands with the new commands
-            coupled_commands = postproc.Axes(*command_axes[command_index])
-            command_dicts[command_index][postproc.AXES] = coupled_commands
-
-    return command_dicts
-
-
 def _get_frames_using_sample_rate(animation_settings, postproc_settings):
     """
     Get frames from animation using a sample rate.
@@ -934,6 +702,39 @@ def _get_frames_using_sample_rate(animation_settings, postproc_settings):
     return frames
 
 
+def _get_frames_using_adaptive_sampling(robot, animation_settings, postproc_settings):
+    """
+    Get frames from animation by sampling coarsely at the sample rate, then
+    subdividing where linear interpolation between samples deviates from the
+    animation by more than the adaptive tolerances.
+    :param robot:
+    :param animation_settings:
+    :param postproc_settings:
+    :return: mimic_adaptive.AdaptiveSamplingReport tuple
+    """
+    start_frame = animation_settings['Start Frame']
+    end_frame = animation_settings['End Frame']
+    framerate = animation_settings['Framerate']
+
+    coarse_step = float(postproc_settings['Time Interval Value'])
+    if postproc_settings['Time Interval Units'] == 'seconds':
+        coarse_step *= framerate
+
+    # Only check the TCP position for robots whose pose can be sampled
+    position_tolerance = postproc_settings['Adaptive Position Tolerance']
+    robot_type = mimic_utils.get_robot_type(robot)
+    if robot_type not in mimic_sampling.POSE_CONVERSION_ROTATIONS or position_tolerance <= 0:
+        position_tolerance = None
+
+    sample_function = mimic_adaptive.get_sample_function(
+        robot, include_pose=position_tolerance is not None)
+    return mimic_adaptive.get_adaptive_frames(
+        start_frame, end_frame, coarse_step, sample_function,
+        postproc_settings['Adaptive Axis Tolerance'],
+        position_tolerance,
+        wrap_axes=mimic_utils.get_reconcile_axes(robot))
+
+
 def _get_frames_using_keyframes_only(robot, animation_settings):
     """
     Get frames from animation using a robot's keyframes only.
@@ -1003,13 +804,19 @@ def _get_frames_using_keyframes_only(robot, animation_settings):
     return frames
 
 
-def _sample_frames_get_command_dicts(robot_name, frames, animation_settings, user_options, postproc_settings):
+def _sample_frames_get_command_dicts(robot_name, frames, animation_settings, user_options, postproc_settings,
+                                     sampling_backend=None, show_progress=True):
     """
     Sample robot commands using a list of frames and user options.
     :param robot_name:
     :param frames:
     :param animation_settings:
     :param user_options:
+    :param sampling_backend: Optional mimic_sampling backend used to sample
+        axes, external axes, IOs and configuration
+    :param show_progress: Update the progress window (and preview the robot
+        in the viewport) while sampling; disable when exporting without the
+        Mimic UI
     :return:
     """
     # Initialize output array.
@@ -1017,15 +824,55 @@ def _sample_frames_get_command_dicts(robot_name, frames, animation_settings, use
     start_frame = animation_settings['Start Frame']
     end_frame = animation_settings['End Frame']
 
-    preview_in_viewport = postproc_settings['Preview in Viewport']
+    # Fast export pauses the viewport while sampling and only updates the
+    # progress window every PROGRESS_UPDATE_INTERVAL seconds
+    fast_export = postproc_settings.get('Fast Export', False)
+    preview_in_viewport = postproc_settings['Preview in Viewport'] and not fast_export
     export_progress = 0
+    sampling_start = time.perf_counter()
 
-    for frame in frames:
+    channels = mimic_sampling.get_program_channels(robot_name, user_options)
+    include_pose = user_options.Include_pose and not user_options.Ignore_motion
+    if include_pose:
+        pose_channels = mimic_sampling.get_pose_channels(robot_name)
 
-        if preview_in_viewport:
-            # Set the background to the current frame
-            cmds.currentTime(frame)
+    # Sample every attribute-driven channel, and the pose, a chunk of frames
+    # at a time so that progress is shown while the scene is evaluated
+    chunk_size = SAMPLING_CHUNK_SIZE if show_progress else max(len(frames), 1)
+    sampled_chunks = []
+    sampled_poses = [] if include_pose else None
 
+    viewport_paused = False
+    if show_progress and fast_export:
+        viewport_paused = _pause_viewport()
+    progress_updated = time.perf_counter()
+
+    try:
+        for chunk_start in range(0, len(frames), chunk_size):
+            chunk = frames[chunk_start:chunk_start + chunk_size]
+            sampled_chunks.append(mimic_sampling.sample_channels(channels, chunk, sampling_backend))
+            if include_pose:
+                sampled_poses.extend(mimic_sampling.sample_poses(pose_channels, chunk, sampling_backend).tolist())
+
+            if not show_progress:
+                continue
+            if preview_in_viewport:
+                # Show the robot at the last sampled frame
+                cmds.currentTime(chunk[-1])
+            if not fast_export or time.perf_counter() - progress_updated >= PROGRESS_UPDATE_INTERVAL:
+                export_progress = _update_export_progress_window(start_frame, end_frame, chunk[-1], export_progress)
+                progress_updated = time.perf_counter()
+    finally:
+        if viewport_paused:
+            _resume_viewport()
+
+    samples = mimic_sampling.concatenate_channels(sampled_chunks)
+    sampled_axes = _get_sampled_rows(samples.axes)
+    sampled_external_axes = _get_sampled_rows(samples.external_axes)
+    sampled_ios = _get_sampled_rows(samples.ios)
+    sampled_configurations = _get_sampled_rows(samples.configuration)
+
+    for frame_index, frame in enumerate(frames):
         # Create a dict of datatypes per frame
         command_dict = {}
         # Add this frame number/step/index to the dictionary
@@ -1036,21 +883,21 @@ def _sample_frames_get_command_dicts(robot_name, frames, animation_settings, use
         # Get motion parameters
         if not user_options.Ignore_motion:
             if user_options.Include_axes:
-                axes = _sample_frame_get_axes(robot_name, frame)
+                axes = sampled_axes[frame_index]
                 command_dict[postproc.AXES] = postproc.Axes(*axes)
             if user_options.Include_pose:
-                pose = _sample_frame_get_pose(robot_name, frame)
+                pose = sampled_poses[frame_index]
                 command_dict[postproc.POSE] = postproc.Pose(*pose)
             if user_options.Include_external_axes:
-                external_axes = _sample_frame_get_external_axes(robot_name, frame)
+                external_axes = _get_sampled_external_axes(sampled_external_axes, frame_index)
                 command_dict[postproc.EXTERNAL_AXES] = postproc.ExternalAxes(*external_axes)
             if user_options.Include_configuration:
-                configuration = _sample_frame_get_configuration(robot_name, frame)
+                configuration = [bool(c) for c in sampled_configurations[frame_index]]
                 command_dict[postproc.CONFIGURATION] = postproc.Configuration(*configuration)
         # Get IO parameters
         if not user_options.Ignore_IOs:
             if user_options.Include_digital_outputs:
-                digital_output = _sample_frame_get_outs(robot_name, frame, 'digital')
+                digital_output = _get_sampled_outs(channels.ios, sampled_ios, frame_index, 'digital')
                 command_dict[postproc.DIGITAL_OUTPUT] = digital_output
             if user_options.Include_digital_inputs:
                 # TODO: Implement digital inputs
@@ -1058,7 +905,7 @@ def _sample_frames_get_command_dicts(robot_name, frames, animation_settings, use
                 # command_dict[postproc.DIGITAL_INPUT'] = postproc.DigitalOutput(*digital_input)
                 pass
             if user_options.Include_analog_outputs:
-                analog_output = _sample_frame_get_outs(robot_name, frame, 'analog')
+                analog_output = _get_sampled_outs(channels.ios, sampled_ios, frame_index, 'analog')
                 command_dict[postproc.ANALOG_OUTPUT] = analog_output
             if user_options.Include_analog_inputs:
                 # TODO: Implement analog inputs
@@ -1066,228 +913,150 @@ def _sample_frames_get_command_dicts(robot_name, frames, animation_settings, use
                 # command_dict[postproc.ANALOG_INPUT] = postproc.DigitalOutput(*analog_input)
                 pass
         command_dicts.append(command_dict)
-        cmds.refresh()
-        export_progress = _update_export_progress_window(start_frame, end_frame, frame, export_progress)
+
     # Reset current frame (just in case)
     cmds.currentTime(frames[0])
 
+    if show_progress:
+        _print_sampling_rate(len(frames), time.perf_counter() - sampling_start, fast_export)
+
     return command_dicts
 
 
-def _sample_frame_get_axes(robot_name, frame):
+def _get_sampled_rows(samples):
     """
-    Get robot Axes from an animation frame.
-    :param robot_name: Name of the robot
-    :param frame: Frame to sample
+    Convert an array of bulk samples to a list of rows of Python floats.
+    :param samples: Array of shape (F, N), or None if not sampled
     :return:
     """
+    if samples is None:
+        return None
+    return samples.tolist()
 
-    axes = []
 
-    target_ctrl_path = mimic_utils.get_target_ctrl_path(robot_name)
-    for i in range(6):
-        axis_number = i + 1  # Axis numbers are 1-indexed
-        axis_path = target_ctrl_path + '.axis{}'.format(axis_number)
-        axis = cmds.getAttr(axis_path, time=frame)
-
-        axes.append(axis)
-        
-    return axes
+def _get_sampled_external_axes(sampled_external_axes, frame_index):
+    """
+    Get robot External Axes of a frame from bulk samples.
+    :param sampled_external_axes: Rows of sampled external axes, NaN where
+        unused, or None if the robot has no active external axes
+    :param frame_index: Index of the frame in the sampled frames
+    :return: Ordered list of Nones and/or positions
+    """
+    if sampled_external_axes is None:
+        return [None for _ in range(mimic_sampling.NUM_EXTERNAL_AXES)]
+    return [None if math.isnan(position) else position
+            for position in sampled_external_axes[frame_index]]
 
 
-def _sample_frame_get_pose(robot_name, frame):
+def _get_sampled_outs(io_channels, sampled_ios, frame_index, out_type='digital'):
     """
-    Get robot Pose from an animation frame.
-    :param robot_name: Name of the robot
-    :param frame: Frame to sample
-    :return:
+    Get robot Outs of a frame from bulk samples.
+    :param io_channels: List of mimic_sampling.IOChannel tuples
+    :param sampled_ios: Rows of sampled IO values, ordered as io_channels
+    :param frame_index: Index of the frame in the sampled frames
+    :param out_type: 'digital' or 'analog'
+    :return: List of outputs, ordered by IO number
     """
-    # Set the time
-    # TODO: Implement this in parent function
-    # Need to figure out how to query xform at specific frame (like with getAttr)
-    cmds.currentTime(frame)
-
-    # tool_name = get_tool_name(robot_name)
-    tool_name = mimic_utils.get_tool_ctrl_path(robot_name)
-    try:  # Try to grab the named tool
-        tool_object = cmds.ls(tool_name)[0]  # Try to get tool, may raise an exception
-    except IndexError:  # No tool attached, use flange
-        tool_name = mimic_utils.get_tcp_hdl_path(robot_name)
-
-    # Local Base Frame controller (circle control at base of the robot).
-    base_name = cmds.ls(mimic_utils.get_local_ctrl_path(robot_name))[0]
-
-    # Get name of the tcp and base
-    world_matrix = '.worldMatrix'
-    tcp_name_world_matrix = tool_name + world_matrix
-    base_name_world_matrix = base_name + world_matrix
-
-    # TRANSLATIONS
-
-    # Get translation with respect to Maya's world frame
-    tcp_translation = cmds.xform(tool_name, query=True, rp=True, ws=True)
-    base_translation = cmds.xform(base_name, query=True, rp=True, ws=True)
-
-    # ROTATIONS
-
-    # Get TCP rotation with respect to Maya's world frame
-    _tcp_matrix = cmds.getAttr(tcp_name_world_matrix, time=frame)
-    tcp_rotation = general_utils.matrix_get_rotations(_tcp_matrix)
-
-    # Get Base rotation with respect to Maya's world frame
-    _base_matrix = cmds.getAttr(base_name_world_matrix, time=frame)
-    base_rotation = general_utils.matrix_get_rotations(_base_matrix)
-
-    # TRANSFORMATIONS
-
-    # Compose 4x4 matrices using the rotation and translation from the above
-    tcp_matrix_4x4 = general_utils.matrix_compose_4x4(tcp_rotation, tcp_translation)
-    base_matrix_4x4 = general_utils.matrix_compose_4x4(base_rotation, base_translation)
-
-    # Invert the base matrix
-    base_matrix_4x4 = general_utils.matrix_get_inverse(base_matrix_4x4)
-
-    # Get pose itself
-    initial_pose_matrix = general_utils.matrix_multiply(base_matrix_4x4, tcp_matrix_4x4)
-
-    # CONVERSIONS
-
-    # Decompose the initial pose matrix
-    initial_translation = general_utils.matrix_get_translation(initial_pose_matrix)
-    initial_rotations = general_utils.matrix_get_rotations(initial_pose_matrix)
-
-    # Rearrange from Maya CS (mcs) to Robot CS (rcs)
-    indices = [2, 0, 1]
-    new_translation = [initial_translation[i] * 10 for i in indices]  # cm to mm
-    new_rotation = [[initial_rotations[i][j] for j in indices] for i in indices]
-
-    # Define rotation matrix and convert the rotations based robot type
-    # Based on the orientation of the coordinate frame of the mounting flange
-    # TODO: Integrate this with rigs, unclear and shouldn't be hardcoded
-    robot_type = mimic_utils.get_robot_type(robot_name)
-
-    if robot_type == 'ABB':
-        conversion_rotation = [
-            [0, 0, -1],
-            [0, 1, 0],
-            [1, 0, 0]
-        ]
-    elif robot_type == 'Universal Robots':
-        conversion_rotation = [
-            [0, -1, 0],
-            [0, 0, 1],
-            [1, 0, 0]
-        ]
-    # elif robot_type == 'KUKA':
-    #     conversion_rotation = [
-    #         [0, -1, 0],
-    #         [0, 0, 1],
-    #         [-1, 0, 0]
-    #     ]
-    else:
-        raise mimic_utils.MimicError('Robot type not supported for Pose movement')
+    io_dict = {}
+    for channel_index, channel in enumerate(io_channels):
+        if channel.io_type == out_type:
+            value = sampled_ios[frame_index][channel_index]
+            # Convert bool values to integers for digital outs
+            if out_type == 'digital':
+                io_dict[channel.io_number] = postproc.DigitalOutput(channel.postproc_id, int(value))
+            else:
+                io_dict[channel.io_number] = postproc.AnalogOutput(channel.postproc_id, value)
 
-    # Perform the conversion operation itself
-    converted_rotation = general_utils.matrix_multiply(conversion_rotation, new_rotation)
+    # Convert io_dict to ordered list
+    return [io_dict[io_number] for io_number in sorted(io_dict)]
 
-    # Compose pose
-    pose_matrix = general_utils.matrix_compose_4x4(converted_rotation, new_translation)
 
-    # Decompose pose as expected for output
-    pose = general_utils.matrix_decompose_4x4_completely(pose_matrix)
-    return pose
+def _pause_viewport():
+    """
+    Pause viewport refresh while sampling. cmds.ogs(pause=True) toggles the
+    pause state, so it's only toggled if the viewport isn't already paused.
+    :return: True if the viewport was paused here and needs to be resumed
+    """
+    if cmds.ogs(query=True, pause=True):
+        return False
+    cmds.ogs(pause=True)
+    return True
 
 
-def _sample_frame_get_external_axes(robot_name, frame):
+def _resume_viewport():
     """
-    Get robot External Axes from an animation frame.
-    :param robot_name: Name of the robot
-    :param frame: Frame to sample
-    :return:
+    Resume viewport refresh paused by _pause_viewport.
     """
-    # Set up keys
-    key_ignore = 'Ignore'
-    key_axis_number = 'Axis Number'
-    key_position = 'Position'
-    # Create an list of Nones for initial external axes
-    external_axes = [None for _ in range(16)]
-    # Get all external axes for this robot
-    external_axis_names = mimic_external_axes.get_external_axis_names(robot_name)
-    # Get info dict for each of those external axes
-    for external_axis_name in external_axis_names:
-        info = mimic_external_axes.get_external_axis_info_simple(robot_name, external_axis_name, frame)
-        # Get values from info dict
-        ignore = info[key_ignore]
-        if not ignore:
-            # Put it in the right place
-            axis_number = info[key_axis_number]
-            axis_index = axis_number - 1
-            position = info[key_position]
-            external_axes[axis_index] = position
-    # Return an ordered list of Nones and/or positions
-    return external_axes
-
-
-def _sample_frame_get_outs(robot_name, frame, out_type='digital'):
-    """
-    Get robot Digital Out from an animation frame.
-    :param robot_name: Name of the robot
-    :param frame: Frame to sample
+    if cmds.ogs(query=True, pause=True):
+        cmds.ogs(pause=True)
+
+
+def _print_sampling_rate(num_frames, elapsed_time, fast_export):
+    """
+    Print how fast frames were sampled, to compare sampling modes.
+    :param num_frames: Number of sampled frames
+    :param elapsed_time: Time spent sampling, in seconds
+    :param fast_export: True if sampled in fast export mode
     :return:
     """
-    # Set up keys
-    key_ignore = 'Ignore'
-    key_io_number = 'IO Number'
-    key_value = 'Value'
-    key_postproc_id = 'Postproc ID'
-    key_type = 'Type'
+    frames_per_sec = num_frames / elapsed_time if elapsed_time else float('inf')
+    mode = 'fast export' if fast_export else 'viewport refresh'
+    report = 'Sampled {} frames in {} s ({} frames/sec, {})\n\n'.format(
+        num_frames,
+        general_utils.num_to_str(elapsed_time, precision=3),
+        general_utils.num_to_str(frames_per_sec, precision=1),
+        mode)
+    cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=report, edit=True)
 
-    # Create a list of Nones for initial external axes
-    io_dict = {}
-    ios = []
-
-    # Get all external axes for this robot
-    io_names = mimic_io.get_io_names(robot_name)
-
-    # Get info dict for each of those IOs
-    for io_name in io_names:
-        info = mimic_io.get_io_info_simple(robot_name, io_name, frame)
-
-        # Get values from info dict
-        ignore = info[key_ignore]
-        if not ignore:
-            # Put it in the right place
-            io_number = info[key_io_number]
-            postproc_id = info[key_postproc_id]
-            value = info[key_value]
-            io_type = info[key_type]
-
-            if io_type == out_type:
-                # Convert bool values to integers for digital outs
-                if out_type == 'digital':
-                    value = int(value)
-                    io_dict[io_number] = postproc.DigitalOutput(postproc_id, value)
-                else:
-                    io_dict[io_number] = postproc.AnalogOutput(postproc_id, value)
 
-    # Convert io_dict to ordered list
-    io_sorted_numbers = sorted(io_dict)
-    for io_number in io_sorted_numbers:
-        ios.append(io_dict[io_number])
-        
-    # Return an ordered list of Nones and/or positions
-    return ios
+def _print_adaptive_sampling_report(report, animation_settings, postproc_settings):
+    """
+    Print how many frames adaptive sampling picked and how far linear
+    interpolation between them deviates from the animation.
+    :param report: mimic_adaptive.AdaptiveSamplingReport tuple
+    :param animation_settings: User-defined animation settings.
+    :param postproc_settings: User-defined program settings.
+    :return:
+    """
+    uniform_frames = _get_frames_using_sample_rate(
+        animation_settings, dict(postproc_settings,
+                                 **{'Time Interval Value': mimic_adaptive.DEFAULT_MIN_STEP,
+                                    'Time Interval Units': 'frames'}))
+    report_lines = ['Adaptive sampling: {} frames, instead of {} at every frame ({} probed)'.format(
+                        len(report.frames), len(uniform_frames), report.num_probed),
+                    '    Max axis interpolation error: {} deg (tolerance {})'.format(
+                        general_utils.num_to_str(report.max_axis_error, precision=3),
+                        postproc_settings['Adaptive Axis Tolerance'])]
+    if report.max_position_error is not None:
+        report_lines.append('    Max TCP position deviation: {} mm (tolerance {})'.format(
+            general_utils.num_to_str(report.max_position_error, precision=3),
+            postproc_settings['Adaptive Position Tolerance']))
+    if report.unresolved:
+        report_lines.append('    {} intervals exceed the tolerance at the minimum step'.format(
+            report.unresolved))
+    cmds.scrollField(OUTPUT_WINDOW_NAME, insertText='\n'.join(report_lines) + '\n\n', edit=True)
+
+
+def _print_reused_analysis(num_commands):
+    """
+    Print that the program was not sampled again.
+    :param num_commands: Number of commands of the reused program
+    :return:
+    """
+    report = 'Reused the last analysis of this program ({} commands); ' \
+             'animation and settings are unchanged\n\n'.format(num_commands)
+    cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=report, edit=True)
 
 
-def _sample_frame_get_configuration(robot_name, frame):
+def _print_incremental_export(num_sampled, num_frames):
     """
-    Get robot Configuration from an animation frame.
-    :param robot_name:
-    :param frame:
+    Print how many frames an incremental export had to re-sample.
+    :param num_sampled: Number of re-sampled frames
+    :param num_frames: Number of frames in the program
     :return:
     """
-    configuration = mimic_utils.get_robot_configuration(robot_name, frame)
-    return configuration
+    report = 'Incremental export: re-sampled {} of {} frames\n\n'.format(num_sampled, num_frames)
+    cmds.scrollField(OUTPUT_WINDOW_NAME, insertText=report, edit=True)
 
 
 def _initialize_export_progress_window(title):
@@ -0,0 +1,502 @@
+#!usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Bulk sampling of animated robot attributes. Samples the axes, external axes,
+IOs, configuration and pose of a robot for a full list of frames in one pass
+and returns NumPy arrays, instead of one getAttr call per attribute and frame.
+
+Sampling is delegated to a backend with two methods,
+sample(attribute_paths, frames) for numeric attributes and
+sample_matrices(attribute_paths, frames) for matrix attributes.
+MayaSamplingBackend evaluates plugs through OpenMaya at each frame's DG
+context, without changing the current time; FakeSamplingBackend evaluates
+plain Python values and functions so that sampling can be exercised without
+Maya.
+"""
+
+try:
+    import maya.cmds as cmds
+    from maya.api import OpenMaya
+
+    MAYA_IS_RUNNING = True
+except ImportError:  # Maya is not running
+    cmds = None
+    OpenMaya = None
+    MAYA_IS_RUNNING = False
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; bulk sampling is unavailable
+    np = None
+
+from collections import namedtuple
+
+import mimic_utils
+import mimic_external_axes
+import mimic_io
+
+NUM_EXTERNAL_AXES = 16
+NUM_CONFIGURATIONS = 3
+
+# Maya's coordinate system (Y up) to the robot's (Z up)
+MAYA_TO_ROBOT_AXES = [2, 0, 1]
+
+# Rotation from the orientation of the mounting flange in Mimic to the
+# robot's tool frame, per robot type
+# TODO: Integrate this with rigs, unclear and shouldn't be hardcoded
+POSE_CONVERSION_ROTATIONS = {
+    'ABB': [
+        [0, 0, -1],
+        [0, 1, 0],
+        [1, 0, 0]
+    ],
+    'Universal Robots': [
+        [0, -1, 0],
+        [0, 0, 1],
+        [1, 0, 0]
+    ],
+    # 'KUKA': [
+    #     [0, -1, 0],
+    #     [0, 0, 1],
+    #     [-1, 0, 0]
+    # ],
+}
+
+# An external axis to sample; scale converts the sampled value to program
+# units (e.g. 10 for translations, which Maya samples in centimeters)
+ExternalAxisChannel = namedtuple('ExternalAxisChannel', [
+                                 'axis_number',
+                                 'attribute_path',
+                                 'scale'
+                                 ])
+
+# An IO to sample
+IOChannel = namedtuple('IOChannel', [
+                       'io_number',
+                       'postproc_id',
+                       'io_type',
+                       'attribute_path'
+                       ])
+
+# Everything to sample for a robot; empty lists are skipped
+ProgramChannels = namedtuple('ProgramChannels', [
+                             'axes',  # list of attribute paths
+                             'external_axes',  # list of ExternalAxisChannel
+                             'ios',  # list of IOChannel
+                             'configuration'  # list of attribute paths
+                             ])
+
+# Sampled values, one row per frame; fields are None for channels that were
+# not sampled
+SampledChannels = namedtuple('SampledChannels', [
+                             'frames',  # (F,)
+                             'axes',  # (F, A), one column per axis
+                             'external_axes',  # (F, 16), NaN where unused
+                             'ios',  # (F, K), ordered as ProgramChannels.ios
+                             'configuration'  # (F, 3)
+                             ])
+
+# Transforms to sample the pose of a robot's TCP from, relative to its local
+# base frame
+PoseChannels = namedtuple('PoseChannels', [
+                          'tcp_path',  # tool_CTRL, or tcp_HDL without a tool
+                          'base_path',  # local_CTRL
+                          'robot_type'
+                          ])
+
+
+class MayaSamplingBackend(object):
+    """
+    Samples attributes by evaluating their plugs in a DG context per frame.
+    Values are returned in UI units, as cmds.getAttr(path, time=frame) does.
+    """
+
+    def __init__(self):
+        """
+        Initialize the backend.
+        """
+        if not MAYA_IS_RUNNING:
+            raise mimic_utils.MimicError('Maya is required for MayaSamplingBackend')
+        self.num_calls = 0
+
+    def sample(self, attribute_paths, frames):
+        """
+        Sample attributes at each frame.
+        :param attribute_paths: List of attribute paths, e.g. 'target_CTRL.axis1'
+        :param frames: List of frames
+        :return: Array of shape (len(frames), len(attribute_paths))
+        """
+        self.num_calls += 1
+        values = np.empty((len(frames), len(attribute_paths)))
+        if not attribute_paths:
+            return values
+
+        plugs = [_get_plug(attribute_path) for attribute_path in attribute_paths]
+        converters = [_get_plug_converter(plug) for plug in plugs]
+        time_unit = OpenMaya.MTime.uiUnit()
+
+        for frame_index, frame in enumerate(frames):
+            context = OpenMaya.MDGContext(OpenMaya.MTime(frame, time_unit))
+            previous_context = context.makeCurrent()
+            try:
+                for plug_index, plug in enumerate(plugs):
+                    values[frame_index, plug_index] = converters[plug_index](plug.asDouble())
+            finally:
+                previous_context.makeCurrent()
+        return values
+
+    def sample_matrices(self, attribute_paths, frames):
+        """
+        Sample matrix attributes at each frame.
+        :param attribute_paths: List of matrix attribute paths, e.g.
+            'tool_CTRL.worldMatrix[0]'
+        :param frames: List of frames
+        :return: Array of shape (len(frames), len(attribute_paths), 16); flat
+            Maya matrices, as returned by cmds.getAttr
+        """
+        self.num_calls += 1
+        values = np.empty((len(frames), len(attribute_paths), 16))
+        plugs = [_get_plug(attribute_path) for attribute_path in attribute_paths]
+        time_unit = OpenMaya.MTime.uiUnit()
+
+        for frame_index, frame in enumerate(frames):
+            context = OpenMaya.MDGContext(OpenMaya.MTime(frame, time_unit))
+            previous_context = context.makeCurrent()
+            try:
+                for plug_index, plug in enumerate(plugs):
+                    matrix = OpenMaya.MFnMatrixData(plug.asMObject()).matrix()
+                    values[frame_index, plug_index] = list(matrix)
+            finally:
+                previous_context.makeCurrent()
+        return values
+
+
+class FakeSamplingBackend(object):
+    """
+    Samples attributes from plain Python values, for use without Maya. Each
+    attribute is a constant, a dict of {frame: value} or a function of frame.
+    """
+
+    def __init__(self, attributes=None):
+        """
+        Initialize the backend.
+        :param attributes: Dict of {attribute_path: constant, dict or function}
+        """
+        self.attributes = dict(attributes or {})
+        self.num_calls = 0
+
+    def sample(self, attribute_paths, frames):
+        """
+        Sample attributes at each frame.
+        :param attribute_paths: List of attribute paths
+        :param frames: List of frames
+        :return: Array of shape (len(frames), len(attribute_paths))
+        """
+        self.num_calls += 1
+        rows = []
+        for frame in frames:
+            rows.append([self._get_value(attribute_path, frame)
+                         for attribute_path in attribute_paths])
+        return np.array(rows, dtype=float).reshape(len(frames), len(attribute_paths))
+
+    def sample_matrices(self, attribute_paths, frames):
+        """
+        Sample matrix attributes at each frame. Matrices are given as 16
+        values, or as 4x4 nested lists or arrays.
+        :param attribute_paths: List of matrix attribute paths
+        :param frames: List of frames
+        :return: Array of shape (len(frames), len(attribute_paths), 16)
+        """
+        self.num_calls += 1
+        rows = []
+        for frame in frames:
+            rows.append([np.ravel(self._get_value(attribute_path, frame))
+                         for attribute_path in attribute_paths])
+        return np.array(rows, dtype=float).reshape(len(frames), len(attribute_paths), 16)
+
+    def _get_value(self, attribute_path, frame):
+        """
+        Get the value of an attribute at a frame.
+        :param attribute_path: Attribute path
+        :param frame: Frame
+        :return:
+        """
+        try:
+            attribute = self.attributes[attribute_path]
+        except KeyError:
+            raise mimic_utils.MimicError('Attribute not found: {}'.format(attribute_path))
+        if callable(attribute):
+            return attribute(frame)
+        elif isinstance(attribute, dict):
+            return attribute[frame]
+        return attribute
+
+
+def get_default_backend():
+    """
+    Get the sampling backend for the current session.
+    :return:
+    """
+    return MayaSamplingBackend()
+
+
+def get_program_channels(robot_name, user_options):
+    """
+    Get the channels to sample for a robot, according to the user options.
+    Static settings (axis numbers, IO types, ignore flags) are queried once
+    here rather than at every frame.
+    :param robot_name: Name of the robot
+    :param user_options: UserOptions tuple
+    :return: ProgramChannels tuple
+    """
+    target_ctrl_path = mimic_utils.get_target_ctrl_path(robot_name)
+
+    axes = []
+    external_axes = []
+    configuration = []
+    if not user_options.Ignore_motion:
+        if user_options.Include_axes:
+            axes = ['{}.axis{}'.format(target_ctrl_path, i + 1)
+                    for i in range(mimic_utils.get_num_axes(robot_name))]
+        if user_options.Include_external_axes:
+            external_axes = get_external_axis_channels(robot_name)
+        if user_options.Include_configuration:
+            configuration = ['{}.ikSolution{}'.format(target_ctrl_path, i + 1)
+                             for i in range(NUM_CONFIGURATIONS)]
+
+    ios = []
+    if not user_options.Ignore_IOs:
+        io_types = []
+        if user_options.Include_digital_outputs:
+            io_types.append('digital')
+        if user_options.Include_analog_outputs:
+            io_types.append('analog')
+        ios = [channel for channel in get_io_channels(robot_name)
+               if channel.io_type in io_types]
+
+    return ProgramChannels(axes, external_axes, ios, configuration)
+
+
+def get_external_axis_channels(robot_name):
+    """
+    Get a channel for every external axis of a robot that is not ignored.
+    :param robot_name: Name of the robot
+    :return: List of ExternalAxisChannel tuples
+    """
+    channels = []
+    for external_axis_name in mimic_external_axes.get_external_axis_names(robot_name):
+        external_axis_path = mimic_external_axes._get_external_axis_path(robot_name, external_axis_name)
+        if mimic_external_axes._get_external_axis_ignore(external_axis_path):
+            continue
+        axis_number = mimic_external_axes._get_external_axis_number(external_axis_path)
+        attribute_path = external_axis_path + '_position'
+
+        # If the axis' driving attribute is a translation, we need to convert
+        # from Maya's units (cm) to millimeters
+        driving_attribute = cmds.listConnections(attribute_path, plugs=True, s=True)[0]
+        driving_attr_name = driving_attribute.split('.')[-1]
+        scale = 10 if 'translate' in driving_attr_name else 1
+
+        channels.append(ExternalAxisChannel(axis_number, attribute_path, scale))
+    return channels
+
+
+def get_io_channels(robot_name):
+    """
+    Get a channel for every IO of a robot that is not ignored.
+    :param robot_name: Name of the robot
+    :return: List of IOChannel tuples
+    """
+    channels = []
+    for io_name in mimic_io.get_io_names(robot_name):
+        io_path = mimic_io._get_io_path(robot_name, io_name)
+        if mimic_io._get_io_ignore(io_path):
+            continue
+        channels.append(IOChannel(mimic_io._get_io_number(io_path),
+                                  mimic_io._get_postproc_id(io_path),
+                                  mimic_io._get_io_type(io_path),
+                                  io_path + '_value'))
+    return channels
+
+
+def get_pose_channels(robot_name):
+    """
+    Get the transforms to sample the pose of a robot from.
+    :param robot_name: Name of the robot
+    :return: PoseChannels tuple
+    """
+    robot_type = mimic_utils.get_robot_type(robot_name)
+    if robot_type not in POSE_CONVERSION_ROTATIONS:
+        raise mimic_utils.MimicError('Robot type not supported for Pose movement')
+
+    tcp_path = mimic_utils.get_tool_ctrl_path(robot_name)
+    if not cmds.ls(tcp_path):  # No tool attached, use flange
+        tcp_path = mimic_utils.get_tcp_hdl_path(robot_name)
+
+    # Local Base Frame controller (circle control at base of the robot).
+    base_path = cmds.ls(mimic_utils.get_local_ctrl_path(robot_name))[0]
+
+    return PoseChannels(tcp_path, base_path, robot_type)
+
+
+def sample_poses(pose_channels, frames, backend=None):
+    """
+    Sample the pose of a robot's TCP relative to its local base frame at
+    every frame, without changing the current time. Positions are the world
+    rotate pivots of the TCP and base, as cmds.xform(rp=True, ws=True) gets
+    them, and orientations come from their world matrices.
+    :param pose_channels: PoseChannels tuple
+    :param frames: List of frames
+    :param backend: Sampling backend; defaults to get_default_backend()
+    :return: Array of shape (F, 12), ordered as postproc.Pose
+    """
+    _check_numpy()
+    if backend is None:
+        backend = get_default_backend()
+
+    paths = [pose_channels.tcp_path, pose_channels.base_path]
+    matrices = backend.sample_matrices(['{}.worldMatrix[0]'.format(path) for path in paths], frames)
+    pivots = backend.sample(['{}.rotatePivot{}'.format(path, axis)
+                             for path in paths for axis in 'XYZ'], frames)
+
+    # Rotate pivots are in object space; move them to world space with the
+    # (row-vector) world matrices
+    matrices = matrices.reshape(len(frames), 2, 4, 4)
+    pivots = np.concatenate([pivots.reshape(len(frames), 2, 3),
+                             np.ones((len(frames), 2, 1))], axis=-1)
+    points = np.einsum('fpi,fpij->fpj', pivots, matrices)[..., :3]
+
+    return get_poses(matrices[:, 0], points[:, 0],
+                     matrices[:, 1], points[:, 1],
+                     pose_channels.robot_type)
+
+
+def get_poses(tcp_matrices, tcp_points, base_matrices, base_points, robot_type):
+    """
+    Convert TCP and base transforms in Maya's world frame to robot poses:
+    the TCP relative to the base, in the robot's coordinate system and tool
+    frame convention, in millimeters.
+    :param tcp_matrices: Array of shape (N, 16) or (N, 4, 4); Maya matrices,
+        only the rotation blocks are used
+    :param tcp_points: Array of shape (N, 3); TCP positions, in centimeters
+    :param base_matrices: Array of shape (N, 16) or (N, 4, 4)
+    :param base_points: Array of shape (N, 3); base positions, in centimeters
+    :param robot_type: Robot type; see POSE_CONVERSION_ROTATIONS
+    :return: Array of shape (N, 12), ordered as postproc.Pose
+    """
+    _check_numpy()
+    try:
+        conversion_rotation = np.array(POSE_CONVERSION_ROTATIONS[robot_type], dtype=float)
+    except KeyError:
+        raise mimic_utils.MimicError('Robot type not supported for Pose movement')
+
+    tcp_rotations = np.asarray(tcp_matrices, dtype=float).reshape(-1, 4, 4)[:, :3, :3]
+    base_rotations = np.asarray(base_matrices, dtype=float).reshape(-1, 4, 4)[:, :3, :3]
+    tcp_points = np.asarray(tcp_points, dtype=float).reshape(-1, 3)
+    base_points = np.asarray(base_points, dtype=float).reshape(-1, 3)
+
+    # Pose of the TCP relative to the base: inverse(base) * tcp
+    base_inverses = np.linalg.inv(base_rotations)
+    rotations = np.matmul(base_inverses, tcp_rotations)
+    translations = np.einsum('nij,nj->ni', base_inverses, tcp_points - base_points)
+
+    # Rearrange from Maya CS (mcs) to Robot CS (rcs)
+    indices = MAYA_TO_ROBOT_AXES
+    translations = translations[:, indices] * 10  # cm to mm
+    rotations = rotations[:, indices][:, :, indices]
+
+    # Convert the rotations based on the robot type
+    rotations = np.matmul(conversion_rotation, rotations)
+
+    return np.concatenate([translations, rotations.reshape(-1, 9)], axis=-1)
+
+
+def sample_channels(channels, frames, backend=None):
+    """
+    Sample all channels at every frame with a single backend call.
+    :param channels: ProgramChannels tuple
+    :param frames: List of frames
+    :param backend: Sampling backend; defaults to get_default_backend()
+    :return: SampledChannels tuple
+    """
+    _check_numpy()
+    if backend is None:
+        backend = get_default_backend()
+
+    external_axis_paths = [channel.attribute_path for channel in channels.external_axes]
+    io_paths = [channel.attribute_path for channel in channels.ios]
+    attribute_paths = (list(channels.axes) + external_axis_paths +
+                       io_paths + list(channels.configuration))
+    values = backend.sample(attribute_paths, list(frames))
+
+    # Split the sampled columns back into their channels
+    stops = np.cumsum([len(channels.axes), len(external_axis_paths),
+                       len(io_paths), len(channels.configuration)])
+    axes, external_axis_values, ios, configuration, _ = np.split(values, stops, axis=1)
+
+    external_axes = None
+    if channels.external_axes:
+        external_axes = np.full((len(frames), NUM_EXTERNAL_AXES), np.nan)
+        # Later axes with the same number take precedence, as when sampling
+        # frame by frame
+        for column, channel in enumerate(channels.external_axes):
+            external_axes[:, channel.axis_number - 1] = external_axis_values[:, column] * channel.scale
+
+    return SampledChannels(np.asarray(frames),
+                           axes if channels.axes else None,
+                           external_axes,
+                           ios if channels.ios else None,
+                           configuration if channels.configuration else None)
+
+
+def concatenate_channels(sampled_channels):
+    """
+    Join the SampledChannels of consecutive chunks of frames, e.g. sampled a
+    chunk at a time to show progress, into a single SampledChannels.
+    :param sampled_channels: List of SampledChannels tuples, in frame order
+    :return: SampledChannels tuple
+    """
+    _check_numpy()
+    return SampledChannels(*[None if values[0] is None else np.concatenate(values)
+                             for values in zip(*sampled_channels)])
+
+
+def _get_plug(attribute_path):
+    """
+    Get the MPlug of an attribute path.
+    :param attribute_path: Attribute path
+    :return:
+    """
+    selection_list = OpenMaya.MSelectionList()
+    selection_list.add(attribute_path)
+    return selection_list.getPlug(0)
+
+
+def _get_plug_converter(plug):
+    """
+    Get a function that converts a plug's internal value to UI units, which
+    only differ for angle and distance attributes.
+    :param plug: MPlug
+    :return:
+    """
+    attribute = plug.attribute()
+    if attribute.hasFn(OpenMaya.MFn.kUnitAttribute):
+        unit_type = OpenMaya.MFnUnitAttribute(attribute).unitType()
+        if unit_type == OpenMaya.MFnUnitAttribute.kAngle:
+            angle_unit = OpenMaya.MAngle.uiUnit()
+            return lambda value: OpenMaya.MAngle(value).asUnits(angle_unit)
+        elif unit_type == OpenMaya.MFnUnitAttribute.kDistance:
+            distance_unit = OpenMaya.MDistance.uiUnit()
+            return lambda value: OpenMaya.MDistance(value).asUnits(distance_unit)
+    return float
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required for bulk sampling, is
+    not available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for bulk sampling')
@@ -507,7 +507,8 @@ def _build_general_settings_tab(parent_layout):
                  height=20)
     cmds.radioButton('rb_timeInterval',
                    label='Sample rate:',
-                   select=not Prefs.get('SAMPLE_KEYFRAMES_ONLY'))
+                   select=not (Prefs.get('SAMPLE_KEYFRAMES_ONLY') or
+                               Prefs.get('SAMPLE_ADAPTIVE')))
     cmds.floatField('f_timeBetweenSamples',
                  value=selected_value,
                  precision=3,
@@ -542,6 +543,37 @@ def _build_general_settings_tab(parent_layout):
                        'SAMPLE_KEYFRAMES_ONLY', False, mimic_config.FILE))
     cmds.setParent('..')
 
+    cmds.rowLayout(numberOfColumns=3,
+                 adjustableColumn=3,
+                 columnAttach=(1, 'left', radio_indent),
+                 columnWidth=[(1, 90), (2, 45)],
+                 height=20)
+    cmds.radioButton('rb_adaptive',
+                   label='Adaptive:',
+                   annotation='Sample at the sample rate, then subdivide where ' \
+                              'linear interpolation deviates from the animation ' \
+                              'by more than the tolerances (deg, mm)',
+                   select=Prefs.get('SAMPLE_ADAPTIVE'),
+                   onCommand=partial(
+                       Prefs.set,
+                       'SAMPLE_ADAPTIVE', True, mimic_config.FILE),
+                   offCommand=partial(
+                       Prefs.set,
+                       'SAMPLE_ADAPTIVE', False, mimic_config.FILE))
+    cmds.floatField('f_adaptiveAxisTolerance',
+                 value=Prefs.get('ADAPTIVE_AXIS_TOLERANCE'),
+                 precision=3,
+                 minValue=0,
+                 annotation='Max axis interpolation error, in degrees',
+                 changeCommand=partial(Prefs.set, 'ADAPTIVE_AXIS_TOLERANCE'))
+    cmds.floatField('f_adaptivePositionTolerance',
+                 value=Prefs.get('ADAPTIVE_POSITION_TOLERANCE'),
+                 precision=3,
+                 minValue=0,
+                 annotation='Max TCP position deviation, in mm; 0 to ignore',
+                 changeCommand=partial(Prefs.set, 'ADAPTIVE_POSITION_TOLERANCE'))
+    cmds.setParent('..')
+
     cmds.rowLayout(numberOfColumns=3,
                  adjustableColumn=3,
                  columnAttach=(1, 'left', -1),
@@ -659,6 +691,34 @@ def _build_program_settings_frame(parent_layout):
                 annotation='If checked, program will play in viewport during ' \
                            'post-process. Leave unchecked for faster results.',
                 changeCommand=partial(Prefs.set, 'OPTS_PREVIEW_IN_VIEWPORT'))
+    cmds.checkBox('cb_fastExport',
+                label="Fast export",
+                value=Prefs.get('OPTS_FAST_EXPORT'),
+                annotation='If checked, the viewport is paused while sampling ' \
+                           'and progress is updated less often. Overrides ' \
+                           'preview in viewport.',
+                changeCommand=partial(Prefs.set, 'OPTS_FAST_EXPORT'))
+    cmds.rowLayout(numberOfColumns=2,
+                 adjustableColumn=2,
+                 columnAttach=(1, 'left', 0),
+                 columnWidth=[(1, 132), (2, 40)],
+                 height=20)
+    cmds.text(label='Parallel workers:',
+            annotation='Number of mayapy processes that sample the program ' \
+                       'when using a sample rate. The scene must be saved.')
+    cmds.intField('i_parallelWorkers',
+                value=Prefs.get('OPTS_PARALLEL_WORKERS'),
+                minValue=1,
+                maxValue=64,
+                step=1,
+                changeCommand=partial(Prefs.set, 'OPTS_PARALLEL_WORKERS'))
+    cmds.setParent('..')
+    cmds.checkBox('cb_incrementalExport',
+                label="Incremental export",
+                value=Prefs.get('OPTS_INCREMENTAL_EXPORT'),
+                annotation='If checked, only frames whose animation curves ' \
+                           'changed since the last export are re-sampled.',
+                changeCommand=partial(Prefs.set, 'OPTS_INCREMENTAL_EXPORT'))
     cmds.checkBox('cb_promptOnRedundantSolutions',
                 label="Prompt on redundant solutions",
                 value=Prefs.get('OPTS_REDUNDANT_SOLUTIONS_USER_PROMPT'),
@@ -666,6 +726,29 @@ def _build_program_settings_frame(parent_layout):
                        'redundant solutions on axes where they occur.',
                 changeCommand=partial(Prefs.set,
                                                   'OPTS_REDUNDANT_SOLUTIONS_USER_PROMPT'))
+    cmds.rowLayout(numberOfColumns=3,
+                 adjustableColumn=3,
+                 columnAttach=(1, 'left', 0),
+                 columnWidth=[(1, 92), (2, 40), (3, 40)],
+                 height=20)
+    cmds.text(label='Solution weights:',
+            annotation='Weights used to pick between redundant solutions: ' \
+                       'distance from home (left) and from the end of the ' \
+                       'previous program (right).')
+    cmds.floatField('f_solutionHomeWeight',
+                  value=Prefs.get('OPTS_SOLUTION_HOME_WEIGHT'),
+                  minValue=0,
+                  precision=2,
+                  annotation='Weight of the distance from home',
+                  changeCommand=partial(Prefs.set, 'OPTS_SOLUTION_HOME_WEIGHT'))
+    cmds.floatField('f_solutionPreviousWeight',
+                  value=Prefs.get('OPTS_SOLUTION_PREVIOUS_WEIGHT'),
+                  minValue=0,
+                  precision=2,
+                  annotation='Weight of the distance from the end of the ' \
+                             'previous program',
+                  changeCommand=partial(Prefs.set, 'OPTS_SOLUTION_PREVIOUS_WEIGHT'))
+    cmds.setParent('..')
 
     cmds.separator(height=6, style='none')
 
@@ -677,6 +760,12 @@ def _build_program_settings_frame(parent_layout):
               command=mimic_program.save_program,
               height=25,
               annotation='Saves robot control program with input parameters')
+    cmds.button('Clear Program Cache',
+              command=mimic_program.clear_program_cache,
+              height=20,
+              annotation='Samples the whole program again on the next ' \
+                         'Analyze or Save, e.g. after scene changes that are ' \
+                         'not keyed on the robot\'s controls')
     cmds.separator(height=3, style='none')
 
     export_progress_bar = cmds.progressBar('pb_exportProgress',
@@ -1015,7 +1104,7 @@ def _build_add_external_axis_frame(parent_layout):
                          placeholderText='mm')
             cmds.textField('t_externalAxisVelocityLimit',
                          edit=True,
-                         placeholderText='m/s')
+                         placeholderText='mm/s')
         else:
             cmds.textField('t_externalAxisLimitMin',
                          edit=True,
@@ -1072,7 +1161,7 @@ def _build_add_external_axis_frame(parent_layout):
     cmds.text(label='Velocity Limit:')
 
     cmds.textField('t_externalAxisVelocityLimit',
-                 placeholderText='m/s')
+                 placeholderText='mm/s')
     cmds.setParent('..')
 
     cmds.rowLayout(numberOfColumns=1)
@@ -16,6 +16,11 @@ except ImportError:  # Maya is not running
     mel = None
     MAYA_IS_RUNNING = False
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; IK solutions are compared in Python
+    np = None
+
 import math
 import re
 from collections import namedtuple
@@ -255,6 +260,15 @@ def get_tool_ctrl_fk_path(robot_name):
     return format_path(__TOOL_CTRL_FK_PATH, robot_name)
 
 
+def get_fk_ctrls_path(robot_name):
+    """
+    Get the long name of input robot's FK_CTRLS group.
+    :param robot_name: string, name of robot
+    :return:
+    """
+    return format_path(__FK_CTRLS_PATH, robot_name)
+
+
 def get_tcp_hdl_path(robot_name):
     """
     Get the long name of input robot's tcp_HDL transform.
@@ -419,8 +433,7 @@ def get_reconcile_axes(robot_name):
 
     Returns list of booleans
     """
-    # TO-DO: HARD CODED
-    num_axes = 6
+    num_axes = get_num_axes(robot_name)
 
     rotation_limits = get_all_limits(robot_name)['Position']
     axis_offsets = get_axis_offsets(robot_name)
@@ -1116,8 +1129,9 @@ def get_axis_limits(robot=None):
 
     axis_position_limits = {}
 
-    # TODO: HARD CODED - Number of robot axes; should include external axes
-    num_axes = 6
+    # External axis limits are stored on the robot's external axes; see
+    # mimic_external_axes.get_all_limits
+    num_axes = get_num_axes(robot)
 
     for i in range(num_axes):
         axis_number = i + 1  # Axis numbers are 1-indexed
@@ -1128,11 +1142,27 @@ def get_axis_limits(robot=None):
         # Save value to dictionary
         axis_position_limits[axis_name] = {'Min Limit': val_min,
                                            'Max Limit': val_max}
-    
-    # TO-DO: Add external axes
+
     return axis_position_limits
 
 
+def get_num_axes(robot):
+    """
+    Gets the number of axes of a robot rig, from the axis position limits on
+    its target_CTRL. Doesn't include external axes.
+    :param robot: name string of the selected robot
+    :return: int, number of robot axes
+    """
+    target_ctrl_path = get_target_ctrl_path(robot)
+
+    num_axes = 0
+    while cmds.attributeQuery('axis{}Min'.format(num_axes + 1),
+                              node=target_ctrl_path, exists=True):
+        num_axes += 1
+
+    return num_axes
+
+
 def set_axis_limits(*args):
     """
     Gets user-input value from UI and sets all axis limits at once
@@ -1299,8 +1329,9 @@ def _get_limits(robot, limit_type):
                              n=target_ctrl_path, ex=True):
         add_limits_to_robot(robot, limit_type)
 
-    # HARD CODED - Number of robot axes; should include external axes
-    num_axes = 6
+    # External axis limits are stored on the robot's external axes; see
+    # mimic_external_axes.get_all_limits
+    num_axes = get_num_axes(robot)
 
     # Create a list of robot's limits
     for i in range(num_axes):
@@ -1317,8 +1348,7 @@ def _get_limits(robot, limit_type):
         if limit:
             limits[axis_name] = {'Min Limit': -limit,
                                  'Max Limit': limit}
-    
-    # TO-DO: Add external axes
+
     return limits
 
 
@@ -1461,14 +1491,10 @@ def set_fk_pose(*args):
 
 
 ### ---------------------------------------- ###
-__FK_CONFIGS = [[1, 1, 1],
-                [1, 1, 0],
-                [1, 0, 1],
-                [1, 0, 0],
-                [0, 1, 1],
-                [0, 1, 0],
-                [0, 0, 1],
-                [0, 0, 0]]
+# Ordered as the IK solver's branches; see inverse_kinematics.solve_all()
+__FK_CONFIGS = inverse_kinematics.SOLUTION_CONFIGS
+# IK solver contexts by robot name; see get_solver_context()
+__SOLVER_CONTEXTS = {}
 
 def get_solver_params(robot_name):
     """
@@ -1522,6 +1548,43 @@ def get_solver_params(robot_name):
     return solver_params(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, robot_definition, axis_offsets, rot_directions, solver_type)
 
 
+def get_solver_context(robot_name, solver_params=None):
+    """
+    Get the IK solver context of the input robot, to solve many poses
+    without re-reading the robot's definition, offsets and directions.
+    Contexts are cached per robot and only rebuilt when the robot's
+    attributes change, like the robotIK node does.
+    :param robot_name: name string of the selected robot
+    :param solver_params: optional result of get_solver_params() to build
+        the context from, rather than querying the rig again
+    :return: inverse_kinematics.SolverContext
+    """
+    if solver_params is None:
+        robot_definition = get_robot_definition(robot_name)
+        solver_type = get_solver_type(robot_name)
+        axis_offsets = get_axis_offsets(robot_name)
+        rot_directions = get_rot_directions(robot_name)
+    else:
+        robot_definition = solver_params.robot_definition
+        solver_type = solver_params.solver_type
+        axis_offsets = solver_params.axis_offsets
+        rot_directions = solver_params.rot_directions
+
+    solver_context = __SOLVER_CONTEXTS.get(robot_name)
+    if solver_context is None or \
+            not solver_context.matches(robot_definition,
+                                       solver_type,
+                                       axis_offsets,
+                                       rot_directions):
+        solver_context = inverse_kinematics.SolverContext(robot_definition,
+                                                          solver_type,
+                                                          axis_offsets,
+                                                          rot_directions)
+        __SOLVER_CONTEXTS[robot_name] = solver_context
+
+    return solver_context
+
+
 def get_solver_type(robot_name):
     """
     """
@@ -1563,7 +1626,7 @@ def get_axis_offsets(robot_name):
     """
     target_ctrl_path = get_target_ctrl_path(robot_name)
 
-    num_axes = 6
+    num_axes = get_num_axes(robot_name)
     axis_offsets = [0 for i in range(num_axes)]
 
     for i in range(num_axes):
@@ -1585,7 +1648,7 @@ def get_rot_directions(robot_name):
     """
     target_ctrl_path = get_target_ctrl_path(robot_name)
 
-    num_axes = 6
+    num_axes = get_num_axes(robot_name)
     rot_directions = [0 for i in range(num_axes)]
 
     for i in range(num_axes):
@@ -1635,17 +1698,29 @@ def find_closest_config(fk_conf_normalized, raw_ik_solutions):
      axis configurations without MFG-specific axis offsets
     :return:
     """
-    c = [list(zip(fk_conf_normalized, row)) for row in raw_ik_solutions]
-    d = [[] for i in range(len(raw_ik_solutions))]
-    
-    # Find the difference between the initial configuration and each possible
-    # configuration. The row with the smallest difference represents the
-    # closest solution to to the initial configuration
-    for i, row in enumerate(c):
-        d[i] = [abs(a - b) for a, b in row]
-        d[i] = sum(d[i])
-
-    solution_index = d.index(min(d))
+    # Unreachable branches are solved as rows of NaN; they can't be the
+    # closest solution, and min() would pick them silently
+    if np is not None:
+        solutions = np.asarray(raw_ik_solutions, dtype=float)
+        valid_indices = np.flatnonzero(np.isfinite(solutions).all(axis=1))
+        if not valid_indices.size:
+            raise MimicError('No valid IK solution for the current FK pose')
+
+        # Find the difference between the initial configuration and each
+        # possible configuration. The row with the smallest difference
+        # represents the closest solution to to the initial configuration
+        d = np.abs(solutions[valid_indices] - np.asarray(fk_conf_normalized, dtype=float)).sum(axis=1)
+        solution_index = int(valid_indices[np.argmin(d)])
+    else:
+        d = {}
+        for i, row in enumerate(raw_ik_solutions):
+            if all(math.isfinite(b) for b in row):
+                d[i] = sum(abs(a - b) for a, b in zip(fk_conf_normalized, row))
+        if not d:
+            raise MimicError('No valid IK solution for the current FK pose')
+
+        solution_index = min(d, key=d.get)
+
     # Get three booleans corresponding with a valid IK configuration using index
     config = __FK_CONFIGS[solution_index]
     
@@ -1666,24 +1741,18 @@ def find_ik_solutions(robot_name):
                      without any MFG-specific offsets
     """
 
-    ik_solutions = []
-
     solver_params = get_solver_params(robot_name)
+    solver_context = get_solver_context(robot_name, solver_params)
 
-    for sol in __FK_CONFIGS:
-
-        thetas = inverse_kinematics.solve(
-                        solver_params.tcp,
-                        solver_params.tcp_mat,
-                        solver_params.lcs,
-                        solver_params.lcs_mat,
-                        solver_params.target,
-                        solver_params.target_mat,
-                        solver_params.robot_definition,
-                        solver_params.solver_type,
-                        sol)
+    pose = inverse_kinematics.SolverPose(solver_params.tcp,
+                                         solver_params.tcp_mat,
+                                         solver_params.lcs,
+                                         solver_params.lcs_mat,
+                                         solver_params.target,
+                                         solver_params.target_mat)
 
-        ik_solutions.append(thetas)
+    # Solve every configuration in __FK_CONFIGS, without the robot's offsets
+    ik_solutions = solver_context.solve_all(pose, offsets=False)
 
     return ik_solutions
 
@@ -231,19 +231,29 @@ class SimpleRAPIDProcessor(postproc.PostProcessor):
                 raise IndexError(message)
 
     @staticmethod
-    def _process_command(command, opts):
+    def _process_command(command, opts, pose=None):
         """
         Process a single command with user options.
         :param command: Command tuple
         :param opts: UserOptions tuple
+        :param pose: Optional pose, already converted by _convert_poses
         :return:
         """
         command_type = postproc.get_structure_type(command)
         if not opts.Ignore_motion and command_type == MOTION_COMMAND:
-            return _process_motion_command(command, opts)
+            return _process_motion_command(command, opts, pose)
         elif not opts.Ignore_IOs and command_type == IO_COMMAND:
             return _process_io_command(command, opts)
 
+    @staticmethod
+    def _convert_poses(poses):
+        """
+        Convert the poses of a list of motion commands in a single batch.
+        :param poses: List of Pose tuple
+        :return:
+        """
+        return postproc.convert_poses(poses, _convert_pose_rotations, _convert_pose)
+
     @staticmethod
     def _format_command(params_dict):
         """
@@ -304,13 +314,17 @@ class SimpleRAPIDProcessor(postproc.PostProcessor):
         )
 
 
-def _process_motion_command(command, opts):  # Implement in base class!
+def _process_motion_command(command, opts, pose=None):  # Implement in base class!
     """
     Process motion command.
     :param command: Command tuple
     :param opts: UserOptions tuple
+    :param pose: Optional pose, already converted by _convert_poses
     :return:
     """
+    if pose is None and command.pose is not None:
+        pose = _convert_pose(command.pose)
+
     motion_type = None
     target_data_type = None
     target_data = []
@@ -320,7 +334,6 @@ def _process_motion_command(command, opts):  # Implement in base class!
         if command.pose is not None:
             motion_type = MOVE_L
             target_data_type = ROBTARGET
-            pose = _convert_pose(command.pose)
             params = [general_utils.num_to_str(p, include_sign=False, precision=3)
                       for p in pose]
             target_data.extend(params)
@@ -367,7 +380,6 @@ def _process_motion_command(command, opts):  # Implement in base class!
             motion_type = MOVE_J
             target_data_type = ROBTARGET
 
-            pose = _convert_pose(command.pose)
             params = [general_utils.num_to_str(p, include_sign=False, precision=3)
                       for p in pose]
             target_data.extend(params)
@@ -467,6 +479,19 @@ def _convert_pose(pose):
     return [pose.pose_x, pose.pose_y, pose.pose_z, q1, q2, q3, q4]
 
 
+def _convert_pose_rotations(poses, rotations):
+    """
+    Convert a list of Pose tuples to subclass conventions, given their
+    rotation matrices; same result as calling _convert_pose on each.
+    :param poses: List of Pose tuple
+    :param rotations: Array of shape (N, 3, 3); rotation matrices of poses
+    :return:
+    """
+    quaternions = transforms.quaternions_by_matrices(rotations).tolist()
+    return [[pose.pose_x, pose.pose_y, pose.pose_z] + q
+            for pose, q in zip(poses, quaternions)]
+
+
 def _convert_configuration(configuration):
     """
     Convert a Configuration tuple to subclass conventions.
@@ -279,19 +279,29 @@ class SimpleKRLProcessor(postproc.PostProcessor):
                 raise IndexError(message)
 
     @staticmethod
-    def _process_command(command, opts):
+    def _process_command(command, opts, pose=None):
         """
         Process a single command with user options.
         :param command: Command tuple
         :param opts: UserOptions tuple
+        :param pose: Optional pose, already converted by _convert_poses
         :return:
         """
         command_type = postproc.get_structure_type(command)
         if not opts.Ignore_motion and command_type == MOTION_COMMAND:
-            return _process_motion_command(command, opts)
+            return _process_motion_command(command, opts, pose)
         elif not opts.Ignore_IOs and command_type == IO_COMMAND:
             return _process_io_command(command, opts)
 
+    @staticmethod
+    def _convert_poses(poses):
+        """
+        Convert the poses of a list of motion commands in a single batch.
+        :param poses: List of Pose tuple
+        :return:
+        """
+        return postproc.convert_poses(poses, _convert_pose_rotations, _convert_pose)
+
     @staticmethod
     def _format_command(params_dict):
         """
@@ -350,13 +360,17 @@ class SimpleKRLProcessor(postproc.PostProcessor):
         )
 
 
-def _process_motion_command(command, opts):
+def _process_motion_command(command, opts, pose=None):
     """
     Process motion command.
     :param command: Command tuple
     :param opts: UserOptions tuple
+    :param pose: Optional pose, already converted by _convert_poses
     :return:
     """
+    if pose is None and command.pose is not None:
+        pose = _convert_pose(command.pose)
+
     motion_data_type = None
     motion_data = []  # empty data container
 
@@ -364,7 +378,7 @@ def _process_motion_command(command, opts):
     if opts.Use_linear_motion:
         motion_type = MOVE_LIN
         if command.pose is not None:
-            motion_data.extend(_convert_pose(command.pose))
+            motion_data.extend(pose)
             if command.configuration is not None:
                 if command.external_axes is not None:
                     motion_data_type = E6POS
@@ -396,7 +410,7 @@ def _process_motion_command(command, opts):
                 motion_data_type = AXIS
         elif command.pose is not None:
             motion_data_type = FRAME
-            motion_data.extend(_convert_pose(command.pose))
+            motion_data.extend(pose)
         else:
             raise ValueError('Invalid command')
 
@@ -467,6 +481,19 @@ def _convert_pose(pose):
     return [pose.pose_x, pose.pose_y, pose.pose_z, a, b, c]
 
 
+def _convert_pose_rotations(poses, rotations):
+    """
+    Convert a list of Pose tuples to subclass conventions, given their
+    rotation matrices; same result as calling _convert_pose on each.
+    :param poses: List of Pose tuple
+    :param rotations: Array of shape (N, 3, 3); rotation matrices of poses
+    :return:
+    """
+    angles = transforms.euler_angles_by_matrices(rotations).tolist()
+    return [[pose.pose_x, pose.pose_y, pose.pose_z] + abc
+            for pose, abc in zip(poses, angles)]
+
+
 def _convert_configuration(configuration):
     """
     Convert a Configuration tuple to subclass conventions.
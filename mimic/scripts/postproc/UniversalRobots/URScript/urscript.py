@@ -174,19 +174,29 @@ class SimpleURScriptProcessor(postproc.PostProcessor):
             raise IndexError(message)
 
     @staticmethod
-    def _process_command(command, opts):
+    def _process_command(command, opts, pose=None):
         """
         Process a single command with user options.
         :param command: Command tuple
         :param opts: UserOptions tuple
+        :param pose: Optional pose, already converted by _convert_poses
         :return:
         """
         command_type = postproc.get_structure_type(command)
         if not opts.Ignore_motion and command_type == MOTION_COMMAND:
-            return _process_motion_command(command, opts)
+            return _process_motion_command(command, opts, pose)
         elif not opts.Ignore_IOs and command_type == IO_COMMAND:
             return _process_io_command(command, opts)
 
+    @staticmethod
+    def _convert_poses(poses):
+        """
+        Convert the poses of a list of motion commands in a single batch.
+        :param poses: List of Pose tuple
+        :return:
+        """
+        return postproc.convert_poses(poses, _convert_pose_rotations, _convert_pose)
+
     @staticmethod
     def _format_command(params_dict):
         """
@@ -245,13 +255,17 @@ class SimpleURScriptProcessor(postproc.PostProcessor):
             include_digital_outputs=True
         )
 
-def _process_motion_command(command, opts):
+def _process_motion_command(command, opts, pose=None):
     """
     Process motion command.
     :param command: Command tuple
     :param opts: UserOptions tuple
+    :param pose: Optional pose, already converted by _convert_poses
     :return:
     """
+    if pose is None and command.pose is not None:
+        pose = _convert_pose(command.pose)
+
     motion_type = None
     target_data_type = None
     target_data = []
@@ -265,7 +279,6 @@ def _process_motion_command(command, opts):
             target_data_type = POSE
             target_speed = urscript_config.DEFAULT_CARTESIAN_SPEED
             target_acceleration = urscript_config.DEFAULT_CARTESIAN_ACCELERATION
-            pose = _convert_pose(command.pose)
             params = [general_utils.num_to_str(p, include_sign=False, precision=3)
                       for p in pose]
             target_data.extend(params)
@@ -356,4 +369,19 @@ def _convert_pose(pose):
     m = [i_vector, j_vector, k_vector]
     a, b, c = transforms.euler_angles_by_matrix(m)
     # convert mm to mm and degrees to radians
-    return [pose.pose_x/1000, pose.pose_y/1000, pose.pose_z/1000, math.radians(a), math.radians(b), math.radians(c)]
\ No newline at end of file
+    return [pose.pose_x/1000, pose.pose_y/1000, pose.pose_z/1000, math.radians(a), math.radians(b), math.radians(c)]
+
+
+def _convert_pose_rotations(poses, rotations):
+    """
+    Convert a list of Pose tuples to subclass conventions, given their
+    rotation matrices; same result as calling _convert_pose on each.
+    :param poses: List of Pose tuple
+    :param rotations: Array of shape (N, 3, 3); rotation matrices of poses
+    :return:
+    """
+    angles = transforms.euler_angles_by_matrices(rotations).tolist()
+    # convert mm to m and degrees to radians
+    return [[pose.pose_x/1000, pose.pose_y/1000, pose.pose_z/1000,
+             math.radians(a), math.radians(b), math.radians(c)]
+            for pose, (a, b, c) in zip(poses, angles)]
@@ -10,6 +10,7 @@ from collections import namedtuple
 
 import general_utils
 import mimic_config
+from robotmath import transforms
 import importlib
 
 importlib.reload(general_utils)
@@ -309,6 +310,47 @@ class PostProcessor(object):
         """
         raise NotImplementedError
 
+    def _process_commands(self, commands, opts):
+        """
+        Process a list of commands and user options, dropping any command that
+        produces no output. The poses of all motion commands are converted in
+        a single batch by _convert_poses, rather than one by one, and passed
+        to _process_command.
+        :param commands: List of Command tuple
+        :param opts: UserOptions tuple
+        :return: List of processed commands.
+        """
+        poses = [None for _ in commands]
+        if not opts.Ignore_motion:
+            # Only motion commands have poses
+            pose_indices = [i for i, command in enumerate(commands)
+                            if getattr(command, 'pose', None) is not None]
+            converted_poses = self._convert_poses([commands[i].pose for i in pose_indices])
+            if converted_poses is not None:
+                for i, pose in zip(pose_indices, converted_poses):
+                    poses[i] = pose
+
+        processed_commands = []
+        for command, pose in zip(commands, poses):
+            if pose is None:
+                processed_command = self._process_command(command, opts)
+            else:
+                processed_command = self._process_command(command, opts, pose)
+            if processed_command is not None:
+                processed_commands.append(processed_command)
+        return processed_commands
+
+    def _convert_poses(self, poses):
+        """
+        Convert the poses of a list of motion commands to processor
+        conventions in a single batch, for _process_commands. Processors that
+        convert poses override this, usually with convert_poses, and accept
+        the converted pose as a third argument of _process_command.
+        :param poses: List of Pose tuple
+        :return: List of converted poses, or None if poses aren't converted.
+        """
+        return None
+
     def _process_program(self, processed_commands, opts):  # Implement in base class!
         """
         Process a list of instructions and user options. This function should
@@ -344,9 +386,12 @@ class PostProcessor(object):
         """
         Processor-specific function. Calls _format_command for all params.
         :param params_dicts: List of dictionary of namedtuple containing all
-        command parameters (i.e. Axes, ExternalAxes, etc).
+        command parameters (i.e. Axes, ExternalAxes, etc), or a
+        trajectory.ProgramTrajectory, which is converted one command at a time.
         :return:
         """
+        if hasattr(params_dicts, 'iter_command_dicts'):
+            params_dicts = params_dicts.iter_command_dicts()
         commands = []
         for params_dict in params_dicts:
             command_list = self._format_command(params_dict)
@@ -373,11 +418,7 @@ class PostProcessor(object):
         """
         self.program_template_name = self._get_program_name(
             template_filename, default=mimic_config.Prefs.get('DEFAULT_TEMPLATE_NAME'))
-        processed_commands = []
-        for command in commands:
-            processed_command = self._process_command(command, opts)
-            if processed_command is not None:
-                processed_commands.append(processed_command)
+        processed_commands = self._process_commands(commands, opts)
         return self._process_program(processed_commands, opts)
 
     def write(self, content, output_filename=None, overwrite=True):
@@ -422,6 +463,26 @@ def get_structure_type(structure):
     return type(structure).__name__
 
 
+
+def convert_poses(poses, convert_rotations, convert_pose):
+    """
+    Convert a list of Pose tuples in a single batch. The rotation of every
+    pose is gathered into one array of rotation matrices for
+    convert_rotations; without NumPy, each pose is converted by convert_pose.
+    :param poses: List of Pose tuple
+    :param convert_rotations: Function of (poses, array of shape (N, 3, 3)
+        rotation matrices) returning the list of converted poses
+    :param convert_pose: Function of a Pose tuple returning a converted pose
+    :return: List of converted poses
+    """
+    if not poses:
+        return []
+    try:
+        rotations = transforms.matrices_by_vectors([pose[3:12] for pose in poses])  # ix .. kz
+        return convert_rotations(poses, rotations)
+    except ImportError:  # NumPy is not installed; convert pose by pose
+        return [convert_pose(pose) for pose in poses]
+
 def check_and_remove_file_extension(filename):
     """
     Remove file extension from filename.
@@ -0,0 +1,305 @@
+#!usr/bin/env python
+"""
+Columnar program trajectory. Holds every sampled channel of a program as one
+NumPy array per channel, one row per command, instead of a list of command
+dicts of namedtuples. Stages that work on whole channels (reconciliation,
+limit checks, derivatives) can operate on the arrays directly, and slicing a
+trajectory returns views rather than copies.
+
+ProgramTrajectory.from_command_dicts and to_command_dicts convert from and to
+the legacy command dicts, so that processors and other stages can migrate one
+at a time; PostProcessor.format_commands and
+analysis_utils.get_program_derivatives accept either.
+"""
+
+from postproc import postproc
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; trajectories are unavailable
+    np = None
+
+NUM_AXES = 6
+NUM_EXTERNAL_AXES = 16
+NUM_POSE_VALUES = 12
+NUM_CONFIGURATIONS = 3
+
+# Array columns of a trajectory; any of them but time may be None
+COLUMNS = ['frames',  # (N,)
+           'framerates',  # (N,)
+           'time',  # (N,), time index in seconds
+           'axes',  # (N, 6)
+           'external_axes',  # (N, 16) masked array, masked where unused
+           'pose',  # (N, 12), ordered as postproc.Pose
+           'configuration',  # (N, 3) bool
+           'digital_outputs',  # (N,) uint64 bitsets, bit k is output k
+           'analog_outputs']  # (N, K)
+
+# Command dict entries and the columns they are read into
+_COMMAND_DICT_KEYS = {'Frame': 'frames',
+                      'Framerate': 'framerates',
+                      postproc.TIME_INDEX: 'time',
+                      postproc.AXES: 'axes',
+                      postproc.EXTERNAL_AXES: 'external_axes',
+                      postproc.POSE: 'pose',
+                      postproc.CONFIGURATION: 'configuration',
+                      postproc.DIGITAL_OUTPUT: 'digital_outputs',
+                      postproc.ANALOG_OUTPUT: 'analog_outputs'}
+
+
+class ProgramTrajectory(object):
+    """
+    Columnar trajectory of a program. Digital outputs are stored as one
+    bitset per command, bit k holding the value of the output identified by
+    digital_output_ids[k]; analog outputs are stored as one column per
+    output, identified by analog_output_ids.
+    """
+
+    def __init__(self, time, frames=None, framerates=None, axes=None,
+                 external_axes=None, pose=None, configuration=None,
+                 digital_outputs=None, digital_output_ids=None,
+                 analog_outputs=None, analog_output_ids=None):
+        """
+        Initialize the trajectory. Arrays are used as given, not copied.
+        :param time: Array-like of shape (N,); time index in seconds
+        :param frames: Optional array-like of shape (N,)
+        :param framerates: Optional array-like of shape (N,)
+        :param axes: Optional array-like of shape (N, 6)
+        :param external_axes: Optional array-like of shape (N, 16); masked or
+            NaN where an external axis is unused
+        :param pose: Optional array-like of shape (N, 12)
+        :param configuration: Optional array-like of shape (N, 3)
+        :param digital_outputs: Optional array-like of shape (N,); bitsets
+        :param digital_output_ids: Postproc identifiers of the digital
+            outputs, one per bit; required with digital_outputs
+        :param analog_outputs: Optional array-like of shape (N, K)
+        :param analog_output_ids: Postproc identifiers of the analog outputs,
+            one per column; required with analog_outputs
+        """
+        _check_numpy()
+        self.time = np.asarray(time, dtype=float)
+        num_commands = len(self.time)
+
+        self.frames = _as_column(frames, (num_commands,))
+        self.framerates = _as_column(framerates, (num_commands,))
+        self.axes = _as_column(axes, (num_commands, NUM_AXES))
+        self.pose = _as_column(pose, (num_commands, NUM_POSE_VALUES))
+        self.configuration = _as_column(configuration, (num_commands, NUM_CONFIGURATIONS), bool)
+
+        self.external_axes = None
+        if external_axes is not None:
+            if not isinstance(external_axes, np.ma.MaskedArray):
+                external_axes = np.ma.masked_invalid(np.asarray(external_axes, dtype=float))
+            self.external_axes = _check_shape(external_axes, (num_commands, NUM_EXTERNAL_AXES))
+
+        self.digital_outputs = _as_column(digital_outputs, (num_commands,), np.uint64)
+        self.digital_output_ids = list(digital_output_ids or [])
+        if self.digital_outputs is not None and len(self.digital_output_ids) > 64:
+            raise ValueError('At most 64 digital outputs are supported')
+
+        self.analog_output_ids = list(analog_output_ids or [])
+        self.analog_outputs = _as_column(analog_outputs, (num_commands, len(self.analog_output_ids)))
+
+    def __len__(self):
+        """
+        Number of commands.
+        :return:
+        """
+        return len(self.time)
+
+    def __getitem__(self, index):
+        """
+        Get a sub-trajectory. Slices return views of the arrays; index
+        arrays and masks return copies, as with NumPy.
+        :param index: Slice, index array or boolean mask
+        :return: ProgramTrajectory
+        """
+        if isinstance(index, int):
+            index = slice(index, index + 1 or None)
+        columns = {}
+        for column in COLUMNS:
+            values = getattr(self, column)
+            columns[column] = None if values is None else values[index]
+        return self.replace(**columns)
+
+    def replace(self, **columns):
+        """
+        Get a trajectory that shares every array with this one, except for
+        the given columns, e.g. trajectory.replace(axes=velocities).
+        :param columns: Columns to replace
+        :return: ProgramTrajectory
+        """
+        values = {column: getattr(self, column) for column in COLUMNS}
+        values.update(columns)
+        return ProgramTrajectory(digital_output_ids=self.digital_output_ids,
+                                 analog_output_ids=self.analog_output_ids,
+                                 **values)
+
+    def copy(self):
+        """
+        Get a copy of the trajectory that shares no arrays with this one.
+        :return: ProgramTrajectory
+        """
+        return self.replace(**{column: getattr(self, column).copy()
+                               for column in COLUMNS
+                               if getattr(self, column) is not None})
+
+    def get_digital_output_values(self):
+        """
+        Unpack the digital output bitsets.
+        :return: Array of shape (N, K) of ints, one column per output
+        """
+        bits = np.arange(len(self.digital_output_ids), dtype=np.uint64)
+        return ((self.digital_outputs[:, np.newaxis] >> bits) & np.uint64(1)).astype(int)
+
+    @classmethod
+    def from_command_dicts(cls, command_dicts, columns=None):
+        """
+        Build a trajectory from legacy command dicts. Every command dict is
+        expected to hold the same entries, as sampled by mimic_program.
+        :param command_dicts: List of command dicts
+        :param columns: Optional list of COLUMNS to read, e.g. ['axes'];
+            defaults to every column. Time is always read
+        :return: ProgramTrajectory
+        """
+        _check_numpy()
+        if not command_dicts:
+            return cls(np.empty(0))
+        first = command_dicts[0]
+
+        def _column(key):
+            if key not in first:
+                return None
+            if columns is not None and _COMMAND_DICT_KEYS[key] not in columns:
+                return None
+            return [command_dict[key] for command_dict in command_dicts]
+
+        external_axes = _column(postproc.EXTERNAL_AXES)
+        if external_axes is not None:
+            external_axes = [[np.nan if value is None else value for value in row]
+                             for row in external_axes]
+
+        digital_outputs = None
+        digital_output_ids = None
+        rows = _column(postproc.DIGITAL_OUTPUT)
+        if rows is not None:
+            digital_output_ids = [output.identifier for output in rows[0]]
+            digital_outputs = [sum(int(output.value) << bit for bit, output in enumerate(row))
+                               for row in rows]
+
+        analog_outputs = None
+        analog_output_ids = None
+        rows = _column(postproc.ANALOG_OUTPUT)
+        if rows is not None:
+            analog_output_ids = [output.identifier for output in rows[0]]
+            analog_outputs = np.array([[output.value for output in row] for row in rows],
+                                      dtype=float).reshape(len(rows), len(analog_output_ids))
+
+        return cls([command_dict[postproc.TIME_INDEX] for command_dict in command_dicts],
+                   frames=_column('Frame'),
+                   framerates=_column('Framerate'),
+                   axes=_column(postproc.AXES),
+                   external_axes=external_axes,
+                   pose=_column(postproc.POSE),
+                   configuration=_column(postproc.CONFIGURATION),
+                   digital_outputs=digital_outputs,
+                   digital_output_ids=digital_output_ids,
+                   analog_outputs=analog_outputs,
+                   analog_output_ids=analog_output_ids)
+
+    def to_command_dicts(self):
+        """
+        Convert the trajectory to legacy command dicts.
+        :return: List of command dicts
+        """
+        return list(self.iter_command_dicts())
+
+    def iter_command_dicts(self):
+        """
+        Iterate over the trajectory as legacy command dicts, one at a time.
+        :return: Generator of command dicts
+        """
+        time = self.time.tolist()
+        frames = _to_list(self.frames)
+        framerates = _to_list(self.framerates)
+        axes = _to_list(self.axes)
+        pose = _to_list(self.pose)
+        configuration = _to_list(self.configuration)
+        external_axes = None
+        if self.external_axes is not None:
+            external_axes = self.external_axes.data.astype(object)
+            external_axes[np.ma.getmaskarray(self.external_axes)] = None
+            external_axes = external_axes.tolist()
+        digital_outputs = None
+        if self.digital_outputs is not None:
+            digital_outputs = self.get_digital_output_values().tolist()
+        analog_outputs = _to_list(self.analog_outputs)
+
+        for i in range(len(time)):
+            command_dict = {}
+            if frames is not None:
+                command_dict['Frame'] = frames[i]
+            if framerates is not None:
+                command_dict['Framerate'] = framerates[i]
+            command_dict[postproc.TIME_INDEX] = time[i]
+            if axes is not None:
+                command_dict[postproc.AXES] = postproc.Axes(*axes[i])
+            if pose is not None:
+                command_dict[postproc.POSE] = postproc.Pose(*pose[i])
+            if external_axes is not None:
+                command_dict[postproc.EXTERNAL_AXES] = postproc.ExternalAxes(*external_axes[i])
+            if configuration is not None:
+                command_dict[postproc.CONFIGURATION] = postproc.Configuration(*configuration[i])
+            if digital_outputs is not None:
+                command_dict[postproc.DIGITAL_OUTPUT] = [
+                    postproc.DigitalOutput(identifier, value)
+                    for identifier, value in zip(self.digital_output_ids, digital_outputs[i])]
+            if analog_outputs is not None:
+                command_dict[postproc.ANALOG_OUTPUT] = [
+                    postproc.AnalogOutput(identifier, value)
+                    for identifier, value in zip(self.analog_output_ids, analog_outputs[i])]
+            yield command_dict
+
+
+def _as_column(values, shape, dtype=float):
+    """
+    Convert values to an array of the given shape, or pass None through.
+    :param values: Array-like or None
+    :param shape: Expected shape
+    :param dtype: Array type
+    :return:
+    """
+    if values is None:
+        return None
+    return _check_shape(np.asarray(values, dtype=dtype), shape)
+
+
+def _check_shape(values, shape):
+    """
+    Check the shape of an array.
+    :param values: Array
+    :param shape: Expected shape
+    :return: values
+    """
+    if values.shape != shape:
+        raise ValueError('Expected an array of shape {}; got {}'.format(shape, values.shape))
+    return values
+
+
+def _to_list(values):
+    """
+    Convert an array to nested lists of Python values, or pass None through.
+    :param values: Array or None
+    :return:
+    """
+    return None if values is None else values.tolist()
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required for trajectories, is not
+    available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for program trajectories')
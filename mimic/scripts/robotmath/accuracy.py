@@ -0,0 +1,353 @@
+#!usr/bin/env python
+"""
+IK/FK round-trip accuracy suite.
+
+Generates random axis configurations for sample spherical wrist and
+Hawkins-Keating robots, computes their poses with forward_kinematics, solves
+them back with inverse_kinematics.solve() and reports the maximum joint and
+pose errors, the solver's throughput and the worst-case poses. Besides
+uniformly random configurations, each robot is sampled close to its wrist
+singularity (axis 5 near zero) and to full arm extension, where the
+closed-form math is the least stable.
+
+Run headless from the scripts directory (exits with status 1 if any error
+exceeds the tolerances):
+
+    mayapy -m robotmath.accuracy
+    python -m robotmath.accuracy
+"""
+
+import math
+import sys
+import time
+
+from robotmath import forward_kinematics
+from robotmath import inverse_kinematics
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; the accuracy suite is unavailable
+    np = None
+
+# Sample robots as (solver_type, robot_definition)
+SAMPLE_ROBOTS = {
+    'Spherical Wrist (IRB 6700-like)': (0, [320, 200, 0, 780, 1135, 1182.5, 200]),
+    'Hawkins-Keating (UR10-like)': (1, [127.3, 163.941, 115.7, 92.2, 612, 572.3, 0]),
+}
+
+# Sampled regions of the joint space
+REGIONS = ['random', 'wrist singularity', 'arm extension']
+
+# Default tolerances; pose errors in mm and degrees, joint errors in degrees.
+# The spherical wrist solver rounds cos(theta5) to 8 decimals, which limits
+# the precision of theta5 to about 5e-9 / |sin(theta5)| radians
+POSE_TOLERANCE = 1e-4
+JOINT_TOLERANCE = 1e-4
+
+# Configurations within this many degrees of a singularity are checked
+# against SINGULAR_POSE_TOLERANCE and their joint errors are not checked:
+# the solved axes are ill-conditioned there, and the rounding of cos(theta5)
+# limits theta5 to ~0.006 degrees
+SINGULARITY_ZONE = 1.0
+SINGULAR_POSE_TOLERANCE = 0.05
+
+# Distance from the singular configurations (degrees) sampled for the
+# 'wrist singularity' and 'arm extension' regions
+NEAR_SINGULARITY_MIN = 1e-4
+NEAR_SINGULARITY_MAX = 1.0
+
+
+def sample_axes(robot_definition, solver_type, number, region='random', rng=None):
+    """
+    Generate random axis configurations in the solver's convention.
+    :param robot_definition: list; robot geometry as stored on the rig
+    :param solver_type: int; 0 = Spherical Wrist, 1 = Hawkins-Keating
+    :param number: int; number of configurations
+    :param region: str; one of REGIONS
+    :param rng: numpy.random.Generator
+    :return: (number, 6) numpy array of axis values in degrees
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    thetas = rng.uniform(-175, 175, (number, 6))
+
+    # Signed distance from the singular configuration, log-uniform so that
+    # very close configurations are well represented
+    distance = np.exp(rng.uniform(math.log(NEAR_SINGULARITY_MIN),
+                                  math.log(NEAR_SINGULARITY_MAX),
+                                  number))
+    distance *= rng.choice([-1, 1], number)
+
+    if region == 'wrist singularity':
+        thetas[:, 4] = distance
+    elif region == 'arm extension':
+        thetas[:, 2] = get_extended_axis_3(robot_definition, solver_type) + distance
+    elif region != 'random':
+        raise ValueError('Unknown region: {}'.format(region))
+
+    return thetas
+
+
+def get_extended_axis_3(robot_definition, solver_type):
+    """
+    Get the value of axis 3 for which the arm is fully extended, i.e. the
+    upper arm and the forearm (to the wrist pivot) are collinear.
+    :return: float; axis value in degrees
+    """
+    if solver_type == 1:  # Hawkins-Keating Solver (e.g. UR)
+        return 0.0
+    # Spherical Wrist Solver
+    return math.degrees(inverse_kinematics.get_spherical_wrist_geometry(robot_definition).phi)
+
+
+def near_singularity(thetas, robot_definition, solver_type, zone=SINGULARITY_ZONE):
+    """
+    Find the configurations close to the wrist singularities (axis 5 at 0
+    or 180 degrees) or to full arm extension.
+    :param thetas: (N, 6) array of axis values in degrees
+    :param zone: float; distance from the singularities in degrees
+    :return: (N,) numpy array of bools
+    """
+    extended = get_extended_axis_3(robot_definition, solver_type)
+    wrist = (_angle_difference(thetas[:, 4], 0) <= zone) | (_angle_difference(thetas[:, 4], 180) <= zone)
+    arm = _angle_difference(thetas[:, 2], extended) <= zone
+    return wrist | arm
+
+
+def run_round_trip(robot_definition, solver_type, number=2000, region='random', seed=0, worst=5):
+    """
+    Run FK then IK on random axis configurations and measure the errors of
+    inverse_kinematics.solve().
+
+    Joint errors compare the solved axes to the sampled ones, using the
+    branch closest to the sampled axes. Near the singularities the axes are
+    ill-conditioned (e.g. only the sum of axes 4 and 6 is defined at the
+    wrist singularity), so errors of configurations near them are reported
+    separately and only their pose errors (the pose of the solved axes
+    against the sampled pose) are meaningful. When every configuration is
+    near a singularity no joints are checked, and the max joint, position
+    and rotation errors away from the singularities are None.
+    :param robot_definition: list; robot geometry as stored on the rig
+    :param solver_type: int; 0 = Spherical Wrist, 1 = Hawkins-Keating
+    :param number: int; number of configurations
+    :param region: str; one of REGIONS
+    :param seed: int; random seed
+    :param worst: int; number of worst-case poses to report
+    :return: dict of results
+    """
+    _check_numpy()
+
+    rng = np.random.default_rng(seed)
+    thetas = sample_axes(robot_definition, solver_type, number, region, rng)
+
+    # A random tool and local base frame, to exercise the frame conversions
+    tcp, tcp_mat = _random_frame(rng)
+    lcs, lcs_mat = _random_frame(rng)
+
+    tcp_rot, tcp_point = forward_kinematics.solve(thetas, robot_definition, solver_type, tcp, tcp_mat)
+    target, target_mat = forward_kinematics.get_maya_target(tcp_rot, tcp_point, solver_type, lcs, lcs_mat)
+
+    # Find the branch of each pose that matches the sampled axes
+    all_thetas, _ = inverse_kinematics.solve_all_batch(tcp, tcp_mat, lcs, lcs_mat, target, target_mat,
+                                                       robot_definition, solver_type)
+    # Unreachable branches are rows of NaN
+    branch_errors = _angle_difference(all_thetas, thetas[:, np.newaxis, :])
+    branch_errors = np.max(np.where(np.isnan(branch_errors), np.inf, branch_errors), axis=-1)
+    branches = np.argmin(branch_errors, axis=-1)
+
+    tcp = tcp.tolist()
+    tcp_mat = tcp_mat.tolist()
+    lcs = lcs.tolist()
+    lcs_mat = lcs_mat.tolist()
+    target = target.tolist()
+    target_mat = target_mat.tolist()
+    configs = [inverse_kinematics.SOLUTION_CONFIGS[i] for i in branches]
+
+    # Solve every pose with the scalar solver
+    solved = np.full((number, 6), np.nan)
+    failures = 0
+    start = time.perf_counter()
+    for i in range(number):
+        try:
+            solved[i] = inverse_kinematics.solve(tcp, tcp_mat, lcs, lcs_mat, target[i], target_mat[i],
+                                                 robot_definition, solver_type, configs[i])
+        except (ValueError, ZeroDivisionError):
+            failures += 1
+    elapsed = time.perf_counter() - start
+
+    joint_errors = np.max(_angle_difference(solved, thetas), axis=-1)
+
+    solved_rot, solved_point = forward_kinematics.solve(solved, robot_definition, solver_type, tcp, tcp_mat)
+    position_errors = np.linalg.norm(solved_point - tcp_point, axis=-1)
+    rotation_errors = _rotation_difference(solved_rot, tcp_rot)
+    pose_errors = np.maximum(position_errors, rotation_errors)
+    singular = near_singularity(thetas, robot_definition, solver_type)
+    regular = ~singular
+    joint_checked_poses = int(np.count_nonzero(regular))
+
+    # Failed solves rank first among the worst cases
+    ranking = np.where(np.isnan(pose_errors), np.inf, pose_errors)
+    worst_indices = np.argsort(ranking)[::-1][:worst]
+    worst_poses = [{'axes': thetas[i].tolist(),
+                    'solved': solved[i].tolist(),
+                    'config': configs[i],
+                    'singular': bool(singular[i]),
+                    'joint_error': float(joint_errors[i]),
+                    'position_error': float(position_errors[i]),
+                    'rotation_error': float(rotation_errors[i])}
+                   for i in worst_indices]
+
+    return {'region': region,
+            'number': number,
+            'failures': failures,
+            'singular_poses': int(np.count_nonzero(singular)),
+            'joint_checked_poses': joint_checked_poses,
+            'max_joint_error': _nanmax(joint_errors[regular]) if joint_checked_poses else None,
+            'max_position_error': _nanmax(position_errors[regular]) if joint_checked_poses else None,
+            'max_rotation_error': _nanmax(rotation_errors[regular]) if joint_checked_poses else None,
+            'max_singular_position_error': _nanmax(position_errors[singular]),
+            'max_singular_rotation_error': _nanmax(rotation_errors[singular]),
+            'solves_per_second': number / elapsed,
+            'worst_poses': worst_poses}
+
+
+def run(number=2000, seed=0, pose_tolerance=POSE_TOLERANCE, joint_tolerance=JOINT_TOLERANCE,
+        singular_pose_tolerance=SINGULAR_POSE_TOLERANCE, verbose=True):
+    """
+    Run the round trip for every sample robot and region.
+    :param number: int; number of configurations per robot and region
+    :param seed: int; random seed
+    :param pose_tolerance: float; max position (mm) and rotation (deg) error
+    :param joint_tolerance: float; max joint error (deg)
+    :param singular_pose_tolerance: float; max position (mm) and rotation
+        (deg) error near singularities
+    :param verbose: bool; print a report
+    :return: tuple (bool passed, dict of results by robot and region)
+    """
+    passed = True
+    results = {}
+    unchecked_joints = []
+
+    for robot, (solver_type, robot_definition) in sorted(SAMPLE_ROBOTS.items()):
+        results[robot] = {}
+        for region in REGIONS:
+            result = run_round_trip(robot_definition, solver_type, number, region, seed)
+            results[robot][region] = result
+
+            # Regions with no configuration away from the singularities
+            # can't fail on joints, so they are listed in the report
+            if result['max_joint_error'] is None:
+                unchecked_joints.append('{} - {}'.format(robot, region))
+
+            region_passed = result['failures'] == 0 \
+                and (result['max_joint_error'] is None
+                     or (result['max_joint_error'] <= joint_tolerance
+                         and result['max_position_error'] <= pose_tolerance
+                         and result['max_rotation_error'] <= pose_tolerance)) \
+                and result['max_singular_position_error'] <= singular_pose_tolerance \
+                and result['max_singular_rotation_error'] <= singular_pose_tolerance
+            passed = passed and region_passed
+
+            if verbose:
+                _print_result(robot, result, region_passed)
+
+    if verbose:
+        print('PASSED' if passed else 'FAILED')
+        if unchecked_joints:
+            print('Joint errors not checked (every pose near a singularity): {}'.format(
+                ', '.join(unchecked_joints)))
+
+    return passed, results
+
+
+def _print_result(robot, result, passed):
+    print('{} - {}: {}'.format(robot, result['region'], 'ok' if passed else 'FAILED'))
+    print('  solves/sec          : {:12.0f}'.format(result['solves_per_second']))
+    print('  failures            : {:12d}'.format(result['failures']))
+    print('  joint-checked poses : {:12d}'.format(result['joint_checked_poses']))
+    print('  max joint error     : {}'.format(_format_error(result['max_joint_error'], 'deg')))
+    print('  max position error  : {}'.format(_format_error(result['max_position_error'], 'mm')))
+    print('  max rotation error  : {}'.format(_format_error(result['max_rotation_error'], 'deg')))
+    print('  near singularities  : {:12d} poses'.format(result['singular_poses']))
+    print('    max position error: {:12.3e} mm'.format(result['max_singular_position_error']))
+    print('    max rotation error: {:12.3e} deg'.format(result['max_singular_rotation_error']))
+    print('  worst poses:')
+    for pose in result['worst_poses']:
+        print('    axes {} config {}{}: joint {:.3e}, position {:.3e}, rotation {:.3e}'.format(
+            ', '.join('{:.4f}'.format(a) for a in pose['axes']),
+            pose['config'],
+            ' (singular)' if pose['singular'] else '',
+            pose['joint_error'],
+            pose['position_error'],
+            pose['rotation_error']))
+
+
+def _format_error(error, unit):
+    """
+    Format a max error for the report; N/A if no pose was checked.
+    """
+    if error is None:
+        return '{:>12}'.format('N/A')
+    return '{:12.3e} {}'.format(error, unit)
+
+
+def _random_frame(rng):
+    """
+    Random rigid transform as a translation and a flat Maya matrix.
+    """
+    q = rng.normal(size=4)
+    w, x, y, z = q / np.linalg.norm(q)
+    rot = np.array([[1 - 2 * (y * y + z * z), 2 * (x * y + w * z), 2 * (x * z - w * y)],
+                    [2 * (x * y - w * z), 1 - 2 * (x * x + z * z), 2 * (y * z + w * x)],
+                    [2 * (x * z + w * y), 2 * (y * z - w * x), 1 - 2 * (x * x + y * y)]])
+    translation = rng.uniform(-100, 100, 3)
+    mat = np.eye(4)
+    mat[:3, :3] = rot
+    mat[3, :3] = translation
+    return translation, mat.reshape(16)
+
+
+def _angle_difference(a, b):
+    """
+    Absolute difference between angles in degrees, wrapped to [0, 180].
+    """
+    return np.abs((a - b + 180) % 360 - 180)
+
+
+def _rotation_difference(a, b):
+    """
+    Angle in degrees of the rotation between two arrays of rotations.
+    """
+    # Use atan2 rather than arccos of the trace, which loses precision for
+    # small angles
+    r = np.matmul(np.swapaxes(a, -1, -2), b)
+    cos = (np.trace(r, axis1=-2, axis2=-1) - 1) / 2
+    sin = np.linalg.norm(np.stack([r[..., 2, 1] - r[..., 1, 2],
+                                   r[..., 0, 2] - r[..., 2, 0],
+                                   r[..., 1, 0] - r[..., 0, 1]], axis=-1), axis=-1) / 2
+    return np.degrees(np.arctan2(sin, cos))
+
+
+def _nanmax(values):
+    """
+    Max of an array ignoring NaN; 0 for empty arrays.
+    """
+    if not np.any(~np.isnan(values)):
+        return 0.0
+    return float(np.nanmax(values))
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required by the accuracy suite,
+    is not available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for the accuracy suite; '
+                          'see Mimic installation instructions for more details')
+
+
+if __name__ == '__main__':
+    sys.exit(0 if run()[0] else 1)
@@ -0,0 +1,223 @@
+#!usr/bin/env python
+"""
+Benchmarks for the robotmath kernels.
+
+Compares the per-call cost of inverse_kinematics.compute_flange against the
+list-of-lists implementation it replaced, and checks that both produce the
+same result, and the per-call cost of inverse_kinematics.solve() against a
+reused SolverContext. Run from Maya's Script Editor or headless from the scripts
+directory:
+
+    mayapy -m robotmath.benchmark
+    python -m robotmath.benchmark
+"""
+
+import math
+import random
+import timeit
+
+from robotmath import inverse_kinematics
+from robotmath import small_matrix
+
+
+# Reference implementation
+def _reference_array_mult(X, Y):
+    result = [[0] * len(Y[0]) for i in range(len(X))]
+    for i in range(len(X)):
+        for j in range(len(Y[0])):
+            for k in range(len(Y)):
+                result[i][j] += X[i][k] * Y[k][j]
+    return result
+
+
+def _reference_tpose(lis):
+    return [list(x) for x in zip(*lis)]
+
+
+def _reference_maya_rot(mat):
+    x_axis = [[mat[0]], [mat[1]], [mat[2]]]
+    y_axis = [[mat[4]], [mat[5]], [mat[6]]]
+    z_axis = [[mat[8]], [mat[9]], [mat[10]]]
+    return _reference_tpose([_reference_tpose(x_axis)[0],
+                             _reference_tpose(y_axis)[0],
+                             _reference_tpose(z_axis)[0]])
+
+
+def _reference_compute_flange(tcp, tcp_mat, lcs, lcs_mat, target, target_mat,
+                              r_tool, r_world, pivot_vector=None):
+    """
+    List-of-lists compute_flange, kept as the baseline for benchmarks.
+    :param pivot_vector: 3x1 list of list, or None
+    :return: flange_rot, flange_point, pivot_point
+    """
+    mult = _reference_array_mult
+    tpose = _reference_tpose
+
+    tcp_trans = mult(r_tool, [[tcp[0]], [tcp[1]], [tcp[2]]])
+    lcs_trans = mult(r_world, [[lcs[0]], [lcs[1]], [lcs[2]]])
+    target_point = mult(r_world, [[target[0]], [target[1]], [target[2]]])
+
+    tcp_rot = tpose(mult(r_tool, _reference_maya_rot(tcp_mat)))
+    lcs_rot = tpose(mult(r_world, _reference_maya_rot(lcs_mat)))
+    target_rot = tpose(mult(r_world, _reference_maya_rot(target_mat)))
+
+    _re = mult(tpose(target_rot), tcp_rot)
+    _rlm = mult(r_world, lcs_rot)
+
+    target_point = [i - j for i, j in zip(tpose(target_point)[0],
+                                          tpose(lcs_trans)[0])]
+    flange_point = [i - j for i, j in zip(target_point,
+                                          tpose(mult(_re, tcp_trans))[0])]
+
+    if pivot_vector:
+        pivot_point = [i - j for i, j in zip(flange_point,
+                                             tpose(mult(_re, pivot_vector))[0])]
+        pivot_point = tpose(mult(_rlm, [[pivot_point[0]],
+                                        [pivot_point[1]],
+                                        [pivot_point[2]]]))[0]
+    else:
+        pivot_point = None
+
+    flange_point = tpose(mult(_rlm, [[flange_point[0]],
+                                     [flange_point[1]],
+                                     [flange_point[2]]]))[0]
+    flange_rot = mult(_rlm, _re)
+
+    return flange_rot, flange_point, pivot_point
+
+
+# Benchmark inputs
+def random_maya_matrix(rng=random):
+    """
+    Build a random rigid transform in Maya's flat 16-value matrix layout.
+    :param rng: random.Random instance
+    :return: list of 16 floats
+    """
+    q = [rng.gauss(0, 1) for _ in range(4)]
+    n = math.sqrt(sum(v * v for v in q))
+    w, x, y, z = [v / n for v in q]
+    # Rows of the rotation matrix are the axes of the frame, as in Maya
+    rot = (1 - 2 * (y * y + z * z), 2 * (x * y + w * z), 2 * (x * z - w * y),
+           2 * (x * y - w * z), 1 - 2 * (x * x + z * z), 2 * (y * z + w * x),
+           2 * (x * z + w * y), 2 * (y * z - w * x), 1 - 2 * (x * x + y * y))
+    translation = [rng.uniform(-100, 100) for _ in range(3)]
+    return list(rot[0:3]) + [0.0] + list(rot[3:6]) + [0.0] + \
+        list(rot[6:9]) + [0.0] + translation + [1.0]
+
+
+def random_flange_inputs(rng=random):
+    """
+    Build random compute_flange inputs.
+    :param rng: random.Random instance
+    :return: tuple (tcp, tcp_mat, lcs, lcs_mat, target, target_mat)
+    """
+    inputs = []
+    for _ in range(3):
+        mat = random_maya_matrix(rng)
+        inputs.extend([mat[12:15], mat])
+    return tuple(inputs)
+
+
+def _max_difference(a, b):
+    a = small_matrix.mat3_from_rows(a[0]) + tuple(a[1]) + tuple(a[2])
+    b = small_matrix.mat3_from_rows(b[0]) + tuple(b[1]) + tuple(b[2])
+    return max(abs(i - j) for i, j in zip(a, b))
+
+
+def benchmark_compute_flange(number=20000, seed=0):
+    """
+    Time compute_flange against the list-of-lists reference implementation.
+    :param number: Number of calls to time for each implementation
+    :param seed: Seed for the random inputs
+    :return: dict with per-call costs in microseconds, the speedup, and the
+        maximum absolute difference between both results
+    """
+    rng = random.Random(seed)
+    r_tool, r_world = inverse_kinematics.get_solver_frames(0)
+    c4 = 100.0
+    cases = [random_flange_inputs(rng) for _ in range(100)]
+
+    max_diff = 0.0
+    for case in cases:
+        new = inverse_kinematics.compute_flange(*case, r_tool=r_tool, r_world=r_world,
+                                                pivot_vector=[0, 0, c4])
+        old = _reference_compute_flange(*case, r_tool=r_tool, r_world=r_world,
+                                        pivot_vector=[[0], [0], [c4]])
+        max_diff = max(max_diff, _max_difference(new, old))
+
+    case = cases[0]
+
+    def _new():
+        inverse_kinematics.compute_flange(*case, r_tool=r_tool, r_world=r_world,
+                                          pivot_vector=[0, 0, c4])
+
+    def _old():
+        _reference_compute_flange(*case, r_tool=r_tool, r_world=r_world,
+                                  pivot_vector=[[0], [0], [c4]])
+
+    new_time = min(timeit.repeat(_new, number=number, repeat=3)) / number * 1e6
+    old_time = min(timeit.repeat(_old, number=number, repeat=3)) / number * 1e6
+
+    return {'reference_us': old_time,
+            'kernel_us': new_time,
+            'speedup': old_time / new_time,
+            'max_difference': max_diff}
+
+
+def benchmark_solver_context(number=20000, seed=0):
+    """
+    Time inverse_kinematics.solve() against SolverContext.solve() for the
+    same pose.
+    :param number: Number of calls to time for each implementation
+    :param seed: Seed for the random inputs
+    :return: dict with per-call costs in microseconds and the speedup
+    """
+    rng = random.Random(seed)
+    robot_definition = [175, 890, 0, 575, 890, 1035, 185]  # Spherical wrist
+    context = inverse_kinematics.SolverContext(robot_definition, 0)
+
+    # Find a reachable pose
+    while True:
+        case = random_flange_inputs(rng)
+        try:
+            inverse_kinematics.solve(*case, robot_definition=robot_definition, solver_type=0)
+            break
+        except (ValueError, ZeroDivisionError):
+            continue
+
+    def _solve():
+        inverse_kinematics.solve(*case, robot_definition=robot_definition, solver_type=0)
+
+    def _context():
+        context.solve(case, offsets=False)
+
+    solve_time = min(timeit.repeat(_solve, number=number, repeat=3)) / number * 1e6
+    context_time = min(timeit.repeat(_context, number=number, repeat=3)) / number * 1e6
+
+    return {'solve_us': solve_time,
+            'context_us': context_time,
+            'speedup': solve_time / context_time}
+
+
+def run():
+    """
+    Run all benchmarks and print the results.
+    :return:
+    """
+    result = benchmark_compute_flange()
+    print('compute_flange')
+    print('  list-of-lists : {:8.2f} us/call'.format(result['reference_us']))
+    print('  small_matrix  : {:8.2f} us/call'.format(result['kernel_us']))
+    print('  speedup       : {:8.2f}x'.format(result['speedup']))
+    print('  max difference: {:.3e}'.format(result['max_difference']))
+
+    context_result = benchmark_solver_context()
+    print('solve')
+    print('  solve()       : {:8.2f} us/call'.format(context_result['solve_us']))
+    print('  SolverContext : {:8.2f} us/call'.format(context_result['context_us']))
+    print('  speedup       : {:8.2f}x'.format(context_result['speedup']))
+    return result, context_result
+
+
+if __name__ == '__main__':
+    run()
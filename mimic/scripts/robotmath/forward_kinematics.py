@@ -0,0 +1,300 @@
+#!usr/bin/env python
+"""
+Forward kinematics solver
+
+Computes flange and TCP poses from axis values, without reading transforms
+back from Maya. Every function works on (N, 6) arrays of axis values so that
+whole programs can be solved at once, and uses the same robot_definition
+layout and solver frames as inverse_kinematics:
+
+    Spherical Wrist (solver_type 0):  [a1, a2, b, c1, c2, c3, c4]
+    Hawkins-Keating (solver_type 1):  [d1, d4, d5, d6, a2, a3, 0]
+
+Axis values are in degrees and, unless axis offsets and rotation directions
+are given, in the solver's convention (i.e. as returned by
+inverse_kinematics.solve() before apply_offsets()).
+"""
+
+import math
+
+from robotmath import inverse_kinematics
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; forward kinematics is unavailable
+    np = None
+
+# Keys of the robot definition dictionary from rigging_utils, in the order of
+# the robot definition list
+ROBOT_DEFINITION_KEYS = ['a1', 'a2', 'b', 'c1', 'c2', 'c3', 'c4']
+
+
+def solve(thetas, robot_definition, solver_type, tcp=None, tcp_mat=None, axis_offsets=None, rot_directions=None):
+    """
+    Compute the TCP pose (or the flange pose, if no TCP is given) of N sets
+    of axis values in the solver's world frame.
+    :param thetas: (N, 6) or (6,) array of axis values in degrees
+    :param robot_definition: list or dict; robot geometry as stored on the rig
+    :param solver_type: int; 0 = Spherical Wrist, 1 = Hawkins-Keating
+    :param tcp: (N, 3) or (3,) array; TCP translation w.r.t. the tool flange
+    :param tcp_mat: (N, 16), (N, 4, 4), (16,) or (4, 4) array; Maya TCP matrix
+    :param axis_offsets: list of 6 axis offsets; if given, thetas are the
+        robot's axis values and the offsets are removed before solving
+    :param rot_directions: list of 6 bools; True if an axis is flipped
+    :return rot: (N, 3, 3) numpy array; rotation in solver world frame
+    :return point: (N, 3) numpy array; position in solver world frame
+    """
+    flange_rot, flange_point = solve_flange(thetas,
+                                            robot_definition,
+                                            solver_type,
+                                            axis_offsets,
+                                            rot_directions)
+    if tcp is None:
+        return flange_rot, flange_point
+
+    return compute_tcp(flange_rot, flange_point, tcp, tcp_mat, solver_type)
+
+
+def solve_flange(thetas, robot_definition, solver_type, axis_offsets=None, rot_directions=None):
+    """
+    Compute the flange pose of N sets of axis values in the solver's world
+    frame; the inverse of the flange quantities that inverse_kinematics
+    solves from.
+    :param thetas: (N, 6) or (6,) array of axis values in degrees
+    :param robot_definition: list or dict; robot geometry as stored on the rig
+    :param solver_type: int; 0 = Spherical Wrist, 1 = Hawkins-Keating
+    :param axis_offsets: list of 6 axis offsets; if given, thetas are the
+        robot's axis values and the offsets are removed before solving
+    :param rot_directions: list of 6 bools; True if an axis is flipped
+    :return flange_rot: (N, 3, 3) numpy array
+    :return flange_point: (N, 3) numpy array
+    """
+    _check_numpy()
+
+    robot_definition = get_robot_definition_list(robot_definition)
+    thetas = np.atleast_2d(np.asarray(thetas, dtype=float))
+
+    if axis_offsets is not None:
+        thetas = remove_offsets_batch(thetas, axis_offsets, rot_directions)
+
+    if solver_type == 1:  # Hawkins-Keating Solver (e.g. UR)
+        return solve_hawkins_keating(robot_definition, thetas)
+    elif solver_type == 0:  # Spherical Wrist Solver
+        return solve_spherical_wrist(robot_definition, thetas)
+
+    raise ValueError('Unsupported solver type: {}'.format(solver_type))
+
+
+def solve_spherical_wrist(robot_definition, thetas):
+    """
+    Forward kinematics of a robot with an ortho-parallel basis and a
+    spherical wrist, following the notation of the inverse solver; see
+    references/IKSphericalWrist.pdf.
+    :param robot_definition: list [a1, a2, b, c1, c2, c3, c4]
+    :param thetas: (..., 6) array of axis values in degrees
+    :return flange_rot: (..., 3, 3) numpy array
+    :return flange_point: (..., 3) numpy array
+    """
+    geometry = inverse_kinematics.get_spherical_wrist_geometry(robot_definition)
+
+    t = np.radians(thetas)
+    theta_1 = t[..., 0]
+    theta_2 = t[..., 1]
+    theta_23 = t[..., 1] + t[..., 2]
+
+    # Wrist pivot point in the plane of the arm, then rotated by axis 1
+    cx1 = geometry.c2 * np.sin(theta_2) + geometry.k * np.sin(theta_23 - geometry.phi) + geometry.a1
+    cy1 = geometry.b
+    cz1 = geometry.c2 * np.cos(theta_2) + geometry.k * np.cos(theta_23 - geometry.phi) + geometry.c1
+
+    sin_1 = np.sin(theta_1)
+    cos_1 = np.cos(theta_1)
+    pivot_point = np.stack([cx1 * cos_1 - cy1 * sin_1,
+                            cx1 * sin_1 + cy1 * cos_1,
+                            cz1], axis=-1)
+
+    # Flange rotation; R_z(theta_1) * R_y(theta_2 + theta_3) for the arm and
+    # R_z(theta_4) * R_y(theta_5) * R_z(theta_6) for the wrist
+    r_arm = np.matmul(_rot_z(theta_1), _rot_y(theta_23))
+    r_wrist = np.matmul(np.matmul(_rot_z(t[..., 3]), _rot_y(t[..., 4])), _rot_z(t[..., 5]))
+    flange_rot = np.matmul(r_arm, r_wrist)
+
+    # The flange is c4 along the flange's z axis from the pivot point
+    flange_point = pivot_point + geometry.c4 * flange_rot[..., :, 2]
+
+    return flange_rot, flange_point
+
+
+def solve_hawkins_keating(robot_definition, thetas):
+    """
+    Forward kinematics of a "co-bot" (e.g. Universal Robots) from its D-H
+    parameters, following the conventions of the inverse solver; see
+    references/IKHawkins.pdf and references/IKKeating.pdf.
+    :param robot_definition: list [d1, d4, d5, d6, a2, a3, ...]
+    :param thetas: (..., 6) array of axis values in degrees
+    :return flange_rot: (..., 3, 3) numpy array
+    :return flange_point: (..., 3) numpy array
+    """
+    geometry = inverse_kinematics.get_hawkins_keating_geometry(robot_definition)
+
+    t = np.radians(thetas)
+
+    # D-H parameters; the inverse solver measures a_2 and a_3 as positive
+    # lengths and theta_6 is offset by 180 degrees (see solve_hawkins_keating)
+    d = [geometry.d_1, 0, 0, geometry.d_4, geometry.d_5, geometry.d_6]
+    a = [0, -geometry.a_2, -geometry.a_3, 0, 0, 0]
+    alpha = [math.pi / 2, 0, 0, math.pi / 2, -math.pi / 2, 0]
+    theta_offsets = [0, 0, 0, 0, 0, math.pi]
+
+    transform = None
+    for i in range(6):
+        link = _dh_transform(t[..., i] + theta_offsets[i], d[i], a[i], alpha[i])
+        transform = link if transform is None else np.matmul(transform, link)
+
+    return transform[..., :3, :3], transform[..., :3, 3]
+
+
+def compute_tcp(flange_rot, flange_point, tcp, tcp_mat, solver_type):
+    """
+    Compute the TCP pose in the solver's world frame from a flange pose.
+    :param flange_rot: (N, 3, 3) array
+    :param flange_point: (N, 3) array
+    :param tcp: (N, 3) or (3,) array; TCP translation w.r.t. the tool flange
+    :param tcp_mat: (N, 16), (N, 4, 4), (16,) or (4, 4) array; Maya TCP matrix
+    :param solver_type: int; 0 = Spherical Wrist, 1 = Hawkins-Keating
+    :return tcp_rot: (N, 3, 3) numpy array; columns are the TCP's axes
+    :return tcp_point: (N, 3) numpy array
+    """
+    r_tool = np.asarray(_get_solver_frames(solver_type)[0], dtype=float)
+
+    tcp = np.asarray(tcp, dtype=float)
+    tcp_rot = inverse_kinematics._rotation_from_maya_batch(tcp_mat)
+
+    # Convert the TCP from Maya's tool frame to the solver's tool frame
+    tcp_trans = np.einsum('ij,...j->...i', r_tool, tcp)
+    tool_rot = np.matmul(r_tool, np.swapaxes(tcp_rot, -1, -2))
+
+    tcp_point = flange_point + np.einsum('...ij,...j->...i', flange_rot, tcp_trans)
+    tcp_rot = np.matmul(flange_rot, tool_rot)
+
+    return tcp_rot, tcp_point
+
+
+def get_maya_target(tcp_rot, tcp_point, solver_type, lcs=None, lcs_mat=None):
+    """
+    Convert TCP poses in the solver's world frame to the Maya target inputs
+    of inverse_kinematics.solve(), e.g. to validate IK against FK.
+    :param tcp_rot: (N, 3, 3) array, as returned by compute_tcp()
+    :param tcp_point: (N, 3) array, as returned by compute_tcp()
+    :param solver_type: int; 0 = Spherical Wrist, 1 = Hawkins-Keating
+    :param lcs: (N, 3) or (3,) array; local base frame translation. Defaults
+        to the robot's world frame origin
+    :param lcs_mat: (N, 16), (N, 4, 4), (16,) or (4, 4) array; Maya local
+        base frame matrix. Defaults to identity
+    :return target: (N, 3) numpy array
+    :return target_mat: (N, 16) numpy array; Maya target matrix
+    """
+    r_world = np.asarray(_get_solver_frames(solver_type)[1], dtype=float)
+
+    if lcs is None:
+        lcs = np.zeros(3)
+    if lcs_mat is None:
+        lcs_mat = np.eye(4)
+    lcs = np.asarray(lcs, dtype=float)
+    lcs_rot = inverse_kinematics._rotation_from_maya_batch(lcs_mat)
+
+    # Undo the solver's world frame, then the local base frame. Maya matrices
+    # store each axis as a row
+    base_rot = np.matmul(np.swapaxes(lcs_rot, -1, -2), r_world.T)
+    target = lcs + np.einsum('...ij,...j->...i', base_rot, tcp_point)
+    target_rot = np.swapaxes(np.matmul(base_rot, tcp_rot), -1, -2)
+
+    shape = np.broadcast_shapes(np.atleast_2d(target).shape[:-1], target_rot.shape[:-2])
+    target = np.broadcast_to(target, shape + (3,))
+    target_mat = np.zeros(shape + (4, 4))
+    target_mat[..., :3, :3] = target_rot
+    target_mat[..., 3, :3] = target
+    target_mat[..., 3, 3] = 1
+
+    return target, target_mat.reshape(target_mat.shape[:-2] + (16,))
+
+
+def get_robot_definition_list(robot_definition):
+    """
+    Get the robot definition as the list the solvers expect, from either the
+    list stored on the rig or the dictionary from rigging_utils.
+    :param robot_definition: list or dict
+    :return: list
+    """
+    if isinstance(robot_definition, dict):
+        return [robot_definition[key] for key in ROBOT_DEFINITION_KEYS]
+    return list(robot_definition)
+
+
+def remove_offsets_batch(thetas, axis_offsets, rot_directions=None):
+    """
+    Vectorized inverse_kinematics.remove_offsets().
+    :param thetas: (..., 6) array of robot axis values in degrees
+    :param axis_offsets: list of 6 axis offsets in degrees
+    :param rot_directions: list of 6 bools; True if an axis is flipped
+    :return: (..., 6) numpy array of solver axis values in degrees
+    """
+    if rot_directions is None:
+        rot_directions = [False] * 6
+    signs = np.where(rot_directions, -1.0, 1.0)
+    return np.asarray(thetas, dtype=float) * signs + axis_offsets
+
+
+def _get_solver_frames(solver_type):
+    frames = inverse_kinematics.get_solver_frames(solver_type)
+    if frames is None:
+        raise ValueError('Unsupported solver type: {}'.format(solver_type))
+    return frames
+
+
+def _rot_z(theta):
+    c = np.cos(theta)
+    s = np.sin(theta)
+    zero = np.zeros_like(theta)
+    one = np.ones_like(theta)
+    return np.stack([np.stack([c, -s, zero], axis=-1),
+                     np.stack([s, c, zero], axis=-1),
+                     np.stack([zero, zero, one], axis=-1)], axis=-2)
+
+
+def _rot_y(theta):
+    c = np.cos(theta)
+    s = np.sin(theta)
+    zero = np.zeros_like(theta)
+    one = np.ones_like(theta)
+    return np.stack([np.stack([c, zero, s], axis=-1),
+                     np.stack([zero, one, zero], axis=-1),
+                     np.stack([-s, zero, c], axis=-1)], axis=-2)
+
+
+def _dh_transform(theta, d, a, alpha):
+    """
+    Standard D-H link transform for an array of joint angles.
+    :return: (..., 4, 4) numpy array
+    """
+    c = np.cos(theta)
+    s = np.sin(theta)
+    zero = np.zeros_like(theta)
+    one = np.ones_like(theta)
+    ca = math.cos(alpha)
+    sa = math.sin(alpha)
+    return np.stack([np.stack([c, -s * ca, s * sa, a * c], axis=-1),
+                     np.stack([s, c * ca, -c * sa, a * s], axis=-1),
+                     np.stack([zero, zero + sa, zero + ca, zero + d], axis=-1),
+                     np.stack([zero, zero, zero, one], axis=-1)], axis=-2)
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required by the forward
+    kinematics solvers, is not available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for forward kinematics; '
+                          'see Mimic installation instructions for more details')
@@ -4,28 +4,329 @@ Inverse kinematics solver
 """
 
 import math
+from collections import namedtuple
+
+from robotmath import small_matrix
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; batch solvers are unavailable
+    np = None
+
+# All closed-form solution configurations [sol_1, sol_2, sol_3]. The order
+# defines the branch axis of solve_all_batch() and solve_all()
+SOLUTION_CONFIGS = [[1, 1, 1],
+                    [1, 1, 0],
+                    [1, 0, 1],
+                    [1, 0, 0],
+                    [0, 1, 1],
+                    [0, 1, 0],
+                    [0, 0, 1],
+                    [0, 0, 0]]
+
+# Inputs of a single IK pose, as read from the rig (see SolverContext.solve)
+SolverPose = namedtuple('SolverPose', [
+                'tcp',
+                'tcp_mat',
+                'lcs',
+                'lcs_mat',
+                'target',
+                'target_mat'
+                ])
+
+# Geometry terms of each solver that only depend on the robot definition
+SphericalWristGeometry = namedtuple('SphericalWristGeometry', [
+                'a1',
+                'b',
+                'c1',
+                'c2',
+                'c4',
+                'two_a1',  # 2 * a1
+                'b_2',  # b^2
+                'c2_2',  # c2^2
+                'k_2',  # a2^2 + c3^2
+                'k',  # sqrt(a2^2 + c3^2)
+                'phi'  # atan2(a2, c3)
+                ])
+
+# Per-pose singularity and reach metrics of the batch solvers. Near a
+# singularity the solved axes are unstable, so large axis velocities are to be
+# expected where these are small:
+#   wrist: |sin(theta5)|; 0 when axes 4 and 6 are aligned
+#   elbow: |sin| of the elbow angle; 0 when the arm is fully extended or
+#          folded
+#   reach: distance (mm) the wrist can still move away from the shoulder
+#          before the arm is fully extended; negative when out of reach
+SolverMetrics = namedtuple('SolverMetrics', [
+                'wrist',
+                'elbow',
+                'reach'
+                ])
+
+# Default metric thresholds below which poses are flagged as near
+# singularities; see find_singular_frames()
+WRIST_SINGULARITY_THRESHOLD = 0.05  # |sin(theta5)|, ~2.9 degrees
+ELBOW_SINGULARITY_THRESHOLD = 0.05  # |sin| of the elbow angle, ~2.9 degrees
+REACH_MARGIN_THRESHOLD = 10.0  # mm
+
+HawkinsKeatingGeometry = namedtuple('HawkinsKeatingGeometry', [
+                'd_1',
+                'd_4',
+                'd_5',
+                'd_6',
+                'a_2',
+                'a_3',
+                'a_2_a_3_2',  # a_2^2 + a_3^2
+                'two_a_2_a_3'  # 2 * a_2 * a_3
+                ])
+
+
+class SolverContext(object):
+    """
+    Everything the IK solver needs that only changes with the rig, built once
+    and reused for every pose: the robot definition and its derived geometry
+    terms, the frame-conversion rotations, the wrist pivot vector, and the
+    axis offsets and rotation directions of the robot.
+
+    Used by the robotIK node, which rebuilds it only when the rig's
+    attributes change, and by offline tools that solve many poses.
+    """
+    def __init__(self, robot_definition, solver_type, axis_offsets=None, rot_directions=None):
+        """
+        :param robot_definition: list; robot geometry as stored on the rig
+        :param solver_type: int; 0 = Spherical Wrist, 1 = Hawkins-Keating
+        :param axis_offsets: list of 6 axis offsets in degrees
+        :param rot_directions: list of 6 bools; True if an axis is flipped
+        """
+        frames = get_solver_frames(solver_type)
+        if frames is None:
+            raise ValueError('Unsupported solver type: {}'.format(solver_type))
+
+        self.robot_definition = list(robot_definition)
+        self.solver_type = solver_type
+        self.axis_offsets = list(axis_offsets or [0] * 6)
+        self.rot_directions = list(rot_directions or [False] * 6)
+
+        self.r_tool_frame, self.r_world_frame = frames
+
+        if solver_type == 1:  # Hawkins-Keating Solver (e.g. UR)
+            self.geometry = get_hawkins_keating_geometry(self.robot_definition)
+            self.pivot_vector = None
+        else:  # Spherical Wrist Solver
+            self.geometry = get_spherical_wrist_geometry(self.robot_definition)
+            self.pivot_vector = (0, 0, self.geometry.c4)  # [0, 0, C4]
+
+        # The flange rotation in the solver's world frame is
+        #     R_world * (lcs * target^T * tcp) * R_tool^T
+        # with all three Maya rotations in Maya's frames, so the frame
+        # conversions only need to be applied once per pose
+        self._r_world = small_matrix.mat3_from_rows(self.r_world_frame)
+        self._r_tool_t = small_matrix.mat3_transpose(small_matrix.mat3_from_rows(self.r_tool_frame))
+
+    def matches(self, robot_definition, solver_type, axis_offsets=None, rot_directions=None):
+        """
+        Check whether this context was built from the given rig attributes.
+        :return: bool
+        """
+        return self.solver_type == solver_type \
+            and self.robot_definition == list(robot_definition) \
+            and self.axis_offsets == list(axis_offsets or [0] * 6) \
+            and self.rot_directions == list(rot_directions or [False] * 6)
+
+    def compute_flange(self, pose):
+        """
+        Equivalent of compute_flange() using the cached frames.
+        :param pose: SolverPose, or a sequence of (tcp, tcp_mat, lcs, lcs_mat,
+            target, target_mat)
+        :return: flange_rot (list 3x3), flange_point (list), pivot_point (list
+            or None)
+        """
+        tcp, tcp_mat, lcs, lcs_mat, target, target_mat = pose
+
+        lcs_rot = small_matrix.mat3_from_maya(lcs_mat)
+        target_rot = small_matrix.mat3_from_maya(target_mat)
+        tcp_rot = small_matrix.mat3_from_maya(tcp_mat)
+
+        # Rotation of the flange w.r.t the target, and of the flange w.r.t the
+        # local coordinate system (circle controller), in Maya's frames
+        _re = small_matrix.mat3_transpose_mul(target_rot, tcp_rot)
+        _rlm = small_matrix.mat3_mul(lcs_rot, _re)
+
+        # Flange point w.r.t the local coordinate system in Maya's frames
+        flange_point = small_matrix.vec3_sub(small_matrix.vec3_sub(target, lcs),
+                                             small_matrix.mat3_mul_vec(_re, tcp))
+        flange_point = small_matrix.mat3_mul_vec(self._r_world,
+                                                 small_matrix.mat3_mul_vec(lcs_rot, flange_point))
+
+        # Convert the rotation of the flange to the solver's frames
+        flange_rot = small_matrix.mat3_mul(small_matrix.mat3_mul(self._r_world, _rlm), self._r_tool_t)
+
+        if self.pivot_vector:
+            pivot_point = list(small_matrix.vec3_sub(flange_point,
+                                                     small_matrix.mat3_mul_vec(flange_rot, self.pivot_vector)))
+        else:
+            pivot_point = None
+
+        return small_matrix.mat3_to_rows(flange_rot), list(flange_point), pivot_point
+
+    def solve(self, pose, sol=[1, 1, 1], offsets=True):
+        """
+        Solve a single pose.
+        :param pose: SolverPose, or a sequence of (tcp, tcp_mat, lcs, lcs_mat,
+            target, target_mat)
+        :param sol: list of three solution bools
+        :param offsets: bool; if True, apply the robot's axis offsets and
+            rotation directions to the solver's solution
+        :return thetas: list of 6 axis values in degrees
+        """
+        flange_rot, flange_point, pivot_point = self.compute_flange(pose)
+
+        if self.solver_type == 1:  # Hawkins-Keating Solver (e.g. UR)
+            thetas = solve_hawkins_keating(self.robot_definition,
+                                           flange_point,
+                                           flange_rot,
+                                           sol,
+                                           self.geometry)
+        else:  # Spherical Wrist Solver
+            thetas = solve_spherical_wrist(self.robot_definition,
+                                           flange_point,
+                                           flange_rot,
+                                           pivot_point,
+                                           sol,
+                                           self.geometry)
+
+        if offsets:
+            thetas = apply_offsets(thetas, self.axis_offsets, self.rot_directions)
+
+        return thetas
+
+    def solve_all(self, pose, offsets=True):
+        """
+        Solve all eight branches of a single pose, ordered as SOLUTION_CONFIGS.
+        Uses a single vectorized pass when NumPy is available, in which case
+        unreachable branches are rows of NaN, and falls back to eight calls
+        to solve() otherwise.
+        :return: list of 8 lists of 6 axis values in degrees
+        """
+        if np is None:
+            return [self.solve(pose, sol, offsets) for sol in SOLUTION_CONFIGS]
+
+        flange = compute_flange_batch(*pose,
+                                      r_tool=self.r_tool_frame,
+                                      r_world=self.r_world_frame,
+                                      pivot_vector=self.pivot_vector)
+
+        all_thetas, _ = _solve_all_flange_batch(self.robot_definition, self.solver_type, flange,
+                                                self.geometry)
+
+        if offsets:
+            all_thetas = self.apply_offsets_batch(all_thetas)
+
+        return all_thetas[0].tolist()
+
+    def solve_batch(self, poses, sol=[1, 1, 1], offsets=True, return_metrics=False):
+        """
+        Vectorized solve() for N poses; see solve_batch() for the shapes each
+        item of poses may take.
+        :param poses: SolverPose, or a sequence of (tcp, tcp_mat, lcs, lcs_mat,
+            target, target_mat), each holding one or N poses
+        :param return_metrics: bool; if True, also return SolverMetrics
+        :return thetas: (N, 6) numpy array of axis values in degrees
+        :return metrics: SolverMetrics of (N,) arrays, if return_metrics
+        """
+        _check_numpy()
+
+        flange = compute_flange_batch(*poses,
+                                      r_tool=self.r_tool_frame,
+                                      r_world=self.r_world_frame,
+                                      pivot_vector=self.pivot_vector)
+
+        thetas, metrics = _solve_flange_batch(self.robot_definition, self.solver_type, flange, sol,
+                                              self.geometry, metrics=True)
+        thetas = np.atleast_2d(thetas)
+
+        if offsets:
+            thetas = self.apply_offsets_batch(thetas)
+
+        if return_metrics:
+            return thetas, _atleast_1d_metrics(metrics)
+        return thetas
+
+    def solve_all_batch(self, poses, initial_thetas=None, offsets=True, return_metrics=False):
+        """
+        Vectorized solve_all() for N poses, with branch tracking; see
+        solve_all_batch(). initial_thetas never includes axis offsets.
+        :return all_thetas: (N, 8, 6) numpy array of axis values in degrees
+        :return branch_indices: (N,) numpy array of branch indices
+        :return metrics: SolverMetrics of (N, 8) arrays, if return_metrics
+        """
+        _check_numpy()
+
+        flange = compute_flange_batch(*poses,
+                                      r_tool=self.r_tool_frame,
+                                      r_world=self.r_world_frame,
+                                      pivot_vector=self.pivot_vector)
+
+        all_thetas, metrics = _solve_all_flange_batch(self.robot_definition, self.solver_type, flange,
+                                                      self.geometry)
+        branch_indices = track_solution_branches(all_thetas, initial_thetas)
+
+        if offsets:
+            all_thetas = self.apply_offsets_batch(all_thetas)
+
+        if return_metrics:
+            return all_thetas, branch_indices, metrics
+        return all_thetas, branch_indices
+
+    def apply_offsets_batch(self, thetas):
+        """
+        Vectorized apply_offsets() using this robot's offsets and directions.
+        :param thetas: (..., 6) array of solver axis values in degrees
+        :return: (..., 6) numpy array of robot axis values in degrees
+        """
+        signs = np.where(self.rot_directions, -1.0, 1.0)
+        return (np.asarray(thetas, dtype=float) - self.axis_offsets) * signs
+
+
+def get_spherical_wrist_geometry(robot_definition):
+    """
+    Precompute the spherical wrist solver's geometry terms.
+    :param robot_definition: list [a1, a2, b, c1, c2, c3, c4]
+    :return: SphericalWristGeometry
+    """
+    a1, a2, b, c1, c2, c3, c4 = robot_definition[:7]
+    k_2 = math.pow(a2, 2) + math.pow(c3, 2)
+    return SphericalWristGeometry(a1, b, c1, c2, c4,
+                                  two_a1=2 * a1,
+                                  b_2=math.pow(b, 2),
+                                  c2_2=math.pow(c2, 2),
+                                  k_2=k_2,
+                                  k=math.sqrt(k_2),
+                                  phi=math.atan2(a2, c3))
+
+
+def get_hawkins_keating_geometry(robot_definition):
+    """
+    Precompute the Hawkins-Keating solver's geometry terms.
+    :param robot_definition: list [d1, d4, d5, d6, a2, a3, ...]
+    :return: HawkinsKeatingGeometry
+    """
+    d_1, d_4, d_5, d_6, a_2, a_3 = robot_definition[:6]
+    return HawkinsKeatingGeometry(d_1, d_4, d_5, d_6, a_2, a_3,
+                                  a_2_a_3_2=a_2 * a_2 + a_3 * a_3,
+                                  two_a_2_a_3=2.0 * a_2 * a_3)
+
 
 def solve(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, robot_definition, solver_type, sol=[1, 1, 1]):
     """
     """
+    frames = get_solver_frames(solver_type)
+    if frames is None:
+        return None  # Unsupported solver type
 
-    if solver_type == 1:  # Hawkins-Keating Solver (e.g. UR)
-        # ====================#
-        #  Frame Definitions  #
-        # ====================#
-        # Maya uses a different coordinate system than our IK solver, so we have
-        # to convert from Maya's frame to the solver's frame.
-        # If your base frame is different, you can substitute the transformation here.
-         
-        # Solver's tool frame (X,Y,Z) = Maya's tool frame (X, Y, Z)
-        # UR solver tool and maya tool are the same
-        # Rotation matrix from Maya tool frame to solver's tool frame.
-        r_tool_frame = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]  
-         
-        # Solver world frame (X,Y,Z) = Maya world frame (-Z, -X, Y)
-        # Rotation matrix from Maya's world frame to solver world frame.
-        r_world_frame = [[0, 0, -1], [-1, 0, 0], [0, 1, 0]]
+    r_tool_frame, r_world_frame = frames
 
+    if solver_type == 1:  # Hawkins-Keating Solver (e.g. UR)
         flange_rot, flange_point, _ = compute_flange(
                                         tcp,
                                         tcp_mat,
@@ -42,24 +343,9 @@ def solve(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, robot_definition, solv
                            flange_rot,
                            sol)
 
-    elif solver_type == 0:
-        #=====================#
-        #  Frame Definitions  #
-        #=====================#
-        # Maya uses a different coordinate system than our IK solver, so we have
-        # to convert from Maya's frame to the solver's frame.
-        # If your base frame is different, you can substitute the transformation here.
-         
-        # Solver's tool frame (X,Y,Z) | Maya's tool frame (-Y, X, Z)
-        # Rotation matrix from Maya tool frame to solver's tool frame.
-        r_tool_frame = [[0,-1,0],[1,0,0],[0,0,1]]
-
-        # Solver world frame (X,Y,Z) = Maya world frame (-Z, -X, Y)
-        # Rotation matrix from Maya's world frame to solver world frame.
-        r_world_frame = [[0,0,1],[1,0,0],[0,1,0]]
-
+    else:  # Spherical Wrist Solver
         # Define the pivot vector
-        pivot_vector = [[0], [0], [robot_definition[6]]]  # [0, 0, C4]
+        pivot_vector = [0, 0, robot_definition[6]]  # [0, 0, C4]
 
         flange_rot, flange_point, pivot_point = compute_flange(
                                         tcp,
@@ -78,13 +364,278 @@ def solve(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, robot_definition, solv
                            flange_rot,
                            pivot_point,
                            sol)
+
+    return thetas
+
+
+def solve_batch(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, robot_definition, solver_type, sol=[1, 1, 1],
+                return_metrics=False):
+    """
+    Vectorized version of solve() for whole trajectories. Rather than solving
+    one pose per call, every input may hold N poses at once; inputs that are
+    constant over the trajectory (e.g. the TCP) may be passed as a single
+    pose and are broadcast against the others.
+
+    Results match solve() to within 1e-9 degrees at least one degree away
+    from the wrist and elbow singularities. Closer to them the solution is
+    ill-conditioned and the last-bit differences between NumPy's and the math
+    module's acos/atan2 are amplified: about 1e-8 degrees at 0.01 degrees
+    and up to 1e-6 degrees at 1e-4 degrees from the singularity. Poses for
+    which solve() raises (e.g. out of reach) produce a row of NaN instead, so
+    a long program can be solved in one pass.
+    :param tcp: (N, 3) or (3,) array; TCP translation w.r.t. the tool flange
+    :param tcp_mat: (N, 16), (N, 4, 4), (16,) or (4, 4) array; Maya TCP matrix
+    :param lcs: (N, 3) or (3,) array; local base frame translation
+    :param lcs_mat: (N, 16), (N, 4, 4), (16,) or (4, 4) array; Maya local
+        base frame matrix
+    :param target: (N, 3) or (3,) array; target translation
+    :param target_mat: (N, 16), (N, 4, 4), (16,) or (4, 4) array; Maya
+        target matrix
+    :param robot_definition: list; robot geometry as stored on the rig
+    :param solver_type: int; 0 = Spherical Wrist, 1 = Hawkins-Keating
+    :param sol: list of three solution bools, or three (N,) arrays of bools
+    :param return_metrics: bool; if True, also return the singularity and
+        reach metrics of each pose (see SolverMetrics)
+    :return thetas: (N, 6) numpy array of axis values in degrees
+    :return metrics: SolverMetrics of (N,) arrays, if return_metrics
+    """
+    _check_numpy()
+
+    flange = _compute_solver_flange_batch(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, robot_definition, solver_type)
+    if flange is None:
+        return (None, None) if return_metrics else None  # Unsupported solver type
+
+    thetas, metrics = _solve_flange_batch(robot_definition, solver_type, flange, sol, metrics=True)
+
+    if return_metrics:
+        return np.atleast_2d(thetas), _atleast_1d_metrics(metrics)
+    return np.atleast_2d(thetas)
+
+
+def solve_all_batch(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, robot_definition, solver_type, initial_thetas=None,
+                    return_metrics=False):
+    """
+    Solve all eight closed-form branches of N poses in one vectorized pass
+    and track the branch that stays closest to the previous frame's joints.
+    Inputs follow solve_batch().
+
+    The branch axis is ordered as SOLUTION_CONFIGS, so the [sol_1, sol_2,
+    sol_3] flags of branch i are SOLUTION_CONFIGS[i]. The selected thetas for
+    each frame can be gathered with:
+        all_thetas[numpy.arange(len(branch_indices)), branch_indices]
+    :param initial_thetas: optional list of 6 axis values (degrees, without
+        axis offsets) that the first frame should be closest to, e.g. the
+        robot's current FK pose. Defaults to branch 0 ([1, 1, 1]).
+    :param return_metrics: bool; if True, also return the singularity and
+        reach metrics of each pose and branch (see SolverMetrics). The
+        metrics of the tracked branches can be gathered like the thetas
+    :return all_thetas: (N, 8, 6) numpy array of axis values in degrees
+    :return branch_indices: (N,) numpy array of branch indices; -1 for frames
+        without any valid branch
+    :return metrics: SolverMetrics of (N, 8) arrays, if return_metrics
+    """
+    _check_numpy()
+
+    flange = _compute_solver_flange_batch(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, robot_definition, solver_type)
+    if flange is None:
+        # Unsupported solver type
+        return (None, None, None) if return_metrics else (None, None)
+
+    all_thetas, metrics = _solve_all_flange_batch(robot_definition, solver_type, flange)
+
+    branch_indices = track_solution_branches(all_thetas, initial_thetas)
+
+    if return_metrics:
+        return all_thetas, branch_indices, metrics
+    return all_thetas, branch_indices
+
+
+def _solve_all_flange_batch(robot_definition, solver_type, flange, geometry=None):
+    """
+    Solve flange quantities from _compute_solver_flange_batch() for all
+    eight branches.
+    :return all_thetas: (N, 8, 6) numpy array of axis values in degrees
+    :return metrics: SolverMetrics of (N, 8) arrays
+    """
+    # Add a branch axis to each flange quantity, and a matching pose axis to
+    # the solution flags, so that every pose is solved for every branch
+    flange_rot, flange_point, pivot_point = flange
+    flange_rot = flange_rot[..., np.newaxis, :, :]
+    flange_point = flange_point[..., np.newaxis, :]
+    if pivot_point is not None:
+        pivot_point = pivot_point[..., np.newaxis, :]
+    flange = (flange_rot, flange_point, pivot_point)
+
+    configs = np.asarray(SOLUTION_CONFIGS, dtype=bool)
+    sol = [configs[:, i] for i in range(3)]
+
+    all_thetas, metrics = _solve_flange_batch(robot_definition, solver_type, flange, sol, geometry, metrics=True)
+    shape = (-1, len(SOLUTION_CONFIGS))
+    metrics = SolverMetrics(*[np.broadcast_to(m, all_thetas.shape[:-1]).reshape(shape) for m in metrics])
+
+    return all_thetas.reshape(shape + (6,)), metrics
+
+
+def solve_all(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, robot_definition, solver_type):
+    """
+    Solve all eight closed-form branches of a single pose, ordered as
+    SOLUTION_CONFIGS. Uses a single vectorized pass when NumPy is available
+    and falls back to eight calls to solve() otherwise.
+    :return: list of 8 lists of 6 axis values in degrees
+    """
+    if np is None:
+        return [solve(tcp, tcp_mat, lcs, lcs_mat, target, target_mat,
+                      robot_definition, solver_type, sol)
+                for sol in SOLUTION_CONFIGS]
+
+    all_thetas, _ = solve_all_batch(tcp, tcp_mat, lcs, lcs_mat, target,
+                                    target_mat, robot_definition, solver_type)
+    if all_thetas is None:
+        return [None for _ in SOLUTION_CONFIGS]  # Unsupported solver type
+
+    return all_thetas[0].tolist()
+
+
+def track_solution_branches(all_thetas, initial_thetas=None):
+    """
+    Pick, at each frame, the IK branch closest to the joints selected at the
+    previous frame. Distances are the sum of absolute axis differences,
+    wrapped to +/- 180 degrees, since the solvers bound each axis to that
+    range and a continuous branch may cross it.
+    :param all_thetas: (N, 8, 6) array from solve_all_batch()
+    :param initial_thetas: optional list of 6 axis values that the first
+        frame should be closest to; defaults to branch 0
+    :return branch_indices: (N,) numpy array of ints; -1 where no branch is
+        valid
+    """
+    all_thetas = np.asarray(all_thetas, dtype=float)
+    num_frames = all_thetas.shape[0]
+    branch_indices = np.full(num_frames, -1, dtype=int)
+
+    valid = ~np.isnan(all_thetas).any(axis=-1)
+
+    previous = None if initial_thetas is None else np.asarray(initial_thetas, dtype=float)
+    for frame_index in range(num_frames):
+        frame_valid = valid[frame_index]
+        if not frame_valid.any():
+            continue  # Keep tracking against the last valid frame
+
+        if previous is None:
+            # With no reference, prefer branch 0 if it is solvable
+            branch_index = 0 if frame_valid[0] else int(np.argmax(frame_valid))
+        else:
+            difference = np.abs((all_thetas[frame_index] - previous + 180.0) % 360.0 - 180.0)
+            distance = np.where(frame_valid, difference.sum(axis=-1), np.inf)
+            branch_index = int(np.argmin(distance))
+
+        branch_indices[frame_index] = branch_index
+        previous = all_thetas[frame_index, branch_index]
+
+    return branch_indices
+
+
+def _compute_solver_flange_batch(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, robot_definition, solver_type):
+    """
+    Compute the flange rotation, flange point and (for the spherical wrist
+    solver) pivot point of N poses in the solver's frame.
+    :return: tuple (flange_rot, flange_point, pivot_point) of numpy arrays,
+        or None if the solver type is not supported
+    """
+    frames = get_solver_frames(solver_type)
+    if frames is None:
+        return None  # Unsupported solver type
+
+    r_tool_frame, r_world_frame = frames
+
+    if solver_type == 1:  # Hawkins-Keating Solver (e.g. UR)
+        pivot_vector = None
+    else:  # Spherical Wrist Solver
+        pivot_vector = [0, 0, robot_definition[6]]  # [0, 0, C4]
+
+    return compute_flange_batch(tcp,
+                                tcp_mat,
+                                lcs,
+                                lcs_mat,
+                                target,
+                                target_mat,
+                                r_tool_frame,
+                                r_world_frame,
+                                pivot_vector)
+
+
+def _solve_flange_batch(robot_definition, solver_type, flange, sol, geometry=None, metrics=False):
+    """
+    Dispatch flange quantities from _compute_solver_flange_batch() to the
+    batch solver for the given solver type.
+    :return thetas: (..., 6) numpy array of axis values in degrees
+    :return metrics: SolverMetrics, if metrics
+    """
+    flange_rot, flange_point, pivot_point = flange
+
+    if solver_type == 1:  # Hawkins-Keating Solver (e.g. UR)
+        return solve_hawkins_keating_batch(robot_definition,
+                                           flange_point,
+                                           flange_rot,
+                                           sol,
+                                           geometry,
+                                           metrics)
+    else:  # Spherical Wrist Solver
+        return solve_spherical_wrist_batch(robot_definition,
+                                           flange_rot,
+                                           pivot_point,
+                                           sol,
+                                           geometry,
+                                           metrics)
+
+
+def get_solver_frames(solver_type):
+    """
+    Get the rotations from Maya's tool and world frames to the solver's tool
+    and world frames.
+    :param solver_type: int; 0 = Spherical Wrist, 1 = Hawkins-Keating
+    :return: tuple of 3x3 lists (r_tool_frame, r_world_frame), or None if the
+        solver type is not supported
+    """
+    if solver_type == 1:  # Hawkins-Keating Solver (e.g. UR)
+        # ====================#
+        #  Frame Definitions  #
+        # ====================#
+        # Maya uses a different coordinate system than our IK solver, so we have
+        # to convert from Maya's frame to the solver's frame.
+        # If your base frame is different, you can substitute the transformation here.
+         
+        # Solver's tool frame (X,Y,Z) = Maya's tool frame (X, Y, Z)
+        # UR solver tool and maya tool are the same
+        # Rotation matrix from Maya tool frame to solver's tool frame.
+        r_tool_frame = [[1, 0, 0], [0, 1, 0], [0, 0, 1]]  
+         
+        # Solver world frame (X,Y,Z) = Maya world frame (-Z, -X, Y)
+        # Rotation matrix from Maya's world frame to solver world frame.
+        r_world_frame = [[0, 0, -1], [-1, 0, 0], [0, 1, 0]]
+
+    elif solver_type == 0:
+        #=====================#
+        #  Frame Definitions  #
+        #=====================#
+        # Maya uses a different coordinate system than our IK solver, so we have
+        # to convert from Maya's frame to the solver's frame.
+        # If your base frame is different, you can substitute the transformation here.
+         
+        # Solver's tool frame (X,Y,Z) | Maya's tool frame (-Y, X, Z)
+        # Rotation matrix from Maya tool frame to solver's tool frame.
+        r_tool_frame = [[0,-1,0],[1,0,0],[0,0,1]]
+
+        # Solver world frame (X,Y,Z) = Maya world frame (-Z, -X, Y)
+        # Rotation matrix from Maya's world frame to solver world frame.
+        r_world_frame = [[0,0,1],[1,0,0],[0,1,0]]
+
     else:
         return None  # Unsupported solver type
 
-    return thetas
+    return r_tool_frame, r_world_frame
 
 
-def solve_spherical_wrist(robot_definition, flange_point, flange_rot, pivot_point, sol=[1, 1, 1]):
+def solve_spherical_wrist(robot_definition, flange_point, flange_rot, pivot_point, sol=[1, 1, 1], geometry=None):
     """
     Fast inverse kinematic solver for most 6-axis industrial robots.
     Implementation based on 'An Analytical Solution of the Inverse Kinematics
@@ -96,15 +647,21 @@ def solve_spherical_wrist(robot_definition, flange_point, flange_rot, pivot_poin
     :param : 
     :param :
     :param :
+    :param geometry: SphericalWristGeometry; precomputed from robot_definition,
+        see SolverContext
     :return:
     """
-    a1 = robot_definition[0]
-    a2 = robot_definition[1]
-    b = robot_definition[2]
-    c1 = robot_definition[3]
-    c2 = robot_definition[4]
-    c3 = robot_definition[5]
-    c4 = robot_definition[6]
+    if geometry is None:
+        geometry = get_spherical_wrist_geometry(robot_definition)
+
+    a1 = geometry.a1
+    b = geometry.b
+    c1 = geometry.c1
+    c2 = geometry.c2
+    c2_2 = geometry.c2_2
+    k_2 = geometry.k_2
+    k = geometry.k
+    phi = geometry.phi  # atan2(a2, c3)
 
     sol_1 = sol[0]
     sol_2 = sol[1]
@@ -123,13 +680,11 @@ def solve_spherical_wrist(robot_definition, flange_point, flange_rot, pivot_poin
     #=========#
     #  SOLVE  #
     #=========#
-    nx1 = math.sqrt((math.pow(pivot_point[1], 2) + math.pow(pivot_point[0], 2) - math.pow(b, 2))) - a1
+    nx1 = math.sqrt((math.pow(pivot_point[1], 2) + math.pow(pivot_point[0], 2) - geometry.b_2)) - a1
     s1_2 = math.pow(nx1, 2) + math.pow((pivot_point[2] - c1), 2)
-    s2_2 = math.pow((nx1 + 2 * a1), 2) + math.pow((pivot_point[2] - c1), 2)
-    k_2 = math.pow(a2, 2) + math.pow(c3, 2)
+    s2_2 = math.pow((nx1 + geometry.two_a1), 2) + math.pow((pivot_point[2] - c1), 2)
     s1 = math.sqrt(s1_2)
     s2 = math.sqrt(s2_2)
-    k = math.sqrt(k_2)
  
     valid_solition = 1
     
@@ -140,12 +695,12 @@ def solve_spherical_wrist(robot_definition, flange_point, flange_rot, pivot_poin
         theta_1 = math.atan2(pivot_point[1], pivot_point[0]) - math.atan2(b, (nx1 + a1))
 
 
-        n1 = (s1_2 + math.pow(c2, 2) - k_2) / (2 * s1 * c2)
+        n1 = (s1_2 + c2_2 - k_2) / (2 * s1 * c2)
         if abs(n1) > 1:  # Theta 2 is undefined under this condition
             valid_solition = 0
             n1 = 1
 
-        n2 = (math.pow(c2, 2) + k_2 - s1_2) / (2 * c2 * k)
+        n2 = (c2_2 + k_2 - s1_2) / (2 * c2 * k)
         if abs(n2) > 1:  # Theta 3 is undefined under this condition
             valid_solition = 0
             n2 = -1
@@ -154,13 +709,13 @@ def solve_spherical_wrist(robot_definition, flange_point, flange_rot, pivot_poin
         if sol_2:
 
             theta_2 = -math.acos(n1) + math.atan2(nx1, (pivot_point[2] - c1))
-            theta_3 = math.pi - (math.acos(n2) - math.atan2(a2, c3))
+            theta_3 = math.pi - (math.acos(n2) - phi)
 
         # Solution 2 == False
         else:
 
             theta_2 = math.acos(n1) + math.atan2(nx1, (pivot_point[2] - c1))
-            theta_3 = math.pi - (-math.acos(n2) - math.atan2(a2, c3))
+            theta_3 = math.pi - (-math.acos(n2) - phi)
 
     # Solution 1 == False
     else:
@@ -168,12 +723,12 @@ def solve_spherical_wrist(robot_definition, flange_point, flange_rot, pivot_poin
         theta_1 = math.atan2(pivot_point[1], pivot_point[0]) + math.atan2(b, (nx1 + a1)) - math.pi
     
 
-        n1 = (s2_2 + math.pow(c2, 2) - k_2) / (2 * s2 * c2)
+        n1 = (s2_2 + c2_2 - k_2) / (2 * s2 * c2)
         if abs(n1) > 1:  # Theta 2 is undefined under this condition
             valid_solition = 0
             n1 = 1
 
-        n2 = (math.pow(c2, 2) + k_2 - s2_2) / (2 * c2 * k)
+        n2 = (c2_2 + k_2 - s2_2) / (2 * c2 * k)
         if abs(n2) > 1:  # Theta 3 is undefined under this condition
             valid_solition = 0
             n2 = -1
@@ -181,14 +736,14 @@ def solve_spherical_wrist(robot_definition, flange_point, flange_rot, pivot_poin
         # Solution 2 == True
         if sol_2:
 
-            theta_2 = math.acos(n1) - math.atan2((nx1 + 2 * a1), (pivot_point[2] - c1))
-            theta_3 = -(math.pi - (math.acos(n2) + math.atan2(a2, c3)))
+            theta_2 = math.acos(n1) - math.atan2((nx1 + geometry.two_a1), (pivot_point[2] - c1))
+            theta_3 = -(math.pi - (math.acos(n2) + phi))
 
         # Solution 2 == False
         else:
 
-            theta_2 = -(math.acos(n1) + math.atan2((nx1 + 2 * a1), (pivot_point[2] - c1)))
-            theta_3 = -(math.pi - (-math.acos(n2) + math.atan2(a2, c3)))
+            theta_2 = -(math.acos(n1) + math.atan2((nx1 + geometry.two_a1), (pivot_point[2] - c1)))
+            theta_3 = -(math.pi - (-math.acos(n2) + phi))
 
 
     # Solve for Thetas 4-6
@@ -231,7 +786,7 @@ def solve_spherical_wrist(robot_definition, flange_point, flange_rot, pivot_poin
     return thetas
 
 
-def solve_hawkins_keating(robot_definition, flange_point, flange_rot, sol=[1, 1, 1]):
+def solve_hawkins_keating(robot_definition, flange_point, flange_rot, sol=[1, 1, 1], geometry=None):
     """
     Fast inverse kinematic solver for most 6-axis "co-bots" 
     (e.g. Universal Robots).
@@ -241,8 +796,13 @@ def solve_hawkins_keating(robot_definition, flange_point, flange_rot, sol=[1, 1,
     :param :
     :param :
     :param :
+    :param geometry: HawkinsKeatingGeometry; precomputed from
+        robot_definition, see SolverContext
     :return:
     """
+    if geometry is None:
+        geometry = get_hawkins_keating_geometry(robot_definition)
+
     sol_1 = sol[0]
     sol_2 = sol[1]
     sol_3 = sol[2]
@@ -255,16 +815,12 @@ def solve_hawkins_keating(robot_definition, flange_point, flange_rot, sol=[1, 1,
 
 
     # Get D-H Parameters from robot_definition
-    d_1 = robot_definition[0]
-    d_4 = robot_definition[1]
-    d_5 = robot_definition[2]
-    d_6 = robot_definition[3]
-    a_2 = robot_definition[4]
-    a_3 = robot_definition[5]     
-     
-     
-    # Define translation vector from the tool flange to the wrist frame.
-    _t = [[0], [0], [-d_6], [1]]
+    d_1 = geometry.d_1
+    d_4 = geometry.d_4
+    d_5 = geometry.d_5
+    d_6 = geometry.d_6
+    a_2 = geometry.a_2
+    a_3 = geometry.a_3
      
      
     #########
@@ -272,28 +828,21 @@ def solve_hawkins_keating(robot_definition, flange_point, flange_rot, sol=[1, 1,
     #########
     # The solve is only dependent on the DH-Params, flange_rot, and flange_point
      
-    # Construct T0_6, the transformation matrix of the Frame 6 WRT the Base frame 0
-    T0_6 = flange_rot
-    T0_6[0].append(flange_point[0])
-    T0_6[1].append(flange_point[1])
-    T0_6[2].append(flange_point[2])
-     
-    # Define Position of Frame 6, P, WRT the base frame 0. This is == flange_point
-    P0_6 = flange_point
-     
+    # T0_6, the transformation matrix of the Frame 6 WRT the Base frame 0, is
+    # composed of flange_rot and flange_point (the position of Frame 6, P0_6)
     # Assign x, y, and z-components of T0_6 to variables for ease of callback
-    T06_XX = T0_6[0][0]
-    T06_XY = T0_6[0][1]
-    T06_XZ = T0_6[0][2]
-    T06_YX = T0_6[1][0]
-    T06_YY = T0_6[1][1]
-    T06_YZ = T0_6[1][2]
-    T06_ZX = T0_6[2][0]
-    T06_ZY = T0_6[2][1]
-    T06_ZZ = T0_6[2][2]
-    T06_X = P0_6[0]
-    T06_Y = P0_6[1]
-    T06_Z = P0_6[2]
+    T06_XX = flange_rot[0][0]
+    T06_XY = flange_rot[0][1]
+    T06_XZ = flange_rot[0][2]
+    T06_YX = flange_rot[1][0]
+    T06_YY = flange_rot[1][1]
+    T06_YZ = flange_rot[1][2]
+    T06_ZX = flange_rot[2][0]
+    T06_ZY = flange_rot[2][1]
+    T06_ZZ = flange_rot[2][2]
+    T06_X = flange_point[0]
+    T06_Y = flange_point[1]
+    T06_Z = flange_point[2]
      
      
     #--------------#
@@ -301,9 +850,11 @@ def solve_hawkins_keating(robot_definition, flange_point, flange_rot, sol=[1, 1,
     #--------------#
     # To we first determine the location of frame 5 (the wrist frame)
     # in relation to the base frame 0: P0_5
-    # P0_5 can be found by translating backwards from frame 6 to frame 5 along z_6
-    P0_5 = _array_mult(T0_6, _t)
-    P0_5 = _tpose(P0_5)[0]
+    # P0_5 can be found by translating backwards from frame 6 to frame 5 along
+    # z_6, i.e. T0_6 * [0, 0, -d_6, 1]
+    P0_5 = [T06_XZ * -d_6 + T06_X,
+            T06_YZ * -d_6 + T06_Y,
+            T06_ZZ * -d_6 + T06_Z]
      
     nx1 = math.sqrt(math.pow(P0_5[0], 2) + math.pow(P0_5[1], 2))
 
@@ -353,7 +904,7 @@ def solve_hawkins_keating(robot_definition, flange_point, flange_rot, sol=[1, 1,
     
     P14_XY_2 = P14_X*P14_X + P14_Y*P14_Y
 
-    c3 = (P14_XY_2 - a_2*a_2 - a_3*a_3) / (2.0*a_2*a_3)
+    c3 = (P14_XY_2 - geometry.a_2_a_3_2) / geometry.two_a_2_a_3
     
     if c3 > 1:  # Solution is undefined for c3 > 1
         c3 = 1
@@ -369,7 +920,7 @@ def solve_hawkins_keating(robot_definition, flange_point, flange_rot, sol=[1, 1,
     #--------------#
     s3 = math.sin(theta_3)
      
-    denom = a_2*a_2 + a_3*a_3 + 2*a_2*a_3*c3
+    denom = geometry.a_2_a_3_2 + geometry.two_a_2_a_3*c3
     nc_1 = (a_2 + a_3*c3)
     nc_2 = a_3*s3
      
@@ -415,110 +966,61 @@ def compute_flange(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, r_tool, r_wor
                              solver's tool frame
     :param r_tool: list 3x3; rotation of robot's world frame in Maya w.r.t 
                              solver's world frame
-    :param pivot_vector: vector (list); translation vector from flange to wrist
-                         pivot. Only used for spherical wrist solver
+    :param pivot_vector: vector (list of 3); translation vector from flange to
+                         wrist pivot. Only used for spherical wrist solver
     """
+    r_tool = small_matrix.mat3_from_rows(r_tool)
+    r_world = small_matrix.mat3_from_rows(r_world)
+
+    # Convert TCP translation (w.r.t. tool flange) from Maya's tool frame to
+    # solver tool frame.
+    tcp_trans = small_matrix.mat3_mul_vec(r_tool, tcp)
+
+    # Convert translation of local base frame (Circle controller) w.r.t robot's
+    # world frame (Square controller) from Maya's world frame to solver world
+    # frame.
+    lcs_trans = small_matrix.mat3_mul_vec(r_world, lcs)
+
+    # Convert translation of target w.r.t robot world frame (Square
+    # controller) from Maya's world frame to solver world frame.
+    target_point = small_matrix.mat3_mul_vec(r_world, target)
+
+    # Maya matrices store each axis as a row; convert the rotations of the
+    # tool center point (TCP), local coordinate system (circle controller) and
+    # target to the solver's tool and world frames
+    tcp_rot = small_matrix.mat3_mul_transpose(small_matrix.mat3_from_maya(tcp_mat), r_tool)
+    lcs_rot = small_matrix.mat3_mul_transpose(small_matrix.mat3_from_maya(lcs_mat), r_world)
+    target_rot = small_matrix.mat3_mul_transpose(small_matrix.mat3_from_maya(target_mat), r_world)
 
-    # Get local translation of the TCP w.r.t. tool flange.
-    tcp_trans = [[0] * 1 for _ in range(3)]
-    tcp_trans[0][0] = tcp[0]
-    tcp_trans[1][0] = tcp[1]
-    tcp_trans[2][0] = tcp[2]
-     
-    # Convert TCP translation from Maya's tool frame to solver tool frame.
-    tcp_trans = _array_mult(r_tool, tcp_trans)
-     
-    # Get translation of local base frame (Circle controller) w.r.t robot's
-    # world frame (Square controller).
-    lcs_trans = [[0] * 1 for _ in range(3)]
-    lcs_trans[0][0] = lcs[0]
-    lcs_trans[1][0] = lcs[1]
-    lcs_trans[2][0] = lcs[2]
-         
-    # Convert lcs translation from Maya's world frame to solver world frame.
-    lcs_trans = _array_mult(r_world, lcs_trans)
-     
-    # Get translation of target in Maya's world frame w.r.t robot world frame
-    # (Square controller).
-    target_point = [[0] * 1 for i in range(3)]
-    target_point[0][0] = target[0]
-    target_point[1][0] = target[1]
-    target_point[2][0] = target[2]
-         
-    # Convert target translation from Maya's world frame to solver world frame.
-    target_point = _array_mult(r_world, target_point)
-     
-     
-    # Convert Maya formatted rotation matrices to truncated format
-    # Tool center point (TCP) matrix
-    tcp_x_axis = [[tcp_mat[0]], [tcp_mat[1]], [tcp_mat[2]]]
-    tcp_y_axis = [[tcp_mat[4]], [tcp_mat[5]], [tcp_mat[6]]]
-    tcp_z_axis = [[tcp_mat[8]], [tcp_mat[9]], [tcp_mat[10]]]
-    tcp_mat_trunc = _tpose([_tpose(tcp_x_axis)[0],
-                        _tpose(tcp_y_axis)[0],
-                        _tpose(tcp_z_axis)[0]])
-              
-    # Convert truncated tcp rotation matrix to solver tool frame
-    tcp_rot = _tpose(_array_mult(r_tool, tcp_mat_trunc))
-     
-    # Local coordinate system matrix (circle controller)
-    lcs_x_axis = [[lcs_mat[0]], [lcs_mat[1]], [lcs_mat[2]]]
-    lcs_y_axis = [[lcs_mat[4]], [lcs_mat[5]], [lcs_mat[6]]]
-    lcs_z_axis = [[lcs_mat[8]], [lcs_mat[9]], [lcs_mat[10]]]
-    lcs_mat_trunc = _tpose([_tpose(lcs_x_axis)[0],
-                        _tpose(lcs_y_axis)[0],
-                        _tpose(lcs_z_axis)[0]])
-              
-    # Convert local base frame rotation matrix to solver world frame
-    lcs_rot = _tpose(_array_mult(r_world, lcs_mat_trunc))
-     
-    # Target rotation matrix
-    target_x_axis = [[target_mat[0]], [target_mat[1]], [target_mat[2]]]
-    target_y_axis = [[target_mat[4]], [target_mat[5]], [target_mat[6]]]
-    target_z_axis = [[target_mat[8]], [target_mat[9]], [target_mat[10]]]
-    target_mat_trunc = _tpose([_tpose(target_x_axis)[0],
-                        _tpose(target_y_axis)[0],
-                        _tpose(target_z_axis)[0]])
-          
-    # Convert target rotation matrix to solver world frame
-    target_rot = _tpose(_array_mult(r_world, target_mat_trunc))
-     
     # Find Flange Point location in solver world frame
     #
     # Rotation of the robot flange w.r.t to the target in Maya's world frame
-    _re = _array_mult(_tpose(target_rot), tcp_rot)
-     
+    _re = small_matrix.mat3_transpose_mul(target_rot, tcp_rot)
+
     # Rotation of the robot's local coordinate system (circle
     # controller) w.r.t the solver world frame
-    _rlm = _array_mult(r_world, lcs_rot)
-     
+    _rlm = small_matrix.mat3_mul(r_world, lcs_rot)
+
     # Find distance from the robot's local coordinate system (circle
     # controller) to target point in solver world frame
-    target_point = [i - j for i, j in zip(_tpose(target_point)[0],
-                                          _tpose(lcs_trans)[0])]
-     
+    target_point = small_matrix.vec3_sub(target_point, lcs_trans)
+
     # Find the flange point in the solver's world frame
-    flange_point = [i - j for i, j in zip(target_point, _tpose(_array_mult(_re, tcp_trans))[0])]
-     
+    flange_point = small_matrix.vec3_sub(target_point, small_matrix.mat3_mul_vec(_re, tcp_trans))
 
     # If a pivot vector is provide, compute a pivot point
     if pivot_vector:
-        pivot_point = [i - j for i,j in zip(flange_point, _tpose(_array_mult(_re, pivot_vector))[0])]
+        pivot_point = small_matrix.vec3_sub(flange_point, small_matrix.mat3_mul_vec(_re, pivot_vector))
         # Convert to solver's world frame
-        pivot_point = _tpose(_array_mult(_rlm, [[pivot_point[0]],
-                                                [pivot_point[1]],
-                                                [pivot_point[2]]]))[0] 
+        pivot_point = list(small_matrix.mat3_mul_vec(_rlm, pivot_point))
     else:
         pivot_point = None
 
-
     # Find the flange point in solver's world frame
-    flange_point = _tpose(_array_mult(_rlm, [[flange_point[0]],
-                                             [flange_point[1]],
-                                             [flange_point[2]]]))[0]
+    flange_point = list(small_matrix.mat3_mul_vec(_rlm, flange_point))
 
     # Convert the Rotation of the flange to solver's base frame
-    flange_rot = _array_mult(_rlm, _re)
+    flange_rot = small_matrix.mat3_to_rows(small_matrix.mat3_mul(_rlm, _re))
 
     return flange_rot, flange_point, pivot_point
 
@@ -536,6 +1038,424 @@ def bound_solution(thetas):
     return thetas
 
 
+def compute_flange_batch(tcp, tcp_mat, lcs, lcs_mat, target, target_mat, r_tool, r_world, pivot_vector=None):
+    """
+    Vectorized version of compute_flange(). Computes the flange (and pivot)
+    of N poses at once; see solve_batch() for accepted input shapes.
+    :param r_tool: list 3x3; rotation of robot's tool frame in Maya w.r.t
+                             solver's tool frame
+    :param r_world: list 3x3; rotation of robot's world frame in Maya w.r.t
+                              solver's world frame
+    :param pivot_vector: vector (list of 3); translation vector from flange to
+                         wrist pivot. Only used for spherical wrist solver
+    :return: tuple (flange_rot, flange_point, pivot_point) of numpy arrays
+        shaped (N, 3, 3), (N, 3) and (N, 3); pivot_point is None if no pivot
+        vector is provided
+    """
+    r_tool = np.asarray(r_tool, dtype=float)
+    r_world = np.asarray(r_world, dtype=float)
+
+    tcp = np.asarray(tcp, dtype=float)
+    lcs = np.asarray(lcs, dtype=float)
+    target = np.asarray(target, dtype=float)
+
+    # Maya matrices store each axis as a row; _rotation_from_maya_batch returns
+    # the same layout, so the "truncated" matrices of compute_flange() are the
+    # transposes of these
+    tcp_axes = _rotation_from_maya_batch(tcp_mat)
+    lcs_axes = _rotation_from_maya_batch(lcs_mat)
+    target_axes = _rotation_from_maya_batch(target_mat)
+
+    # Convert TCP translation from Maya's tool frame to solver tool frame.
+    tcp_trans = np.einsum('ij,...j->...i', r_tool, tcp)
+
+    # Rotation of the robot flange w.r.t to the target in solver world frame
+    _re = np.einsum('ij,...kj,...kl,ml->...im',
+                    r_world, target_axes, tcp_axes, r_tool)
+
+    # Rotation of the robot's local coordinate system (circle
+    # controller) w.r.t the solver world frame
+    _rlm = np.einsum('ij,...jk,lk->...il', r_world, lcs_axes, r_world)
+
+    # Find distance from the robot's local coordinate system (circle
+    # controller) to target point in solver world frame
+    target_point = np.einsum('ij,...j->...i', r_world, target) \
+                   - np.einsum('ij,...j->...i', r_world, lcs)
+
+    # Find the flange point in the Maya's world frame
+    flange_point = target_point - np.einsum('...ij,...j->...i', _re, tcp_trans)
+
+    # If a pivot vector is provided, compute a pivot point in the solver's
+    # world frame
+    if pivot_vector is not None:
+        pivot_vector = np.asarray(pivot_vector, dtype=float).reshape(3)
+        pivot_point = flange_point - np.einsum('...ij,j->...i', _re, pivot_vector)
+        pivot_point = np.einsum('...ij,...j->...i', _rlm, pivot_point)
+    else:
+        pivot_point = None
+
+    # Find the flange point in solver's world frame
+    flange_point = np.einsum('...ij,...j->...i', _rlm, flange_point)
+
+    # Convert the Rotation of the flange to solver's base frame
+    flange_rot = np.matmul(_rlm, _re)
+
+    return flange_rot, flange_point, pivot_point
+
+
+def solve_spherical_wrist_batch(robot_definition, flange_rot, pivot_point, sol=[1, 1, 1], geometry=None, metrics=False):
+    """
+    Vectorized version of solve_spherical_wrist(). Solves every flange
+    rotation and wrist pivot point in one pass, following the same branches
+    as the scalar solver.
+    :param robot_definition: list; robot geometry as stored on the rig
+    :param flange_rot: (..., 3, 3) array; flange rotation in solver frame
+    :param pivot_point: (..., 3) array; wrist pivot point in solver frame
+    :param sol: list of three solution bools (or arrays of bools that
+        broadcast against the poses)
+    :param geometry: SphericalWristGeometry; precomputed from robot_definition
+    :param metrics: bool; if True, also return SolverMetrics
+    :return thetas: (..., 6) numpy array of axis values in degrees
+    :return metrics: SolverMetrics of (...) arrays, if metrics
+    """
+    if geometry is None:
+        geometry = get_spherical_wrist_geometry(robot_definition)
+
+    a1 = geometry.a1
+    b = geometry.b
+    c1 = geometry.c1
+    c2 = geometry.c2
+    k_2 = geometry.k_2
+    k = geometry.k
+    psi_3 = geometry.phi
+
+    sol_1, sol_2, sol_3 = [np.asarray(s, dtype=bool) for s in sol]
+
+    flange_rot = np.asarray(flange_rot, dtype=float)
+    pivot_point = np.asarray(pivot_point, dtype=float)
+
+    px = pivot_point[..., 0]
+    py = pivot_point[..., 1]
+    pz = pivot_point[..., 2]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        #=========#
+        #  SOLVE  #
+        #=========#
+        nx1 = np.sqrt(py * py + px * px - geometry.b_2) - a1
+        s1_2 = nx1 * nx1 + (pz - c1) * (pz - c1)
+        s2_2 = (nx1 + geometry.two_a1) * (nx1 + geometry.two_a1) + (pz - c1) * (pz - c1)
+
+        # Solve for Thetas 1-3
+        # Solution 1 selects which of s1 and s2 is used for the law of cosines
+        s_2 = np.where(sol_1, s1_2, s2_2)
+        s = np.sqrt(s_2)
+
+        theta_1 = np.where(sol_1,
+                           np.arctan2(py, px) - np.arctan2(b, (nx1 + a1)),
+                           np.arctan2(py, px) + np.arctan2(b, (nx1 + a1)) - math.pi)
+
+        n1 = (s_2 + geometry.c2_2 - k_2) / (2 * s * c2)
+        n1 = np.where(np.abs(n1) > 1, 1, n1)  # Theta 2 is undefined if |n1| > 1
+
+        n2 = (geometry.c2_2 + k_2 - s_2) / (2 * c2 * k)
+        if metrics:
+            # n2 is the cosine of the elbow angle
+            elbow = np.sqrt(np.clip(1 - n2 * n2, 0, 1))
+            reach = c2 + k - s
+        n2 = np.where(np.abs(n2) > 1, -1, n2)  # Theta 3 is undefined if |n2| > 1
+
+        acos_n1 = np.arccos(n1)
+        acos_n2 = np.arccos(n2)
+        psi_2_1 = np.arctan2(nx1, (pz - c1))
+        psi_2_2 = np.arctan2((nx1 + geometry.two_a1), (pz - c1))
+
+        theta_2 = np.where(sol_1,
+                           np.where(sol_2,
+                                    -acos_n1 + psi_2_1,
+                                    acos_n1 + psi_2_1),
+                           np.where(sol_2,
+                                    acos_n1 - psi_2_2,
+                                    -(acos_n1 + psi_2_2)))
+
+        theta_3 = np.where(sol_1,
+                           np.where(sol_2,
+                                    math.pi - (acos_n2 - psi_3),
+                                    math.pi - (-acos_n2 - psi_3)),
+                           np.where(sol_2,
+                                    -(math.pi - (acos_n2 + psi_3)),
+                                    -(math.pi - (-acos_n2 + psi_3))))
+
+        # Solve for Thetas 4-6
+        sin_1 = np.sin(theta_1)
+        cos_1 = np.cos(theta_1)
+
+        sin_23 = np.sin(theta_2 + theta_3)
+        cos_23 = np.cos(theta_2 + theta_3)
+
+        r_xx = flange_rot[..., 0, 0]
+        r_xy = flange_rot[..., 0, 1]
+        r_xz = flange_rot[..., 0, 2]
+        r_yx = flange_rot[..., 1, 0]
+        r_yy = flange_rot[..., 1, 1]
+        r_yz = flange_rot[..., 1, 2]
+        r_zx = flange_rot[..., 2, 0]
+        r_zy = flange_rot[..., 2, 1]
+        r_zz = flange_rot[..., 2, 2]
+
+        m1 = r_xz * sin_23 * cos_1 + r_yz * sin_23 * sin_1 + r_zz * cos_23
+
+        ## Theta 4 ##
+        theta_4 = np.arctan2((r_yz * cos_1 - r_xz * sin_1), r_xz * cos_23 * cos_1 + r_yz * cos_23 * sin_1 - r_zz * sin_23)
+
+        ## Theta 5 ##
+        n3 = np.sqrt(1 - np.round(m1, 8) ** 2)
+        theta_5 = np.arctan2(n3, m1)
+        if metrics:
+            # n3 is |sin(theta5)|
+            wrist = n3
+
+        ## Theta 6 ##
+        theta_6 = np.arctan2((r_xy * sin_23 * cos_1 + r_yy * sin_23 * sin_1 + r_zy * cos_23), (-r_xx * sin_23 * cos_1 - r_yx * sin_23 * sin_1 - r_zx * cos_23))
+
+        # Solution 3 == False
+        theta_4 = np.where(sol_3, theta_4, theta_4 + math.pi)
+        theta_5 = np.where(sol_3, theta_5, -theta_5)
+        theta_6 = np.where(sol_3, theta_6, theta_6 - math.pi)
+
+    # Assemble the solution
+    thetas = np.stack(np.broadcast_arrays(theta_1, theta_2, theta_3, theta_4, theta_5, theta_6), axis=-1)
+
+    # Bound each axis value between +/- pi and convert to degrees
+    thetas = np.degrees(_bound_solution_batch(thetas))
+
+    if metrics:
+        return thetas, SolverMetrics(*np.broadcast_arrays(wrist, elbow, reach))
+    return thetas
+
+
+def solve_hawkins_keating_batch(robot_definition, flange_point, flange_rot, sol=[1, 1, 1], geometry=None, metrics=False):
+    """
+    Vectorized version of solve_hawkins_keating(). Solves every flange pose
+    in one pass, following the same branches as the scalar solver.
+    :param robot_definition: list; robot geometry as stored on the rig
+    :param flange_point: (..., 3) array; flange point in solver frame
+    :param flange_rot: (..., 3, 3) array; flange rotation in solver frame
+    :param sol: list of three solution bools (or arrays of bools that
+        broadcast against the poses)
+    :param geometry: HawkinsKeatingGeometry; precomputed from robot_definition
+    :param metrics: bool; if True, also return SolverMetrics
+    :return thetas: (..., 6) numpy array of axis values in degrees
+    :return metrics: SolverMetrics of (...) arrays, if metrics
+    """
+    if geometry is None:
+        geometry = get_hawkins_keating_geometry(robot_definition)
+
+    sol_1, sol_2, sol_3 = [np.asarray(s, dtype=bool) for s in sol]
+
+    # If the sol_1 boolean is 0, the other solutions invert
+    sol_2 = sol_2 == sol_1
+    sol_3 = sol_3 == sol_1
+
+    # Get D-H Parameters from robot_definition
+    d_1 = geometry.d_1
+    d_4 = geometry.d_4
+    d_5 = geometry.d_5
+    d_6 = geometry.d_6
+    a_2 = geometry.a_2
+    a_3 = geometry.a_3
+
+    flange_rot = np.asarray(flange_rot, dtype=float)
+    flange_point = np.asarray(flange_point, dtype=float)
+
+    T06_XX = flange_rot[..., 0, 0]
+    T06_XY = flange_rot[..., 0, 1]
+    T06_XZ = flange_rot[..., 0, 2]
+    T06_YX = flange_rot[..., 1, 0]
+    T06_YY = flange_rot[..., 1, 1]
+    T06_YZ = flange_rot[..., 1, 2]
+    T06_ZX = flange_rot[..., 2, 0]
+    T06_ZY = flange_rot[..., 2, 1]
+    T06_ZZ = flange_rot[..., 2, 2]
+    T06_X = flange_point[..., 0]
+    T06_Y = flange_point[..., 1]
+    T06_Z = flange_point[..., 2]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        #--------------#
+        # Find Theta 1 #
+        #--------------#
+        # P0_5 is found by translating backwards from frame 6 to frame 5 along z_6
+        P05_X = T06_XZ * -d_6 + T06_X
+        P05_Y = T06_YZ * -d_6 + T06_Y
+
+        nx1 = np.sqrt(P05_X * P05_X + P05_Y * P05_Y)
+
+        d_4 = np.minimum(d_4, nx1)  # Solution is undefined for d_4 > nx1
+
+        theta_1 = np.where(sol_1,
+                           np.arctan2(P05_Y, P05_X) + np.arccos(d_4 / nx1) + math.pi / 2.0,
+                           np.arctan2(P05_Y, P05_X) - np.arccos(d_4 / nx1) + math.pi / 2.0)
+
+        #--------------#
+        # Find Theta 5 #
+        #--------------#
+        nx2 = T06_X * np.sin(theta_1) - T06_Y * np.cos(theta_1) - d_4
+
+        theta_5 = np.where(sol_3,
+                           -np.arccos(nx2 / d_6),
+                           np.arccos(nx2 / d_6))
+
+        #--------------#
+        # Find Theta 6 #
+        #--------------#
+        s1 = np.sin(theta_1)
+        c1 = np.cos(theta_1)
+        s5 = np.sin(theta_5)
+        c5 = np.cos(theta_5)
+
+        n1 = -T06_XY * s1 + T06_YY * c1
+        n2 = T06_XX * s1 - T06_YX * c1
+
+        theta_6 = np.arctan2(n1 / s5, n2 / s5)
+
+        #--------------#
+        # Find Theta 3 #
+        #--------------#
+        s6 = np.sin(theta_6)
+        c6 = np.cos(theta_6)
+
+        P14_X = d_5 * (s6 * (T06_XX * c1 + T06_YX * s1) + c6 * (T06_XY * c1 + T06_YY * s1)) - d_6 * (T06_XZ * c1 + T06_YZ * s1) + T06_X * c1 + T06_Y * s1
+        P14_Y = T06_Z - d_1 - d_6 * T06_ZZ + d_5 * (T06_ZY * c6 + T06_ZX * s6)
+
+        P14_XY_2 = P14_X * P14_X + P14_Y * P14_Y
+
+        c3 = (P14_XY_2 - geometry.a_2_a_3_2) / geometry.two_a_2_a_3
+        if metrics:
+            # s5 is sin(theta5) and c3 is the cosine of the elbow angle
+            wrist = np.abs(s5)
+            elbow = np.sqrt(np.clip(1 - c3 * c3, 0, 1))
+            reach = a_2 + a_3 - np.sqrt(P14_XY_2)
+        c3 = np.where(c3 > 1, 1, c3)  # Solution is undefined for c3 > 1
+
+        theta_3 = np.where(sol_2,
+                           np.arccos(c3),
+                           2 * math.pi - np.arccos(c3))
+
+        #--------------#
+        # Find Theta 2 #
+        #--------------#
+        s3 = np.sin(theta_3)
+
+        denom = geometry.a_2_a_3_2 + geometry.two_a_2_a_3 * c3
+        nc_1 = (a_2 + a_3 * c3)
+        nc_2 = a_3 * s3
+
+        theta_2 = np.arctan2((nc_1 * P14_Y - nc_2 * P14_X) / denom, (nc_1 * P14_X + nc_2 * P14_Y) / denom) - math.pi
+
+        #--------------#
+        # Find Theta 4 #
+        #--------------#
+        c23 = np.cos(theta_2 + theta_3)
+        s23 = np.sin(theta_2 + theta_3)
+
+        T04_XX = -s5 * (T06_XZ * c1 + T06_YZ * s1) - c5 * (s6 * (T06_XY * c1 + T06_YY * s1) - c6 * (T06_XX * c1 + T06_YX * s1))
+        T04_XY = c5 * (T06_ZX * c6 - T06_ZY * s6) - T06_ZZ * s5
+
+        theta_4 = np.arctan2(c23 * T04_XY - s23 * T04_XX, T04_XX * c23 + T04_XY * s23)
+
+        # Theta 6 is off by 180 degrees (see solve_hawkins_keating)
+        theta_6 = theta_6 - math.pi
+
+    # Assemble the solution
+    thetas = np.stack(np.broadcast_arrays(theta_1, theta_2, theta_3, theta_4, theta_5, theta_6), axis=-1)
+
+    # Where solve_hawkins_keating() raises (an acos out of its domain, or a
+    # division by zero at the wrist singularity or by a zero denominator),
+    # the whole solution is undefined, not only the axes that came out NaN
+    undefined = np.isnan(thetas).any(axis=-1) | (nx1 == 0) | (s5 == 0) | (denom == 0)
+    thetas[np.broadcast_to(undefined, thetas.shape[:-1])] = np.nan
+
+    # Bound each axis value between +/- pi and convert to degrees
+    thetas = np.degrees(_bound_solution_batch(thetas))
+
+    if metrics:
+        return thetas, SolverMetrics(*np.broadcast_arrays(wrist, elbow, reach))
+    return thetas
+
+
+def find_singular_frames(metrics,
+                         wrist_threshold=WRIST_SINGULARITY_THRESHOLD,
+                         elbow_threshold=ELBOW_SINGULARITY_THRESHOLD,
+                         reach_threshold=REACH_MARGIN_THRESHOLD):
+    """
+    Flag the poses whose metrics fall below any of the thresholds. Poses
+    without a solution (NaN metrics) are flagged too.
+    :param metrics: SolverMetrics, e.g. from solve_batch(return_metrics=True)
+    :return: numpy array of bools, shaped as the metrics
+    """
+    with np.errstate(invalid='ignore'):
+        return ~((metrics.wrist >= wrist_threshold)
+                 & (metrics.elbow >= elbow_threshold)
+                 & (metrics.reach >= reach_threshold))
+
+
+def get_flagged_runs(flags):
+    """
+    Group consecutive flagged frames into runs.
+    :param flags: (N,) array of bools, e.g. from find_singular_frames()
+    :return: list of (start, stop) frame indices; stop is exclusive
+    """
+    flags = np.asarray(flags, dtype=bool)
+    edges = np.diff(np.concatenate(([0], flags.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+def _atleast_1d_metrics(metrics):
+    """
+    Give metrics of a single pose a pose axis, as np.atleast_2d does for the
+    solved thetas.
+    """
+    return SolverMetrics(*[np.atleast_1d(m) for m in metrics])
+
+
+def _bound_solution_batch(thetas):
+    """
+    Vectorized version of bound_solution(); bounds each axis value between
+    +/- pi.
+    :param thetas: numpy array of angles in radians
+    :return:
+    """
+    return np.where(np.abs(thetas) > math.pi,
+                    thetas - np.sign(thetas) * 2 * math.pi,
+                    thetas)
+
+
+def _rotation_from_maya_batch(mat):
+    """
+    Get the 3x3 rotation block of one or more Maya matrices.
+    :param mat: (..., 16) array of flattened Maya matrices, or (..., 4, 4)
+    :return: (..., 3, 3) numpy array; each row is an axis of the input frame
+    """
+    mat = np.asarray(mat, dtype=float)
+    if mat.shape[-1] == 16:
+        mat = mat.reshape(mat.shape[:-1] + (4, 4))
+    return mat[..., :3, :3]
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required by the batch solvers,
+    is not available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for batch inverse kinematics; '
+                          'see Mimic installation instructions for more details')
+
+
 def apply_offsets(thetas, axis_offsets, rot_directions):
     """
     """
@@ -570,24 +1490,6 @@ def remove_offsets(thetas, axis_offsets, rot_directions):
     return thetas_normalized
 
 
-# Utility Functions
-def _array_mult(X,Y):
-    result = [[0] * len(Y[0]) for i in range(len(X))]
-    for i in range(len(X)):
-        # iterate through columns of Y
-        for j in range(len(Y[0])):
-            # iterate through rows of Y
-            for k in range(len(Y)):
-                result[i][j] += X[i][k] * Y[k][j]
-        
-    return result
-
-
-def _tpose(lis):
-    result = [list(x) for x in zip(*lis)]
-    return result
-
-
 def select_solution(all_solutions, sol_1=False, sol_2=False, sol_3=False):
     """
     Select an inverse kinematic solution given all solutions.
@@ -0,0 +1,267 @@
+#!usr/bin/env python
+"""
+Pose resampling. Interpolates sparsely sampled poses, such as those sampled
+on keyframes only, onto an evenly timed grid, e.g. the servo period of the
+controller, without sampling the Maya scene again.
+
+Orientations are interpolated as quaternions by SLERP or SQUAD and positions
+by a piecewise cubic Hermite spline or linearly. Both schemes are local: each
+interval only depends on its neighbouring samples, and every input sample is
+reproduced exactly.
+"""
+
+from robotmath import transforms
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; resampling is unavailable
+    np = None
+
+# Orientation interpolation methods
+SLERP = 'slerp'
+SQUAD = 'squad'
+
+# Position interpolation methods
+LINEAR = 'linear'
+CUBIC = 'cubic'
+
+
+def resample_poses(times, poses, period=None, sample_times=None,
+                   orientation=SQUAD, position=CUBIC):
+    """
+    Resample a list of poses onto evenly timed samples.
+    :param times: Sample times of the poses, in seconds; strictly increasing
+    :param poses: List of Pose tuples (or flat 12-value sequences) ordered as
+    [x, y, z, ix, iy, iz, jx, jy, jz, kx, ky, kz]
+    :param period: Sample period of the output, in seconds; required unless
+    sample_times is given
+    :param sample_times: Optional explicit output times, overrides period
+    :param orientation: Orientation interpolation method, SLERP or SQUAD
+    :param position: Position interpolation method, LINEAR or CUBIC
+    :return: Tuple of (sample_times, poses); poses are of the same type as
+    the input poses
+    """
+    _check_numpy()
+
+    times = _check_times(times)
+    if len(poses) != len(times):
+        raise ValueError('Expected one pose per sample time; got {} poses and {} times'
+                         .format(len(poses), len(times)))
+
+    if sample_times is None:
+        if period is None:
+            raise ValueError('Either a period or sample times are required')
+        sample_times = get_sample_times(times[0], times[-1], period)
+    else:
+        sample_times = np.atleast_1d(np.asarray(sample_times, dtype=float))
+
+    points, quaternions = get_pose_components(poses)
+    sampled_points = interpolate_positions(times, points, sample_times, position)
+    sampled_quaternions = interpolate_orientations(times, quaternions, sample_times, orientation)
+    sampled_vectors = transforms.matrices_by_quaternions(sampled_quaternions).reshape(-1, 9)
+
+    values = np.concatenate([sampled_points, sampled_vectors], axis=-1).tolist()
+    pose_type = type(poses[0])
+    if hasattr(pose_type, '_make'):  # namedtuple, e.g. postproc.Pose
+        sampled_poses = [pose_type._make(v) for v in values]
+    else:
+        sampled_poses = values
+    return sample_times, sampled_poses
+
+
+def get_sample_times(start, stop, period):
+    """
+    Get evenly timed samples from start to stop. The last sample is the last
+    multiple of period that does not exceed stop, so that the sample period
+    stays constant.
+    :param start: Start time, in seconds
+    :param stop: Stop time, in seconds
+    :param period: Sample period, in seconds
+    :return: Array of shape (M,)
+    """
+    _check_numpy()
+    if period <= 0:
+        raise ValueError('Sample period must be positive')
+    # Tolerate float error so that stop itself is included when it lies on
+    # the grid
+    count = int(np.floor((stop - start) / period + 1E-9)) + 1
+    return start + np.arange(count) * period
+
+
+def get_pose_components(poses):
+    """
+    Split poses into positions and orientation quaternions. Quaternion signs
+    are chosen so that consecutive quaternions lie on the same hemisphere,
+    which keeps interpolation on the shorter arc.
+    :param poses: List of Pose tuples
+    :return: Tuple of (points, quaternions) of shapes (N, 3) and (N, 4)
+    """
+    _check_numpy()
+    values = np.asarray(poses, dtype=float).reshape(-1, 12)
+    points = values[:, :3]
+    quaternions = transforms.quaternions_by_matrices(
+        transforms.matrices_by_vectors(values[:, 3:]), robust=True)
+    return points, get_continuous_quaternions(quaternions)
+
+
+def get_continuous_quaternions(quaternions):
+    """
+    Flip quaternion signs so that each quaternion lies on the same hemisphere
+    as its predecessor; q and -q represent the same rotation.
+    :param quaternions: Array of shape (N, 4)
+    :return: Array of shape (N, 4)
+    """
+    quaternions = np.array(quaternions, dtype=float)
+    if len(quaternions) < 2:
+        return quaternions
+    dots = np.sum(quaternions[1:] * quaternions[:-1], axis=-1)
+    # A flip propagates to every following quaternion
+    flips = np.cumprod(np.where(dots < 0, -1.0, 1.0))
+    quaternions[1:] *= flips[:, np.newaxis]
+    return quaternions
+
+
+def interpolate_positions(times, points, sample_times, method=CUBIC):
+    """
+    Interpolate positions at sample times.
+    :param times: Array of shape (N,), strictly increasing
+    :param points: Array of shape (N, D)
+    :param sample_times: Array of shape (M,), within [times[0], times[-1]]
+    :param method: LINEAR or CUBIC
+    :return: Array of shape (M, D)
+    """
+    _check_numpy()
+    times = _check_times(times)
+    points = np.asarray(points, dtype=float).reshape(len(times), -1)
+    index, u = _locate(times, sample_times)
+    p_0 = points[index]
+    p_1 = points[index + 1]
+    u = u[:, np.newaxis]
+
+    if method == LINEAR:
+        return p_0 + (p_1 - p_0) * u
+    elif method == CUBIC:
+        tangents = _get_tangents(times, points)
+        h = (times[index + 1] - times[index])[:, np.newaxis]
+        u_2 = u * u
+        u_3 = u_2 * u
+        # Cubic Hermite basis functions
+        h_00 = 2 * u_3 - 3 * u_2 + 1
+        h_10 = u_3 - 2 * u_2 + u
+        h_01 = -2 * u_3 + 3 * u_2
+        h_11 = u_3 - u_2
+        return (h_00 * p_0 + h_10 * h * tangents[index] +
+                h_01 * p_1 + h_11 * h * tangents[index + 1])
+    else:
+        raise ValueError('Unsupported position interpolation method: {}'.format(method))
+
+
+def interpolate_orientations(times, quaternions, sample_times, method=SQUAD):
+    """
+    Interpolate orientations at sample times.
+    :param times: Array of shape (N,), strictly increasing
+    :param quaternions: Array of shape (N, 4); see get_continuous_quaternions
+    :param sample_times: Array of shape (M,), within [times[0], times[-1]]
+    :param method: SLERP or SQUAD
+    :return: Array of shape (M, 4)
+    """
+    _check_numpy()
+    times = _check_times(times)
+    quaternions = np.asarray(quaternions, dtype=float).reshape(-1, 4)
+    index, u = _locate(times, sample_times)
+    q_0 = quaternions[index]
+    q_1 = quaternions[index + 1]
+
+    if method == SLERP:
+        return transforms.quaternions_slerp(q_0, q_1, u)
+    elif method == SQUAD:
+        controls = _get_squad_controls(quaternions)
+        return transforms.quaternions_slerp(
+            transforms.quaternions_slerp(q_0, q_1, u, shortest=False),
+            transforms.quaternions_slerp(controls[index], controls[index + 1], u, shortest=False),
+            2 * u * (1 - u),
+            shortest=False)
+    else:
+        raise ValueError('Unsupported orientation interpolation method: {}'.format(method))
+
+
+def _get_tangents(times, points):
+    """
+    Get the tangents of a piecewise cubic Hermite spline through points, as
+    the time-weighted average of the neighbouring interval slopes. End
+    tangents are the slopes of the first and last intervals.
+    :param times: Array of shape (N,)
+    :param points: Array of shape (N, D)
+    :return: Array of shape (N, D)
+    """
+    h = np.diff(times)[:, np.newaxis]
+    slopes = np.diff(points, axis=0) / h
+    tangents = np.empty_like(points)
+    tangents[0] = slopes[0]
+    tangents[-1] = slopes[-1]
+    # Each slope is weighted by the length of the other interval, which gives
+    # the exact derivative of the parabola through three samples
+    tangents[1:-1] = (slopes[:-1] * h[1:] + slopes[1:] * h[:-1]) / (h[:-1] + h[1:])
+    return tangents
+
+
+def _get_squad_controls(quaternions):
+    """
+    Get the inner control quaternions of a SQUAD spline:
+    s_i = q_i * exp(-(log(q_i' * q_i+1) + log(q_i' * q_i-1)) / 4).
+    End controls are the end quaternions themselves.
+    :param quaternions: Array of shape (N, 4)
+    :return: Array of shape (N, 4)
+    """
+    controls = quaternions.copy()
+    if len(quaternions) < 3:
+        return controls
+    q = quaternions[1:-1]
+    q_inverse = transforms.quaternions_conjugate(q)
+    log_next = transforms.quaternions_log(transforms.quaternions_multiply(q_inverse, quaternions[2:]))
+    log_prev = transforms.quaternions_log(transforms.quaternions_multiply(q_inverse, quaternions[:-2]))
+    controls[1:-1] = transforms.quaternions_multiply(
+        q, transforms.quaternions_exp(-(log_next + log_prev) / 4))
+    return controls
+
+
+def _locate(times, sample_times):
+    """
+    Find the interval of each sample time and its normalized position within
+    that interval.
+    :param times: Array of shape (N,)
+    :param sample_times: Array of shape (M,)
+    :return: Tuple of (index, u), interval start indices and parameters in
+    [0, 1]
+    """
+    sample_times = np.atleast_1d(np.asarray(sample_times, dtype=float))
+    if sample_times.size and (sample_times.min() < times[0] - 1E-9 or
+                              sample_times.max() > times[-1] + 1E-9):
+        raise ValueError('Sample times must lie within the sampled time range')
+    index = np.clip(np.searchsorted(times, sample_times, side='right') - 1, 0, len(times) - 2)
+    u = np.clip((sample_times - times[index]) / (times[index + 1] - times[index]), 0, 1)
+    return index, u
+
+
+def _check_times(times):
+    """
+    Check that there are at least two, strictly increasing sample times.
+    :param times: Sample times
+    :return: Array of shape (N,)
+    """
+    times = np.asarray(times, dtype=float).ravel()
+    if len(times) < 2:
+        raise ValueError('At least two samples are required to interpolate')
+    if np.any(np.diff(times) <= 0):
+        raise ValueError('Sample times must be strictly increasing')
+    return times
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required for resampling, is not
+    available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for pose resampling')
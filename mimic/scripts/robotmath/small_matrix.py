@@ -0,0 +1,332 @@
+#!usr/bin/env python
+"""
+Fixed-size 3x3 and 4x4 matrix kernels.
+
+Matrices are flat, row-major tuples (9 values for 3x3, 16 values for 4x4) and
+vectors are 3-tuples. Every operation is unrolled, so no intermediate lists
+are built and no loops are interpreted; this keeps per-call costs low for
+code that runs on every DG evaluation, such as the IK solver. 4x4 matrices
+use the column-vector convention (translation in the last column), as in
+general_utils.matrix_compose_4x4.
+
+Use the *_from_rows/*_to_rows functions to convert from and to the nested
+lists used throughout Mimic, and to_numpy() when NumPy is available.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; to_numpy() is unavailable
+    np = None
+
+
+IDENTITY_3X3 = (1.0, 0.0, 0.0,
+                0.0, 1.0, 0.0,
+                0.0, 0.0, 1.0)
+
+IDENTITY_4X4 = (1.0, 0.0, 0.0, 0.0,
+                0.0, 1.0, 0.0, 0.0,
+                0.0, 0.0, 1.0, 0.0,
+                0.0, 0.0, 0.0, 1.0)
+
+
+# Conversions
+def mat3_from_rows(rows):
+    """
+    Flatten a nested 3x3 matrix.
+    :param rows: 3x3 matrix (list of list)
+    :return: flat 3x3 matrix
+    """
+    r0, r1, r2 = rows
+    return (r0[0], r0[1], r0[2],
+            r1[0], r1[1], r1[2],
+            r2[0], r2[1], r2[2])
+
+
+def mat3_to_rows(m):
+    """
+    Expand a flat 3x3 matrix to a nested list.
+    :param m: flat 3x3 matrix
+    :return: 3x3 matrix (list of list)
+    """
+    return [[m[0], m[1], m[2]],
+            [m[3], m[4], m[5]],
+            [m[6], m[7], m[8]]]
+
+
+def mat3_from_maya(maya_matrix):
+    """
+    Get the rotation block of a Maya matrix (e.g. an MMatrix or the flat list
+    returned by cmds.xform(m=True)). Maya stores each axis of the frame as a
+    row, so the rows of the result are the frame's x, y and z axes.
+    :param maya_matrix: flat 4x4 Maya matrix (16 values)
+    :return: flat 3x3 matrix
+    """
+    m = maya_matrix
+    return (m[0], m[1], m[2],
+            m[4], m[5], m[6],
+            m[8], m[9], m[10])
+
+
+def mat4_from_rows(rows):
+    """
+    Flatten a nested 4x4 matrix.
+    :param rows: 4x4 matrix (list of list)
+    :return: flat 4x4 matrix
+    """
+    r0, r1, r2, r3 = rows
+    return (r0[0], r0[1], r0[2], r0[3],
+            r1[0], r1[1], r1[2], r1[3],
+            r2[0], r2[1], r2[2], r2[3],
+            r3[0], r3[1], r3[2], r3[3])
+
+
+def mat4_to_rows(m):
+    """
+    Expand a flat 4x4 matrix to a nested list.
+    :param m: flat 4x4 matrix
+    :return: 4x4 matrix (list of list)
+    """
+    return [[m[0], m[1], m[2], m[3]],
+            [m[4], m[5], m[6], m[7]],
+            [m[8], m[9], m[10], m[11]],
+            [m[12], m[13], m[14], m[15]]]
+
+
+def to_numpy(m):
+    """
+    Convert a flat 3x3 or 4x4 matrix to a square NumPy array.
+    :param m: flat 3x3 or 4x4 matrix
+    :return: numpy array
+    """
+    if np is None:
+        raise ImportError('NumPy is not installed')
+    size = 3 if len(m) == 9 else 4
+    return np.array(m, dtype=float).reshape(size, size)
+
+
+# 3x3 operations
+def mat3_transpose(m):
+    """
+    Transpose a 3x3 matrix.
+    :param m: flat 3x3 matrix
+    :return: flat 3x3 matrix
+    """
+    return (m[0], m[3], m[6],
+            m[1], m[4], m[7],
+            m[2], m[5], m[8])
+
+
+def mat3_mul(a, b):
+    """
+    Multiply two 3x3 matrices.
+    :param a: flat 3x3 matrix
+    :param b: flat 3x3 matrix
+    :return: flat 3x3 matrix, a * b
+    """
+    a0, a1, a2, a3, a4, a5, a6, a7, a8 = a
+    b0, b1, b2, b3, b4, b5, b6, b7, b8 = b
+    return (a0 * b0 + a1 * b3 + a2 * b6,
+            a0 * b1 + a1 * b4 + a2 * b7,
+            a0 * b2 + a1 * b5 + a2 * b8,
+            a3 * b0 + a4 * b3 + a5 * b6,
+            a3 * b1 + a4 * b4 + a5 * b7,
+            a3 * b2 + a4 * b5 + a5 * b8,
+            a6 * b0 + a7 * b3 + a8 * b6,
+            a6 * b1 + a7 * b4 + a8 * b7,
+            a6 * b2 + a7 * b5 + a8 * b8)
+
+
+def mat3_mul_vec(m, v):
+    """
+    Multiply a 3x3 matrix by a column vector.
+    :param m: flat 3x3 matrix
+    :param v: vector of 3 values
+    :return: 3-tuple, m * v
+    """
+    v0, v1, v2 = v[0], v[1], v[2]
+    return (m[0] * v0 + m[1] * v1 + m[2] * v2,
+            m[3] * v0 + m[4] * v1 + m[5] * v2,
+            m[6] * v0 + m[7] * v1 + m[8] * v2)
+
+
+def mat3_transpose_mul(a, b):
+    """
+    Multiply the transpose of a 3x3 matrix by another 3x3 matrix without
+    building the transpose.
+    :param a: flat 3x3 matrix
+    :param b: flat 3x3 matrix
+    :return: flat 3x3 matrix, a^T * b
+    """
+    a0, a1, a2, a3, a4, a5, a6, a7, a8 = a
+    b0, b1, b2, b3, b4, b5, b6, b7, b8 = b
+    return (a0 * b0 + a3 * b3 + a6 * b6,
+            a0 * b1 + a3 * b4 + a6 * b7,
+            a0 * b2 + a3 * b5 + a6 * b8,
+            a1 * b0 + a4 * b3 + a7 * b6,
+            a1 * b1 + a4 * b4 + a7 * b7,
+            a1 * b2 + a4 * b5 + a7 * b8,
+            a2 * b0 + a5 * b3 + a8 * b6,
+            a2 * b1 + a5 * b4 + a8 * b7,
+            a2 * b2 + a5 * b5 + a8 * b8)
+
+
+def mat3_mul_transpose(a, b):
+    """
+    Multiply a 3x3 matrix by the transpose of another 3x3 matrix without
+    building the transpose.
+    :param a: flat 3x3 matrix
+    :param b: flat 3x3 matrix
+    :return: flat 3x3 matrix, a * b^T
+    """
+    a0, a1, a2, a3, a4, a5, a6, a7, a8 = a
+    b0, b1, b2, b3, b4, b5, b6, b7, b8 = b
+    return (a0 * b0 + a1 * b1 + a2 * b2,
+            a0 * b3 + a1 * b4 + a2 * b5,
+            a0 * b6 + a1 * b7 + a2 * b8,
+            a3 * b0 + a4 * b1 + a5 * b2,
+            a3 * b3 + a4 * b4 + a5 * b5,
+            a3 * b6 + a4 * b7 + a5 * b8,
+            a6 * b0 + a7 * b1 + a8 * b2,
+            a6 * b3 + a7 * b4 + a8 * b5,
+            a6 * b6 + a7 * b7 + a8 * b8)
+
+
+def vec3_sub(a, b):
+    """
+    Subtract two vectors of 3 values.
+    :param a: vector
+    :param b: vector
+    :return: 3-tuple, a - b
+    """
+    return (a[0] - b[0], a[1] - b[1], a[2] - b[2])
+
+
+# 4x4 operations
+def mat4_compose(rotation, translation):
+    """
+    Compose a 4x4 matrix from a rotation and a translation.
+    :param rotation: flat 3x3 matrix
+    :param translation: vector of 3 values
+    :return: flat 4x4 matrix
+    """
+    r = rotation
+    t = translation
+    return (r[0], r[1], r[2], t[0],
+            r[3], r[4], r[5], t[1],
+            r[6], r[7], r[8], t[2],
+            0.0, 0.0, 0.0, 1.0)
+
+
+def mat4_decompose(m):
+    """
+    Decompose a 4x4 matrix into its rotation and translation.
+    :param m: flat 4x4 matrix
+    :return: tuple (flat 3x3 rotation, 3-tuple translation)
+    """
+    return ((m[0], m[1], m[2],
+             m[4], m[5], m[6],
+             m[8], m[9], m[10]),
+            (m[3], m[7], m[11]))
+
+
+def mat4_transpose(m):
+    """
+    Transpose a 4x4 matrix.
+    :param m: flat 4x4 matrix
+    :return: flat 4x4 matrix
+    """
+    return (m[0], m[4], m[8], m[12],
+            m[1], m[5], m[9], m[13],
+            m[2], m[6], m[10], m[14],
+            m[3], m[7], m[11], m[15])
+
+
+def mat4_mul(a, b):
+    """
+    Multiply two 4x4 matrices.
+    :param a: flat 4x4 matrix
+    :param b: flat 4x4 matrix
+    :return: flat 4x4 matrix, a * b
+    """
+    (a0, a1, a2, a3, a4, a5, a6, a7,
+     a8, a9, a10, a11, a12, a13, a14, a15) = a
+    (b0, b1, b2, b3, b4, b5, b6, b7,
+     b8, b9, b10, b11, b12, b13, b14, b15) = b
+    return (a0 * b0 + a1 * b4 + a2 * b8 + a3 * b12,
+            a0 * b1 + a1 * b5 + a2 * b9 + a3 * b13,
+            a0 * b2 + a1 * b6 + a2 * b10 + a3 * b14,
+            a0 * b3 + a1 * b7 + a2 * b11 + a3 * b15,
+            a4 * b0 + a5 * b4 + a6 * b8 + a7 * b12,
+            a4 * b1 + a5 * b5 + a6 * b9 + a7 * b13,
+            a4 * b2 + a5 * b6 + a6 * b10 + a7 * b14,
+            a4 * b3 + a5 * b7 + a6 * b11 + a7 * b15,
+            a8 * b0 + a9 * b4 + a10 * b8 + a11 * b12,
+            a8 * b1 + a9 * b5 + a10 * b9 + a11 * b13,
+            a8 * b2 + a9 * b6 + a10 * b10 + a11 * b14,
+            a8 * b3 + a9 * b7 + a10 * b11 + a11 * b15,
+            a12 * b0 + a13 * b4 + a14 * b8 + a15 * b12,
+            a12 * b1 + a13 * b5 + a14 * b9 + a15 * b13,
+            a12 * b2 + a13 * b6 + a14 * b10 + a15 * b14,
+            a12 * b3 + a13 * b7 + a14 * b11 + a15 * b15)
+
+
+def mat4_rigid_inverse(m):
+    """
+    Invert a rigid (rotation and translation only) 4x4 matrix using
+    [R, t]^-1 = [R^T, -R^T * t].
+    :param m: flat 4x4 matrix
+    :return: flat 4x4 matrix
+    """
+    r0, r1, r2, t0 = m[0], m[1], m[2], m[3]
+    r3, r4, r5, t1 = m[4], m[5], m[6], m[7]
+    r6, r7, r8, t2 = m[8], m[9], m[10], m[11]
+    return (r0, r3, r6, -(r0 * t0 + r3 * t1 + r6 * t2),
+            r1, r4, r7, -(r1 * t0 + r4 * t1 + r7 * t2),
+            r2, r5, r8, -(r2 * t0 + r5 * t1 + r8 * t2),
+            0.0, 0.0, 0.0, 1.0)
+
+
+def mat4_inverse(m):
+    """
+    Invert any non-singular 4x4 matrix by cofactor expansion. Prefer
+    mat4_rigid_inverse() for rigid transforms.
+    :param m: flat 4x4 matrix
+    :return: flat 4x4 matrix
+    """
+    (m0, m1, m2, m3, m4, m5, m6, m7,
+     m8, m9, m10, m11, m12, m13, m14, m15) = m
+
+    # 2x2 sub-determinants of the upper and lower row pairs
+    s0 = m0 * m5 - m4 * m1
+    s1 = m0 * m6 - m4 * m2
+    s2 = m0 * m7 - m4 * m3
+    s3 = m1 * m6 - m5 * m2
+    s4 = m1 * m7 - m5 * m3
+    s5 = m2 * m7 - m6 * m3
+
+    c5 = m10 * m15 - m14 * m11
+    c4 = m9 * m15 - m13 * m11
+    c3 = m9 * m14 - m13 * m10
+    c2 = m8 * m15 - m12 * m11
+    c1 = m8 * m14 - m12 * m10
+    c0 = m8 * m13 - m12 * m9
+
+    determinant = s0 * c5 - s1 * c4 + s2 * c3 + s3 * c2 - s4 * c1 + s5 * c0
+    inv_det = 1.0 / determinant
+
+    return ((m5 * c5 - m6 * c4 + m7 * c3) * inv_det,
+            (-m1 * c5 + m2 * c4 - m3 * c3) * inv_det,
+            (m13 * s5 - m14 * s4 + m15 * s3) * inv_det,
+            (-m9 * s5 + m10 * s4 - m11 * s3) * inv_det,
+            (-m4 * c5 + m6 * c2 - m7 * c1) * inv_det,
+            (m0 * c5 - m2 * c2 + m3 * c1) * inv_det,
+            (-m12 * s5 + m14 * s2 - m15 * s1) * inv_det,
+            (m8 * s5 - m10 * s2 + m11 * s1) * inv_det,
+            (m4 * c4 - m5 * c2 + m7 * c0) * inv_det,
+            (-m0 * c4 + m1 * c2 - m3 * c0) * inv_det,
+            (m12 * s4 - m13 * s2 + m15 * s0) * inv_det,
+            (-m8 * s4 + m9 * s2 - m11 * s0) * inv_det,
+            (-m4 * c3 + m5 * c1 - m6 * c0) * inv_det,
+            (m0 * c3 - m1 * c1 + m2 * c0) * inv_det,
+            (-m12 * s3 + m13 * s1 - m14 * s0) * inv_det,
+            (m8 * s3 - m9 * s1 + m10 * s0) * inv_det)
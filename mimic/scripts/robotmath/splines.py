@@ -0,0 +1,222 @@
+#!usr/bin/env python
+"""
+Joint-space spline fitting. Fits interpolating B-splines to sampled axis
+values so that positions and their analytic velocity, acceleration and jerk
+can be evaluated at any time, e.g. to check limits between samples or to
+resample a program to a controller period without sampling the scene again.
+"""
+
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; spline fitting is unavailable
+    np = None
+
+CUBIC = 3
+QUINTIC = 5
+
+# Position and its time derivatives at a set of sample times; each field is
+# an array of shape (M, A), one column per axis
+SplineSample = namedtuple('SplineSample', [
+                          'position',
+                          'velocity',
+                          'accel',
+                          'jerk'
+                          ])
+
+
+class JointSpline(object):
+    """
+    Interpolating B-spline through sampled values of one or more axes. Knots
+    are placed on the sample times (not-a-knot end conditions), so the spline
+    passes through every sample and needs no end derivatives. Cubic splines
+    have continuous acceleration and piecewise constant jerk; quintic splines
+    have continuous jerk.
+    """
+
+    def __init__(self, times, values, degree=CUBIC):
+        """
+        Fit the spline.
+        :param times: Array-like of shape (N,), strictly increasing, in seconds
+        :param values: Array-like of shape (N,) or (N, A), one column per axis
+        :param degree: Spline degree, CUBIC or QUINTIC. Lowered to the
+        highest degree the number of samples supports (linear for two).
+        """
+        _check_numpy()
+
+        times = np.asarray(times, dtype=float).ravel()
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[:, np.newaxis]
+        if len(times) < 2:
+            raise ValueError('At least two samples are required to fit a spline')
+        if len(values) != len(times):
+            raise ValueError('Expected one value per sample time; got {} values and {} times'
+                             .format(len(values), len(times)))
+        if np.any(np.diff(times) <= 0):
+            raise ValueError('Sample times must be strictly increasing')
+        if degree < 1:
+            raise ValueError('Spline degree must be at least 1')
+
+        self.degree = min(degree, len(times) - 1)
+        self.times = times
+        self.knots = _get_interpolation_knots(times, self.degree)
+        self.coefficients = _solve_interpolation(self.knots, self.degree, times, values)
+        self._derivative_coefficients = [self.coefficients]
+
+    @property
+    def num_axes(self):
+        """
+        Number of axes (columns) the spline was fit to.
+        :return:
+        """
+        return self.coefficients.shape[1]
+
+    def evaluate(self, times, order=0):
+        """
+        Evaluate the spline, or one of its derivatives, at the given times.
+        Times outside of the sampled range are extrapolated from the end
+        polynomials.
+        :param times: Array-like of shape (M,), in seconds
+        :param order: Derivative order; 0 for position, 1 for velocity, etc.
+        :return: Array of shape (M, A)
+        """
+        times = np.atleast_1d(np.asarray(times, dtype=float))
+        if order > self.degree:
+            return np.zeros((len(times), self.num_axes))
+
+        coefficients = self._get_derivative_coefficients(order)
+        degree = self.degree - order
+        knots = self.knots[order:len(self.knots) - order]
+
+        span, basis = _get_basis(knots, degree, times)
+        # Coefficients of the degree + 1 basis functions that are non-zero
+        # in each span
+        index = span[:, np.newaxis] - degree + np.arange(degree + 1)
+        return np.einsum('mj,mja->ma', basis, coefficients[index])
+
+    def get_derivatives(self, times):
+        """
+        Evaluate position, velocity, acceleration and jerk at the given times.
+        :param times: Array-like of shape (M,), in seconds
+        :return: SplineSample tuple
+        """
+        return SplineSample(*[self.evaluate(times, order) for order in range(4)])
+
+    def _get_derivative_coefficients(self, order):
+        """
+        Get the B-spline coefficients of a derivative of the spline. Each
+        order is derived from the previous one and cached.
+        :param order: Derivative order
+        :return: Array of shape (N - order, A)
+        """
+        while len(self._derivative_coefficients) <= order:
+            i = len(self._derivative_coefficients)  # order being derived
+            coefficients = self._derivative_coefficients[-1]
+            degree = self.degree - i + 1  # degree of the previous order
+            knots = self.knots[i - 1:len(self.knots) - i + 1]
+            spans = (knots[degree + 1:-1] - knots[1:-degree - 1])[:, np.newaxis]
+            self._derivative_coefficients.append(
+                degree * np.diff(coefficients, axis=0) / spans)
+        return self._derivative_coefficients[order]
+
+
+def _get_interpolation_knots(times, degree):
+    """
+    Get the knot vector of an interpolating spline. End knots are repeated
+    degree + 1 times; interior knots are the sample times for odd degrees and
+    the midpoints between sample times for even degrees, dropping those next
+    to the ends (not-a-knot).
+    :param times: Array of shape (N,)
+    :param degree: Spline degree
+    :return: Array of shape (N + degree + 1,)
+    """
+    n = len(times)
+    if degree % 2:
+        interior = times[(degree + 1) // 2:n - (degree + 1) // 2]
+    else:
+        midpoints = (times[1:] + times[:-1]) / 2
+        interior = midpoints[degree // 2:n - degree // 2 - 1]
+    return np.concatenate([[times[0]] * (degree + 1),
+                           interior,
+                           [times[-1]] * (degree + 1)])
+
+
+def _get_basis(knots, degree, x):
+    """
+    Evaluate the non-zero B-spline basis functions at x (Cox-de Boor).
+    :param knots: Knot vector
+    :param degree: Spline degree
+    :param x: Array of shape (M,)
+    :return: Tuple of (span, basis); span is the knot span index of each x,
+    shape (M,), and basis holds the degree + 1 non-zero basis values of
+    functions span - degree .. span, shape (M, degree + 1)
+    """
+    num_coefficients = len(knots) - degree - 1
+    span = np.searchsorted(knots, x, side='right') - 1
+    span = np.clip(span, degree, num_coefficients - 1)
+
+    basis = np.zeros((len(x), degree + 1))
+    basis[:, 0] = 1
+    left = np.empty((len(x), degree + 1))
+    right = np.empty((len(x), degree + 1))
+    for j in range(1, degree + 1):
+        left[:, j] = x - knots[span + 1 - j]
+        right[:, j] = knots[span + j] - x
+        saved = np.zeros(len(x))
+        for r in range(j):
+            temp = basis[:, r] / (right[:, r + 1] + left[:, j - r])
+            basis[:, r] = saved + right[:, r + 1] * temp
+            saved = left[:, j - r] * temp
+        basis[:, j] = saved
+    return span, basis
+
+
+def _solve_interpolation(knots, degree, times, values):
+    """
+    Solve for the B-spline coefficients that interpolate values at times.
+    The collocation matrix is banded and totally positive, so banded Gaussian
+    elimination without pivoting is stable.
+    :param knots: Knot vector
+    :param degree: Spline degree
+    :param times: Array of shape (N,)
+    :param values: Array of shape (N, A)
+    :return: Array of shape (N, A)
+    """
+    n = len(times)
+    k = degree
+    span, basis = _get_basis(knots, degree, times)
+
+    # Band storage: band[i, c - i + k] holds the entry of row i, column c
+    band = np.zeros((n, 2 * k + 1))
+    for j in range(k + 1):
+        column = span - k + j
+        band[np.arange(n), column - np.arange(n) + k] = basis[:, j]
+    rhs = np.array(values, dtype=float)
+
+    # Forward elimination
+    for j in range(n - 1):
+        pivot = band[j, k]
+        for i in range(j + 1, min(j + k + 1, n)):
+            factor = band[i, j - i + k] / pivot
+            if factor:
+                band[i, j - i + k:j - i + 2 * k + 1] -= factor * band[j, k:2 * k + 1]
+                rhs[i] -= factor * rhs[j]
+
+    # Back substitution
+    coefficients = np.empty_like(rhs)
+    for j in range(n - 1, -1, -1):
+        stop = min(j + k + 1, n)
+        coefficients[j] = (rhs[j] - band[j, k + 1:k + 1 + stop - j - 1].dot(coefficients[j + 1:stop])) / band[j, k]
+    return coefficients
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required for spline fitting, is
+    not available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for spline fitting')
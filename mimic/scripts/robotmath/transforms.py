@@ -5,6 +5,13 @@ Basic transforms for vectors, quaternions, and euler angles.
 
 import math
 
+from robotmath import small_matrix
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is not installed; batch conversions are unavailable
+    np = None
+
 
 def quaternion_conjugate(q):
     """
@@ -56,14 +63,17 @@ def quaternion_to_vectors(q):
     :param q: Quaternion
     :return:
     """
-    x = [1, 0, 0]  # base vector
-    y = [0, 1, 0]  # base vector
-    z = [0, 0, 1]  # base vector
-    return [
-        quaternion_vector_multiply(q, x),
-        quaternion_vector_multiply(q, y),
-        quaternion_vector_multiply(q, z)
-    ]
+    # Closed form of q * v * q' for each base vector; the rows of the
+    # result are the rotated x, y and z base vectors
+    w, x, y, z = q[0], q[1], q[2], q[3]
+    ww = w * w
+    xx = x * x
+    yy = y * y
+    zz = z * z
+    m = (ww + xx - yy - zz, 2 * (x * y + w * z), 2 * (x * z - w * y),
+         2 * (x * y - w * z), ww - xx + yy - zz, 2 * (y * z + w * x),
+         2 * (x * z + w * y), 2 * (y * z - w * x), ww - xx - yy + zz)
+    return small_matrix.mat3_to_rows(m)
 
 
 def quaternion_by_vectors(x, y, z):
@@ -159,15 +169,8 @@ def euler_angles_by_matrix(m):
 
     # prevent errors due to Maya returning very small floats and atan2
     # not playing nice with very small number, round to 0
-    
-    _m = [[0 for x in range(3)] for x in range(3)]
-
-    for i in range(3):
-        for j in range(3):
-            if abs(m[i][j]) < 1E-7:
-                _m[i][j] = 0
-            else:
-                _m[i][j] = m[i][j]
+    _m = small_matrix.mat3_from_rows(m)
+    _m = small_matrix.mat3_to_rows([0 if abs(v) < 1E-7 else v for v in _m])
 
     sb = _m[2][0]
     if 1 - sb * sb < 0:
@@ -189,6 +192,292 @@ def euler_angles_by_matrix(m):
     c = _c * -180 / math.pi
     return a, b, c
 
+
+def matrices_by_vectors(vectors):
+    """
+    Stacks flattened base vectors into an array of rotation matrices, using
+    the same row layout as euler_angles_by_matrix: [i, j, k].
+    :param vectors: Array-like of shape (N, 9), [ix, iy, iz, jx, ..., kz]
+    :return: Array of shape (N, 3, 3)
+    """
+    _check_numpy()
+    return np.asarray(vectors, dtype=float).reshape(-1, 3, 3)
+
+
+def quaternions_by_matrices(m, robust=False):
+    """
+    Computes quaternions from a stack of rotation matrices; batch version of
+    quaternion_by_vectors with the same branch selection.
+    :param m: Array of shape (N, 3, 3), rows are the x, y and z vectors
+    :param robust: If True, pick the branch with the largest pivot instead
+    (Shepperd's method). The default branch order of quaternion_by_vectors
+    loses precision for rotations of close to 180 degrees; the default is
+    kept so that program output matches the scalar version.
+    :return: Array of shape (N, 4), [q1, q2, q3, q4]
+    """
+    _check_numpy()
+    m = np.asarray(m, dtype=float).reshape(-1, 3, 3)
+    x_x, x_y, x_z = m[:, 0, 0], m[:, 0, 1], m[:, 0, 2]
+    y_x, y_y, y_z = m[:, 1, 0], m[:, 1, 1], m[:, 1, 2]
+    z_x, z_y, z_z = m[:, 2, 0], m[:, 2, 1], m[:, 2, 2]
+
+    if robust:
+        pivot = np.argmax(np.stack([x_x + y_y + z_z, x_x, y_y, z_z], axis=-1), axis=-1)
+        branch_w = pivot == 0
+        branch_x = pivot == 1
+        branch_y = pivot == 2
+        branch_z = pivot == 3
+    else:
+        # Branch masks, in the same order as the scalar if/elif chain
+        branch_w = x_x + y_y + z_z + 1 > 0.00001
+        branch_x = ~branch_w & (x_x > y_y) & (x_x > z_z)
+        branch_y = ~branch_w & ~branch_x & (y_y > z_z)
+        branch_z = ~branch_w & ~branch_x & ~branch_y
+
+    q = np.empty((m.shape[0], 4))
+
+    b = branch_w
+    s = np.sqrt(x_x[b] + y_y[b] + z_z[b] + 1) * 2
+    q[b] = np.stack([s / 4,
+                     (-z_y[b] + y_z[b]) / s,
+                     (-x_z[b] + z_x[b]) / s,
+                     (-y_x[b] + x_y[b]) / s], axis=-1)
+
+    b = branch_x
+    s = np.sqrt(x_x[b] - y_y[b] - z_z[b] + 1) * 2
+    q[b] = np.stack([(z_y[b] - y_z[b]) / s,
+                     s / 4,
+                     (y_x[b] + x_y[b]) / s,
+                     (x_z[b] + z_x[b]) / s], axis=-1)
+
+    b = branch_y
+    s = np.sqrt(-x_x[b] + y_y[b] - z_z[b] + 1) * 2
+    q[b] = np.stack([(x_z[b] - z_x[b]) / s,
+                     (y_x[b] + x_y[b]) / s,
+                     s / 4,
+                     (z_y[b] + y_z[b]) / s], axis=-1)
+
+    b = branch_z
+    s = np.sqrt(-x_x[b] - y_y[b] + z_z[b] + 1) * 2
+    q[b] = np.stack([(y_x[b] - x_y[b]) / s,
+                     (x_z[b] + z_x[b]) / s,
+                     (z_y[b] + y_z[b]) / s,
+                     s / 4], axis=-1)
+
+    if robust:
+        # The x, y and z branches of quaternion_by_vectors return -w, which
+        # is harmless near the 180 degree rotations the default branch order
+        # uses them for (w ~ 0) but not for arbitrary pivots
+        q[~branch_w, 0] *= -1
+
+    return q
+
+
+def matrices_by_euler_angles(a, b, c):
+    """
+    Computes rotation matrices from Euler angles; batch version of
+    matrix_by_euler_angles.
+    :param a: Array of shape (N,), rotation X
+    :param b: Array of shape (N,), rotation Y
+    :param c: Array of shape (N,), rotation Z
+    :return: Array of shape (N, 3, 3)
+    """
+    _check_numpy()
+    _a = np.atleast_1d(np.asarray(a, dtype=float)) * math.pi / -180
+    _b = np.atleast_1d(np.asarray(b, dtype=float)) * math.pi / -180
+    _c = np.atleast_1d(np.asarray(c, dtype=float)) * math.pi / -180
+    ca = np.cos(_a)
+    sa = np.sin(_a)
+    cb = np.cos(_b)
+    sb = np.sin(_b)
+    cc = np.cos(_c)
+    sc = np.sin(_c)
+    x = np.stack([ca * cb,
+                  sa * cc + ca * sb * sc,
+                  sa * sc - ca * sb * cc], axis=-1)
+    y = np.stack([-sa * cb,
+                  ca * cc - sa * sb * sc,
+                  ca * sc + sa * sb * cc], axis=-1)
+    z = np.stack([sb,
+                  -cb * sc,
+                  cb * cc], axis=-1)
+    return np.stack([x, y, z], axis=1)
+
+
+def euler_angles_by_matrices(m):
+    """
+    Computes Euler angles from a stack of rotation matrices; batch version of
+    euler_angles_by_matrix, including its small-value rounding.
+    :param m: Array of shape (N, 3, 3)
+    :return: Array of shape (N, 3), [a, b, c] in degrees
+    """
+    _check_numpy()
+    _m = np.array(m, dtype=float).reshape(-1, 3, 3)
+
+    # prevent errors due to Maya returning very small floats and atan2
+    # not playing nice with very small number, round to 0
+    _m[np.abs(_m) < 1E-7] = 0
+
+    sb = _m[:, 2, 0]
+    cb = np.sqrt(np.maximum(1 - sb * sb, 0))
+    ca = _m[:, 0, 0]
+    # Adding 0 turns -0.0 into 0.0, as the scalar version's integer 0 does,
+    # so that atan2 picks the same side of the +/-180 cut
+    sa = -_m[:, 1, 0] + 0.0
+    degenerate = (np.abs(_m[:, 0, 0]) < 1E-7) & (np.abs(_m[:, 1, 0]) < 1E-7)
+    cc = np.where(degenerate, _m[:, 1, 1], _m[:, 2, 2])
+    sc = np.where(degenerate, _m[:, 1, 2], -_m[:, 2, 1] + 0.0)
+    angles = np.stack([np.arctan2(sa, ca),
+                       np.arctan2(sb, cb),
+                       np.arctan2(sc, cc)], axis=-1)
+    return angles * -180 / math.pi
+
+
+def rotation_vectors_by_matrices(m):
+    """
+    Computes rotation vectors (axis * angle, in radians) from a stack of
+    rotation matrices, using the quaternion convention of
+    quaternions_by_matrices.
+    :param m: Array of shape (N, 3, 3)
+    :return: Array of shape (N, 3)
+    """
+    q = quaternions_by_matrices(m)
+    # Use the shortest rotation
+    q[q[:, 0] < 0] *= -1
+    sin_half = np.linalg.norm(q[:, 1:], axis=-1)
+    angle = 2 * np.arctan2(sin_half, q[:, 0])
+    # angle / sin(angle / 2) tends to 2 as the rotation vanishes
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scale = np.where(sin_half > 1E-12, angle / sin_half, 2.0)
+    return q[:, 1:] * scale[:, np.newaxis]
+
+
+def matrices_by_quaternions(q):
+    """
+    Computes rotation matrices from a stack of quaternions; batch version of
+    quaternion_to_vectors.
+    :param q: Array of shape (N, 4), [w, x, y, z]
+    :return: Array of shape (N, 3, 3), rows are the rotated x, y and z vectors
+    """
+    _check_numpy()
+    q = np.asarray(q, dtype=float).reshape(-1, 4)
+    w, x, y, z = q[:, 0], q[:, 1], q[:, 2], q[:, 3]
+    ww = w * w
+    xx = x * x
+    yy = y * y
+    zz = z * z
+    m = np.stack([ww + xx - yy - zz, 2 * (x * y + w * z), 2 * (x * z - w * y),
+                  2 * (x * y - w * z), ww - xx + yy - zz, 2 * (y * z + w * x),
+                  2 * (x * z + w * y), 2 * (y * z - w * x), ww - xx - yy + zz],
+                 axis=-1)
+    return m.reshape(-1, 3, 3)
+
+
+def quaternions_conjugate(q):
+    """
+    Computes quaternion conjugates; batch version of quaternion_conjugate.
+    :param q: Array of shape (N, 4)
+    :return: Array of shape (N, 4)
+    """
+    _check_numpy()
+    return np.asarray(q, dtype=float) * [1, -1, -1, -1]
+
+
+def quaternions_multiply(q, r):
+    """
+    Computes quaternion multiplications; batch version of quaternion_multiply.
+    :param q: Array of shape (N, 4)
+    :param r: Array of shape (N, 4)
+    :return: Array of shape (N, 4)
+    """
+    _check_numpy()
+    q = np.asarray(q, dtype=float)
+    r = np.asarray(r, dtype=float)
+    q_w, q_x, q_y, q_z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    r_w, r_x, r_y, r_z = r[..., 0], r[..., 1], r[..., 2], r[..., 3]
+    return np.stack([
+        q_w * r_w - q_x * r_x - q_y * r_y - q_z * r_z,
+        q_w * r_x + q_x * r_w + q_y * r_z - q_z * r_y,
+        q_w * r_y + q_y * r_w + q_z * r_x - q_x * r_z,
+        q_w * r_z + q_z * r_w + q_x * r_y - q_y * r_x
+    ], axis=-1)
+
+
+def quaternions_log(q):
+    """
+    Computes the logarithm of unit quaternions.
+    :param q: Array of shape (N, 4)
+    :return: Array of shape (N, 4), pure quaternions [0, axis * half angle]
+    """
+    _check_numpy()
+    q = np.asarray(q, dtype=float)
+    sin_half = np.linalg.norm(q[..., 1:], axis=-1)
+    half_angle = np.arctan2(sin_half, q[..., 0])
+    # half_angle / sin(half_angle) tends to 1 as the rotation vanishes
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scale = np.where(sin_half > 1E-12, half_angle / sin_half, 1.0)
+    log = np.zeros_like(q)
+    log[..., 1:] = q[..., 1:] * scale[..., np.newaxis]
+    return log
+
+
+def quaternions_exp(q):
+    """
+    Computes the exponential of pure quaternions; inverse of quaternions_log.
+    :param q: Array of shape (N, 4), [0, x, y, z]
+    :return: Array of shape (N, 4), unit quaternions
+    """
+    _check_numpy()
+    q = np.asarray(q, dtype=float)
+    half_angle = np.linalg.norm(q[..., 1:], axis=-1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        scale = np.where(half_angle > 1E-12, np.sin(half_angle) / half_angle, 1.0)
+    exp = np.empty_like(q)
+    exp[..., 0] = np.cos(half_angle)
+    exp[..., 1:] = q[..., 1:] * scale[..., np.newaxis]
+    return exp
+
+
+def quaternions_slerp(q, r, t, shortest=True):
+    """
+    Spherical linear interpolation between pairs of unit quaternions.
+    :param q: Array of shape (N, 4), start quaternions
+    :param r: Array of shape (N, 4), end quaternions
+    :param t: Array of shape (N,), interpolation parameters in [0, 1]
+    :param shortest: If True, interpolate along the shorter arc by flipping
+    r where needed; SQUAD relies on the raw, unflipped interpolation.
+    :return: Array of shape (N, 4)
+    """
+    _check_numpy()
+    q = np.asarray(q, dtype=float)
+    r = np.array(r, dtype=float)
+    t = np.asarray(t, dtype=float)[..., np.newaxis]
+    dot = np.sum(q * r, axis=-1)
+    if shortest:
+        r[dot < 0] *= -1
+        dot = np.abs(dot)
+    dot = np.clip(dot, -1, 1)
+    angle = np.arccos(dot)[..., np.newaxis]
+    sin_angle = np.sin(angle)
+    # Fall back to normalized linear interpolation for nearly equal rotations
+    close = sin_angle < 1E-6
+    with np.errstate(invalid='ignore', divide='ignore'):
+        w_q = np.where(close, 1 - t, np.sin((1 - t) * angle) / sin_angle)
+        w_r = np.where(close, t, np.sin(t * angle) / sin_angle)
+    result = w_q * q + w_r * r
+    return result / np.linalg.norm(result, axis=-1, keepdims=True)
+
+
+def _check_numpy():
+    """
+    Raise an ImportError if NumPy, which is required by the batch
+    conversions, is not available.
+    :return:
+    """
+    if np is None:
+        raise ImportError('NumPy is required for batch rotation conversions')
+
+
 def vector_normalize(v):
     """
     Computes normalized vector